@@ -1,5 +1,5 @@
 import { apiClient } from './client'
-import type { Task, TaskUpdatePayload, AttachmentUploadPayload, UploadedAttachment } from '../types/task'
+import type { Task, TaskUpdatePayload, UploadedAttachment } from '../types/task'
 
 export async function getTask(taskId: string): Promise<Task> {
   const { data } = await apiClient.get<Task>(`/task/${taskId}`)
@@ -11,16 +11,30 @@ export async function translateTexts(texts: string[]): Promise<string[]> {
   return data.translations
 }
 
-export async function updateTask(taskId: string, payload: TaskUpdatePayload): Promise<Partial<Task>> {
-  const { data } = await apiClient.put<Partial<Task>>(`/task/${taskId}`, payload)
+export async function updateTask(
+  taskId: string,
+  payload: TaskUpdatePayload,
+  etag?: string | null
+): Promise<Partial<Task>> {
+  const headers = etag ? { 'If-Match': etag } : undefined
+  const { data } = await apiClient.put<Partial<Task>>(`/task/${taskId}`, payload, { headers })
   return data
 }
 
 export async function uploadAttachment(
   taskId: string,
-  payload: AttachmentUploadPayload
+  file: File,
+  onProgress?: (fraction: number) => void
 ): Promise<UploadedAttachment> {
-  const { data } = await apiClient.post<UploadedAttachment>(`/task/${taskId}/attachment`, payload)
+  // Send the file as-is; the browser sets the multipart boundary
+  const form = new FormData()
+  form.append('attachment', file, file.name)
+  const { data } = await apiClient.post<UploadedAttachment>(`/task/${taskId}/attachment`, form, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+    onUploadProgress: (e) => {
+      if (onProgress && e.total) onProgress(e.loaded / e.total)
+    },
+  })
   return data
 }
 
@@ -1,22 +1,22 @@
 import { useRef } from 'react'
 import { useLanguage } from '../contexts/LanguageContext'
 import { t } from '../utils/i18n'
+import type { UploadProgress } from '../types/task'
 
 interface Props {
-  onUpload: (file: File) => Promise<unknown>
+  onUpload: (files: File[]) => Promise<unknown>
+  uploads: UploadProgress[]
   uploading: boolean
   uploadError: string | null
 }
 
-export default function FileUploader({ onUpload, uploading, uploadError }: Props) {
+export default function FileUploader({ onUpload, uploads, uploading, uploadError }: Props) {
   const { lang } = useLanguage()
   const inputRef = useRef<HTMLInputElement>(null)
 
   async function handleFiles(files: FileList | null) {
     if (!files || files.length === 0) return
-    for (const file of Array.from(files)) {
-      await onUpload(file)
-    }
+    await onUpload(Array.from(files))
   }
 
   function handleDrop(e: React.DragEvent) {
@@ -45,6 +45,29 @@ export default function FileUploader({ onUpload, uploading, uploadError }: Props
           </>
         )}
       </div>
+      {uploads.length > 0 && (
+        <ul className="space-y-1 px-1">
+          {uploads.map((u) => (
+            <li key={u.id} className="text-xs text-gray-600">
+              <div className="flex justify-between gap-2">
+                <span className="truncate">{u.name}</span>
+                <span className={u.status === 'error' ? 'text-red-500' : 'text-gray-400'}>
+                  {u.status === 'queued' && t('uploadQueued', lang)}
+                  {u.status === 'compressing' && t('preparingUpload', lang)}
+                  {u.status === 'uploading' && `${Math.round(u.progress * 100)}%`}
+                  {u.status === 'done' && '✓'}
+                  {u.status === 'error' && t('uploadFailed', lang)}
+                </span>
+              </div>
+              {u.status === 'uploading' && (
+                <div className="h-1 bg-gray-100 rounded-full overflow-hidden mt-0.5">
+                  <div className="h-full bg-blue-500 transition-all" style={{ width: `${u.progress * 100}%` }} />
+                </div>
+              )}
+            </li>
+          ))}
+        </ul>
+      )}
       {uploadError && (
         <p className="text-xs text-red-500 px-1">{uploadError}</p>
       )}
@@ -1,24 +1,31 @@
-import { useState } from 'react'
+import { useRef, useState } from 'react'
 import { uploadAttachment } from '../api/taskApi'
-import type { Task, UploadedAttachment } from '../types/task'
+import { compressImage } from '../utils/imageCompression'
+import type { Task, UploadedAttachment, UploadProgress } from '../types/task'
+
+// Uploads run this many at a time; the rest wait their turn
+const configuredConcurrency = Number(import.meta.env.VITE_UPLOAD_CONCURRENCY ?? 3)
+const UPLOAD_CONCURRENCY = Number.isNaN(configuredConcurrency) ? 3 : Math.max(1, configuredConcurrency)
 
 export function useAttachmentUpload(
   taskId: string,
   setTask: React.Dispatch<React.SetStateAction<Task | null>>
 ) {
-  const [uploading, setUploading] = useState(false)
+  const [uploads, setUploads] = useState<UploadProgress[]>([])
   const [uploadError, setUploadError] = useState<string | null>(null)
+  const nextId = useRef(0)
 
-  async function upload(file: File): Promise<UploadedAttachment | null> {
-    setUploading(true)
-    setUploadError(null)
+  function update(id: number, patch: Partial<UploadProgress>) {
+    setUploads((prev) => prev.map((u) => (u.id === id ? { ...u, ...patch } : u)))
+  }
+
+  async function uploadOne(file: File, id: number): Promise<UploadedAttachment | null> {
     try {
-      const base64 = await fileToBase64(file)
-      const result = await uploadAttachment(taskId, {
-        filename: file.name,
-        content_type: file.type || 'application/octet-stream',
-        data: base64,
-      })
+      update(id, { status: 'compressing' })
+      const prepared = await compressImage(file)
+      update(id, { status: 'uploading' })
+      const result = await uploadAttachment(taskId, prepared, (progress) => update(id, { progress }))
+      update(id, { status: 'done', progress: 1 })
       // Optimistically append to local attachment list
       setTask((prev) => {
         if (!prev) return prev
@@ -38,25 +45,34 @@ export function useAttachmentUpload(
       return result
     } catch (err: unknown) {
       const e = err as { response?: { data?: string }; message?: string }
+      update(id, { status: 'error' })
       setUploadError(e?.response?.data ?? e?.message ?? 'Upload failed')
       return null
-    } finally {
-      setUploading(false)
     }
   }
 
-  return { upload, uploading, uploadError }
-}
+  async function upload(files: File[]): Promise<(UploadedAttachment | null)[]> {
+    setUploadError(null)
+    const queued = files.map((file) => ({ file, id: nextId.current++ }))
+    setUploads((prev) => [
+      // Finished uploads from an earlier batch drop off the list
+      ...prev.filter((u) => u.status !== 'done'),
+      ...queued.map(({ file, id }) => ({ id, name: file.name, progress: 0, status: 'queued' as const })),
+    ])
 
-function fileToBase64(file: File): Promise<string> {
-  return new Promise((resolve, reject) => {
-    const reader = new FileReader()
-    reader.onload = () => {
-      const result = reader.result as string
-      // result is "data:<mime>;base64,<data>" — strip the prefix
-      resolve(result.split(',')[1])
+    const results: (UploadedAttachment | null)[] = new Array(queued.length).fill(null)
+    let next = 0
+    async function worker() {
+      while (next < queued.length) {
+        const index = next++
+        results[index] = await uploadOne(queued[index].file, queued[index].id)
+      }
     }
-    reader.onerror = reject
-    reader.readAsDataURL(file)
-  })
+    await Promise.all(Array.from({ length: Math.min(UPLOAD_CONCURRENCY, queued.length) }, worker))
+    return results
+  }
+
+  const uploading = uploads.some((u) => u.status !== 'done' && u.status !== 'error')
+
+  return { upload, uploads, uploading, uploadError }
 }
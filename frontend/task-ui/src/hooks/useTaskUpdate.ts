@@ -6,6 +6,7 @@ export function useTaskUpdate(
   taskId: string,
   setTask: React.Dispatch<React.SetStateAction<Task | null>>,
   refresh: () => void,
+  etag: string | null,
 ) {
   const [saving, setSaving] = useState(false)
   const [saveError, setSaveError] = useState<string | null>(null)
@@ -16,14 +17,16 @@ export function useTaskUpdate(
     setSaveError(null)
     setSaveSuccess(false)
     try {
-      const updated = await updateTask(taskId, payload)
+      const updated = await updateTask(taskId, payload, etag)
       setTask((prev) => prev ? { ...prev, ...updated } : prev)
       setSaveSuccess(true)
       setTimeout(() => setSaveSuccess(false), 2500)
       refresh()
     } catch (err: unknown) {
-      const e = err as { response?: { data?: { error?: string } }; message?: string }
+      const e = err as { response?: { status?: number; data?: { error?: string } }; message?: string }
       setSaveError(e?.response?.data?.error ?? e?.message ?? 'Failed to save')
+      // 412 — someone else saved first; reload so the next save uses the fresh etag
+      if (e?.response?.status === 412) refresh()
     } finally {
       setSaving(false)
     }
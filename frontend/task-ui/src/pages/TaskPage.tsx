@@ -24,8 +24,8 @@ export default function TaskPage() {
 
   const { task, setTask, refresh, loading, error } = useTask(taskId ?? '')
   const { displayTask, translating } = useTaskTranslation(task, lang)
-  const { save, saving, saveError, saveSuccess } = useTaskUpdate(taskId ?? '', setTask, refresh)
-  const { upload, uploading, uploadError } = useAttachmentUpload(taskId ?? '', setTask)
+  const { save, saving, saveError, saveSuccess } = useTaskUpdate(taskId ?? '', setTask, refresh, task?.etag ?? null)
+  const { upload, uploads, uploading, uploadError } = useAttachmentUpload(taskId ?? '', setTask)
 
   // Auto-default to Chinese if translate_flag is set and user has no stored preference.
   // Uses setLangAuto so it does NOT write to localStorage — only explicit toggle() persists.
@@ -107,7 +107,7 @@ export default function TaskPage() {
           />
         </div>
 
-        <FileUploader onUpload={upload} uploading={uploading} uploadError={uploadError} />
+        <FileUploader onUpload={upload} uploads={uploads} uploading={uploading} uploadError={uploadError} />
         <AttachmentList attachments={task.attachments} />
 
         <StatusBanner saving={saving} saveSuccess={saveSuccess} saveError={saveError} />
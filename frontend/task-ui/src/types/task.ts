@@ -30,6 +30,8 @@ export interface Task {
   date_updated: string
   pdf_stale_fields: string[]
   cache_stale: boolean
+  // Version of the tech fields — sent back as If-Match on PUT
+  etag: string | null
 }
 
 export interface TaskUpdatePayload {
@@ -39,15 +41,17 @@ export interface TaskUpdatePayload {
   clickup_status?: string
 }
 
-export interface AttachmentUploadPayload {
-  filename: string
-  content_type: string
-  data: string // base64
-}
-
 export interface UploadedAttachment {
   attachment_id: string
   name: string
   url: string
   thumbnail: string | null
+  bytes_saved?: number
+}
+
+export interface UploadProgress {
+  id: number
+  name: string
+  progress: number // 0..1 of the bytes sent
+  status: 'queued' | 'compressing' | 'uploading' | 'done' | 'error'
 }
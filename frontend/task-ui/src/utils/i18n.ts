@@ -15,6 +15,9 @@ const strings = {
   notesPlaceholder:  { en: 'Add notes about this task...',                             zh: '添加此任务的备注...' },
   autoSaved:         { en: 'Auto-saved when you leave this field',                    zh: '离开此字段时自动保存' },
   uploading:         { en: 'Uploading...',                                             zh: '上传中...' },
+  preparingUpload:   { en: 'Preparing...',                                             zh: '准备中...' },
+  uploadQueued:      { en: 'Waiting...',                                               zh: '等待中...' },
+  uploadFailed:      { en: 'Failed',                                                   zh: '失败' },
   tapToAttach:       { en: 'Tap to attach a photo or file',                           zh: '点击附加照片或文件' },
   dragDrop:          { en: 'or drag and drop',                                         zh: '或拖放' },
   attachments:       { en: 'Attachments',                                              zh: '附件' },
@@ -0,0 +1,114 @@
+// Photos are resized and recompressed in the browser before upload, so a
+// multi-megabyte phone photo does not have to cross a cellular connection.
+const MAX_DIMENSION = Number(import.meta.env.VITE_UPLOAD_MAX_DIMENSION ?? 2048)
+const TARGET_BYTES = Number(import.meta.env.VITE_UPLOAD_TARGET_BYTES ?? 1_500_000)
+const INITIAL_QUALITY = 0.85
+const MIN_QUALITY = 0.5
+const QUALITY_STEP = 0.1
+
+// Formats the canvas can decode and that are worth recompressing as JPEG
+const COMPRESSIBLE_TYPES = new Set(['image/jpeg', 'image/png', 'image/webp', 'image/heic', 'image/heif'])
+
+/**
+ * Returns a JPEG no larger than MAX_DIMENSION on its long edge, stepping the
+ * quality down until it is under TARGET_BYTES (or MIN_QUALITY is reached).
+ * Non-images, animations (GIF, animated WebP, APNG) and anything the browser
+ * cannot decode are returned unchanged, as is any result that would not be
+ * smaller than the original.
+ */
+export async function compressImage(file: File): Promise<File> {
+  if (!COMPRESSIBLE_TYPES.has(file.type)) return file
+  if (await isAnimated(file)) return file
+
+  let bitmap: ImageBitmap
+  try {
+    // Decodes off the main thread and applies the EXIF orientation
+    bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' })
+  } catch {
+    return file
+  }
+
+  try {
+    const scale = Math.min(1, MAX_DIMENSION / Math.max(bitmap.width, bitmap.height))
+    if (scale === 1 && file.size <= TARGET_BYTES) return file
+
+    const width = Math.round(bitmap.width * scale)
+    const height = Math.round(bitmap.height * scale)
+    const { canvas, ctx } = createCanvas(width, height)
+    if (!ctx) return file
+    // JPEG has no alpha; flatten transparent PNGs onto white rather than black
+    ctx.fillStyle = '#fff'
+    ctx.fillRect(0, 0, width, height)
+    ctx.drawImage(bitmap, 0, 0, width, height)
+
+    let quality = INITIAL_QUALITY
+    let blob = await encodeJpeg(canvas, quality)
+    while (blob.size > TARGET_BYTES && quality - QUALITY_STEP >= MIN_QUALITY) {
+      quality -= QUALITY_STEP
+      blob = await encodeJpeg(canvas, quality)
+    }
+    if (blob.size >= file.size) return file
+
+    const name = file.name.replace(/\.[^.]*$/, '') + '.jpg'
+    return new File([blob], name, { type: 'image/jpeg', lastModified: file.lastModified })
+  } catch {
+    return file
+  } finally {
+    bitmap.close()
+  }
+}
+
+// Animated WebP and APNG would be flattened to their first frame
+async function isAnimated(file: File): Promise<boolean> {
+  if (file.type !== 'image/webp' && file.type !== 'image/png') return false
+  let head: Uint8Array
+  try {
+    head = new Uint8Array(await file.slice(0, 65536).arrayBuffer())
+  } catch {
+    return false
+  }
+  if (file.type === 'image/webp') {
+    // RIFF <size> WEBP VP8X <size> <flags>; flag 0x02 marks an animation
+    return chunkType(head, 12) === 'VP8X' && (head[20] & 0x02) !== 0
+  }
+  // An APNG has an acTL chunk ahead of its first IDAT
+  const view = new DataView(head.buffer, head.byteOffset, head.byteLength)
+  for (let offset = 8; offset + 8 <= head.length; offset += 12 + view.getUint32(offset)) {
+    const type = chunkType(head, offset + 4)
+    if (type === 'acTL') return true
+    if (type === 'IDAT') return false
+  }
+  return false
+}
+
+function chunkType(bytes: Uint8Array, offset: number): string {
+  return String.fromCharCode(...bytes.subarray(offset, offset + 4))
+}
+
+type Canvas2D =
+  | { canvas: OffscreenCanvas; ctx: OffscreenCanvasRenderingContext2D | null }
+  | { canvas: HTMLCanvasElement; ctx: CanvasRenderingContext2D | null }
+
+function createCanvas(width: number, height: number): Canvas2D {
+  if (typeof OffscreenCanvas !== 'undefined') {
+    const canvas = new OffscreenCanvas(width, height)
+    return { canvas, ctx: canvas.getContext('2d') }
+  }
+  const canvas = document.createElement('canvas')
+  canvas.width = width
+  canvas.height = height
+  return { canvas, ctx: canvas.getContext('2d') }
+}
+
+function encodeJpeg(canvas: OffscreenCanvas | HTMLCanvasElement, quality: number): Promise<Blob> {
+  if (canvas instanceof HTMLCanvasElement) {
+    return new Promise((resolve, reject) => {
+      canvas.toBlob(
+        (blob) => (blob ? resolve(blob) : reject(new Error('Canvas encoding failed'))),
+        'image/jpeg',
+        quality
+      )
+    })
+  }
+  return canvas.convertToBlob({ type: 'image/jpeg', quality })
+}
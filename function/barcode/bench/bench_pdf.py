@@ -0,0 +1,291 @@
+"""
+Micro-benchmarks for the PDF pipeline. Not deployed (see .funcignore).
+
+    python bench/bench_pdf.py [quill] [richtext] [render] [images] [translate] [--lines N] [--images N] [--repeat N]
+
+Run from function/barcode so `shared` is importable.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from functools import lru_cache
+from dataclasses import replace
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.pdf import quill
+from shared.pdf.quill import iter_quill_paragraphs, quill_flowable
+from shared.utils import helpers
+
+
+def make_delta(lines: int, salt: int = 0) -> str:
+    """A realistic action-item delta: plain lines, formatted runs, nested lists."""
+    ops = []
+    for i in range(lines):
+        kind = i % 4
+        ops.append({"insert": f"Check unit {salt}-{i} for "})
+        ops.append({"insert": "water damage", "attributes": {"bold": True}})
+        ops.append({"insert": " & report <asap>"})
+        if kind == 0:
+            ops.append({"insert": "\n"})
+        elif kind == 1:
+            ops.append({"insert": "\n", "attributes": {"list": {"list": "ordered"}}})
+        elif kind == 2:
+            ops.append({"insert": "\n", "attributes": {"list": {"list": "ordered"}, "indent": 1}})
+        else:
+            ops.append({"insert": "\n", "attributes": {"list": {"list": "bullet"}}})
+    return json.dumps({"ops": ops})
+
+
+@lru_cache(maxsize=1024)
+def _segment_markup(text, seg_type=None, number=None):
+    body = escape(text)
+    if seg_type == "bullet":
+        return f"• {body}"
+    if seg_type == "ordered":
+        return f"{number}. {body}"
+    return body
+
+
+def parse_then_rebuild(value_richtext: str) -> list:
+    """The previous path: memoized flatten to segments, then rebuild markup per segment."""
+    return [
+        _segment_markup(seg.text, seg.type, i + 1 if seg.type == "ordered" else None)
+        for i, seg in enumerate(helpers.parse_quill_segments(value_richtext))
+    ]
+
+
+def rich_text(value_richtext: str) -> list:
+    return [p.markup for p in iter_quill_paragraphs(value_richtext)]
+
+
+def _clear_caches():
+    # Time cold parses: a render worker sees each delta once
+    helpers._quill_cache.clear()
+    quill._quill_cache.clear()
+    _segment_markup.cache_clear()
+
+
+def _time(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_quill(args):
+    docs = [make_delta(args.lines, salt=i) for i in range(args.docs)]
+    old = _time(parse_then_rebuild, docs, args.repeat)
+    new = _time(rich_text, docs, args.repeat)
+    per = lambda s: s / len(docs) * 1e6
+    print(f"quill: {len(docs)} docs x {args.lines} lines, best of {args.repeat}")
+    print(f"  parse-then-rebuild  {per(old):8.1f} us/doc")
+    print(f"  rich text           {per(new):8.1f} us/doc  ({old / new:.2f}x)")
+
+
+def bench_richtext(args):
+    """Delta -> laid-out body Paragraphs, the stage the templates actually run."""
+    from reportlab.platypus import Paragraph
+    from shared.pdf.styles import PDFStyles
+
+    style = PDFStyles().body
+    width = 7.5 * 72
+
+    def layout(markups):
+        for markup in markups:
+            Paragraph(markup, style).wrap(width, 10_000)
+
+    def layout_rich(value_richtext):
+        # What templates._rich_text_paragraphs does: fragments without the markup parser
+        for paragraph in iter_quill_paragraphs(value_richtext):
+            quill_flowable(paragraph, style).wrap(width, 10_000)
+
+    docs = [make_delta(args.lines, salt=i) for i in range(args.docs // 10 or 1)]
+    old = _time(lambda d: layout(parse_then_rebuild(d)), docs, args.repeat)
+    new = _time(layout_rich, docs, args.repeat)
+    per = lambda s: s / len(docs) * 1e3
+    print(f"richtext: {len(docs)} docs x {args.lines} lines -> wrapped Paragraphs, best of {args.repeat}")
+    print(f"  parse-then-rebuild  {per(old):8.2f} ms/doc")
+    print(f"  rich text           {per(new):8.2f} ms/doc  ({old / new:.2f}x)")
+
+
+def make_images(count: int) -> list:
+    from PIL import Image
+    images = []
+    for i in range(count):
+        size = (1200, 900) if i % 2 == 0 else (390, 844)  # photo, phone screenshot
+        buf = io.BytesIO()
+        Image.new("RGB", size, (40 * i % 255, 120, 200)).save(buf, "JPEG")
+        images.append(buf.getvalue())
+    return images
+
+
+def render_kwargs(args) -> dict:
+    delta = make_delta(args.lines // 4 or 1)
+    return {
+        "property_address": "1234 Example Street, Unit 5B, Springfield",
+        "unit_name": "5B",
+        "start_date": "1760000000000",
+        "start_buffer": 2,
+        "issue_description": delta,
+        "action_items": delta,
+        "completion_url": "https://example.com/complete?task=abc&token=xyz",
+        "attachment_images": make_images(args.images),
+    }
+
+
+def bench_render(args):
+    """Full PDF renders: time and Python allocations per render (tracemalloc)."""
+    from shared.pdf.generator import MaintenancePDFGenerator
+
+    kwargs = render_kwargs(args)
+    renders = max(args.docs // 20, 3)
+
+    def measure(make_generator):
+        generator = MaintenancePDFGenerator()
+        generator.generate(**kwargs)  # warm fonts and imports outside the measurement
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for _ in range(renders):
+                make_generator(generator).generate(**kwargs)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        make_generator(generator).generate(**kwargs)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        allocated = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+        blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+        return best / renders, peak, allocated, blocks
+
+    print(f"render: {args.images} images, {args.lines // 4 or 1}-line deltas, {renders} renders x best of {args.repeat}")
+    for label, make_generator in [
+        ("fresh generator", lambda _: MaintenancePDFGenerator()),
+        ("compiled skeleton", lambda g: g),
+    ]:
+        per, peak, allocated, blocks = measure(make_generator)
+        print(f"  {label:<18} {per * 1e3:8.2f} ms/render  peak {peak / 1024:8.1f} KiB"
+              f"  retained {allocated / 1024:7.1f} KiB in {blocks} blocks")
+
+
+def bench_images(args):
+    """Attachment classification + rendition: cold, disk-warm and memory-warm cache."""
+    import tempfile
+    from PIL import Image
+    from shared.pdf.components import ScaledImageGrid
+    from shared.pdf.image_cache import ImageInfoCache
+    from shared.pdf.styles import PDFStyles, PDFLayout
+    import shared.pdf.components as components
+
+    images = []
+    for i in range(args.images):
+        size = (2000, 1500) if i % 2 == 0 else (1170, 2532)
+        buf = io.BytesIO()
+        Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3)).save(buf, "JPEG", quality=85)
+        images.append(buf.getvalue())
+    grid = ScaledImageGrid(PDFStyles(), PDFLayout())
+
+    def classify_all():
+        start = time.perf_counter()
+        for idx, image_bytes in enumerate(images, 1):
+            grid._classify(image_bytes, idx)
+        return (time.perf_counter() - start) / len(images)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        original = components.image_cache
+        try:
+            components.image_cache = ImageInfoCache(directory=cache_dir)
+            cold = classify_all()
+            memory = classify_all()
+            components.image_cache = ImageInfoCache(directory=cache_dir)  # new process, same disk
+            disk = classify_all()
+        finally:
+            components.image_cache = original
+
+    print(f"images: {len(images)} noisy JPEGs (2000x1500 / 1170x2532)")
+    print(f"  cold (decode + classify + resize)  {cold * 1e3:8.2f} ms/image")
+    print(f"  disk-warm                          {disk * 1e3:8.2f} ms/image")
+    print(f"  memory-warm                        {memory * 1e3:8.2f} ms/image")
+
+
+def bench_translate(args):
+    """Translated render: inline translation vs pre-pass (cold and cached), local backend."""
+    import shared.pdf.generator as generator_module
+    from shared.pdf.generator import MaintenancePDFGenerator
+    from shared.pdf.worker import RenderSpec, render_spec
+    from shared.pdf.translations import translate_spec
+    from shared.utils.translation import LocalTranslationBackend, Translator
+
+    translator = Translator(LocalTranslationBackend(latency_ms=args.latency_ms))
+    delta = make_delta(args.lines // 4 or 1)
+    spec = RenderSpec("1234 Example Street", 1760000000000, 2, delta, delta,
+                      "https://example.com/complete", (), translate=True)
+
+    render_spec(replace(spec, translate=False))  # warm fonts outside the measurement
+
+    # The pre-pass-free path, translating each string inline as the templates ask
+    start = time.perf_counter()
+    original = generator_module.translate_text
+    generator_module.translate_text = translator.translate
+    try:
+        MaintenancePDFGenerator(translate=True).generate(**spec.generate_kwargs())
+    finally:
+        generator_module.translate_text = original
+    inline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    translated, cache, sent = translate_spec(spec, translator.translate_many)
+    render_spec(translated)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    translated, _, sent_warm = translate_spec(spec, translator.translate_many, cache)
+    render_spec(translated)
+    warm = time.perf_counter() - start
+
+    print(f"translate: {args.lines // 4 or 1}-line deltas, local backend at {args.latency_ms:.0f} ms/request")
+    print(f"  inline during layout   {inline * 1e3:8.1f} ms")
+    print(f"  pre-pass, cold         {cold * 1e3:8.1f} ms  ({sent} strings, batched)")
+    print(f"  pre-pass, cached       {warm * 1e3:8.1f} ms  ({sent_warm} strings)")
+
+
+BENCHES = {
+    "quill": bench_quill,
+    "richtext": bench_richtext,
+    "render": bench_render,
+    "images": bench_images,
+    "translate": bench_translate,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bench", nargs="*", help=f"benchmarks to run: {', '.join(sorted(BENCHES))} (default: all)")
+    parser.add_argument("--lines", type=int, default=40, help="lines per Quill document")
+    parser.add_argument("--docs", type=int, default=200, help="documents per timing pass")
+    parser.add_argument("--images", type=int, default=4, help="attachments per rendered PDF")
+    parser.add_argument("--latency-ms", type=float, default=80, help="simulated translator latency")
+    parser.add_argument("--repeat", type=int, default=5, help="timing passes; the best is reported")
+    args = parser.parse_args()
+    unknown = set(args.bench) - set(BENCHES)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    for name in args.bench or sorted(BENCHES):
+        BENCHES[name](args)
+
+
+if __name__ == "__main__":
+    main()
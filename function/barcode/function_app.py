@@ -1,24 +1,48 @@
 import os
 import json
-import uuid
+import asyncio
+import time
 import base64
+import hashlib
 import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
-import requests
+from urllib.parse import unquote
 import azure.functions as func
-from azure.storage.blob import BlobServiceClient
-from azure.identity import ManagedIdentityCredential
 from azure.communication.email import EmailClient
 from azure.keyvault.secrets import SecretClient
 from azure.identity import DefaultAzureCredential
-from shared.pdf.generator import MaintenancePDFGenerator
-from shared.utils.helpers import download_image_bytes, translate_text, parse_quill_delta
-from shared.utils.table_cache import write_task_snapshot, read_task_snapshot, update_tech_fields, seed_pdf_snapshot_fields
+from shared.pdf.worker import RenderSpec, RenderQueueFull, render_pool
+from shared.pdf.translations import translate_spec
+from shared.utils import clickup
+from shared.utils.blob_store import upload_pdf, get_pdf_properties, download_pdf, pdf_blob_url
+from shared.utils.staleness import (
+    PDF_FIELD_COMPARISONS, STALE_LABELS, CLEARED_BANNER_HASH, LEGACY_BANNER_HASH, build_warnings_banner, compute_stale_fields,
+    current_banner_hash, format_stale_fields, history_labels, parse_stale_fields, resolve_history,
+    warnings_banner_hash,
+)
+from shared.utils.helpers import download_image_bytes, parse_quill_delta
+from shared.utils.translation import get_translator
+from shared.utils.image_normalize import NORMALIZE_ENABLED, normalize_upload
+from shared.utils import webhook
+from shared.utils.log import get_logger, log_event, sample_payload, Truncated
+from shared.utils.metrics import metrics, timed_route, azure_response_hook
+from shared.utils.self_writes import self_writes, tag_signature, field_signature, COMMENT_SIGNATURE
+from shared.utils.table_cache import (
+    write_task_snapshot, write_task_snapshots, read_task_snapshot, read_task_snapshot_with_etag,
+    read_all_task_snapshots, read_reconciler_watermark, write_reconciler_watermark,
+    update_tech_fields, tech_etag, build_snapshot_entity, pdf_seed_fields, TaskUnitOfWork, SnapshotConflict,
+    read_translation_cache, write_translation_cache, write_warnings_banner_hash,
+)
 
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+webhook_log = get_logger("webhook")
+task_log = get_logger("task")
+email_log = get_logger("email")
+
 
 def get_secret_value(secret_name):
     return os.environ.get(secret_name)
@@ -28,28 +52,18 @@ def _get_clickup_token():
     return get_secret_value("ClickUpSecret") or get_secret_value("ClickUpAPIToken")
 
 
-def _get_blob_service_client():
-    if os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT") == "Development":
-        return BlobServiceClient.from_connection_string(
-            "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPfsNjYWjl2kh;BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
-        )
-    credential = ManagedIdentityCredential(
-        client_id=os.environ.get("AzureWebJobsStorage__clientId")
-    )
-    return BlobServiceClient(
-        account_url="https://faclickupbarcodeautomati.blob.core.windows.net",
-        credential=credential
+def _render_busy_response(err: RenderQueueFull) -> func.HttpResponse:
+    """503 for a saturated render queue, so callers back off instead of seeing a 500."""
+    logging.warning(f"PDF render rejected: {err}")
+    return func.HttpResponse(
+        json.dumps({"error": str(err)}),
+        mimetype="application/json",
+        headers={"Retry-After": str(RenderQueueFull.retry_after_seconds)},
+        status_code=503
     )
 
 
 PDF_STALE_TAG = "pdf-stale"
-_FIELD_LABELS = {
-    "task_name":        "Task Name",
-    "property_address": "Property Address",
-    "issue_description":"Issue Description",
-    "action_items":     "Action Items",
-    "scheduled_date":   "Scheduled Date",
-}
 
 
 def _post_pdf_comment(task_id: str, cu_headers: dict, source: str = "ClickUp") -> None:
@@ -58,7 +72,8 @@ def _post_pdf_comment(task_id: str, cu_headers: dict, source: str = "ClickUp") -
     ts = datetime.datetime.now(_ET).strftime("%Y-%m-%d %H:%M ET")
     comment = f"📄 PDF generated and sent — {ts} (via {source})"
     try:
-        resp = requests.post(
+        self_writes.record(task_id, COMMENT_SIGNATURE)
+        resp = clickup.post(
             f"https://api.clickup.com/api/v2/task/{task_id}/comment",
             json={"comment_text": comment, "notify_all": False},
             headers=cu_headers
@@ -74,15 +89,19 @@ def _post_pdf_comment(task_id: str, cu_headers: dict, source: str = "ClickUp") -
 def _sync_pdf_stale_tag(task_id: str, is_stale: bool, existing_tags: list, cu_headers: dict) -> None:
     """Add or remove the pdf-stale tag on the ClickUp task when state changes. Non-fatal."""
     has_tag = any(t.get("name") == PDF_STALE_TAG for t in existing_tags)
+    if is_stale == has_tag:
+        return
     try:
-        if is_stale and not has_tag:
-            requests.post(
+        # Recorded before the write: the webhook can arrive before the call returns
+        self_writes.record(task_id, tag_signature(PDF_STALE_TAG))
+        if is_stale:
+            clickup.post(
                 f"https://api.clickup.com/api/v2/task/{task_id}/tag/{PDF_STALE_TAG}",
                 headers=cu_headers
             )
             logging.info(f"Added '{PDF_STALE_TAG}' tag to task {task_id}")
-        elif not is_stale and has_tag:
-            requests.delete(
+        else:
+            clickup.delete(
                 f"https://api.clickup.com/api/v2/task/{task_id}/tag/{PDF_STALE_TAG}",
                 headers=cu_headers
             )
@@ -91,139 +110,168 @@ def _sync_pdf_stale_tag(task_id: str, is_stale: bool, existing_tags: list, cu_he
         logging.warning(f"Tag sync failed for task {task_id} (non-fatal): {e}")
 
 
-def _sync_pdf_warnings_field(task_id: str, is_stale: bool, custom_fields: list,
+def _format_et(iso_ts: str | None) -> str:
+    """Render an ISO timestamp as 'YYYY-MM-DD HH:MM ET'; unparseable input is returned as-is."""
+    if not iso_ts:
+        return ""
+    try:
+        dt = datetime.datetime.fromisoformat(iso_ts)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=datetime.timezone.utc)
+        return dt.astimezone(ZoneInfo("America/New_York")).strftime("%Y-%m-%d %H:%M ET")
+    except Exception:
+        return iso_ts
+
+
+def _sync_pdf_warnings_field(task_id: str, is_stale: bool, custom_fields: list | None,
                               stale_fields: list, cu_headers: dict,
-                              snapshot_written_at: str | None = None) -> None:
+                              snapshot_written_at: str | None = None,
+                              field_id: str | None = None,
+                              warning_active: bool | None = None,
+                              banner_hash: str | None = None,
+                              uow: TaskUnitOfWork | None = None) -> None:
     """
     Set or clear the ClickUp 'Warnings' rich-text custom field with a red-strong banner
     when the PDF is stale. Non-fatal.
+
+    Pass custom_fields from a task payload, or field_id + warning_active when the
+    task wasn't fetched. banner_hash is the entity's stored warnings_banner_hash.
+    With uow, a new hash is merged into it for the caller to commit rather than
+    written on its own, so the caller's ETag stays current.
+
+    The banner is identified by a hash of its content (stale fields + PDF time).
+    The POST is skipped when the field already holds that banner, or is already
+    clear, so our own writes don't fire another taskUpdated webhook.
     """
-    field_id = None
-    current_value = None
-    for cf in custom_fields:
+    current_hash = None
+    for cf in custom_fields or []:
         if cf.get("name", "").lower() == "warnings":
             field_id = cf.get("id")
-            current_value = cf.get("value")
+            current_hash = current_banner_hash(cf.get("value"))
+            # Banners without a readable hash fall back to the stored one
+            if current_hash == LEGACY_BANNER_HASH and banner_hash:
+                current_hash = banner_hash
             break
+    else:
+        if banner_hash is not None:
+            current_hash = banner_hash
+        elif warning_active is not None:
+            current_hash = LEGACY_BANNER_HASH if warning_active else CLEARED_BANNER_HASH
 
     if not field_id:
         logging.warning(f"'Warnings' custom field not found for task {task_id}, skipping warning sync")
         return
 
-    # Idempotency check — skip if already in the correct state to avoid triggering
-    # a feedback loop where our own write fires another taskUpdated webhook.
-    warning_currently_active = isinstance(current_value, str) and "advanced-banner" in current_value
-    if is_stale == warning_currently_active:
-        logging.info(f"Warnings field already in correct state (active={warning_currently_active}) for {task_id}, skipping")
+    pdf_generated = _format_et(snapshot_written_at)
+    target_hash = warnings_banner_hash(stale_fields, pdf_generated) if is_stale else CLEARED_BANNER_HASH
+    if current_hash == target_hash:
+        logging.info(f"Warnings field already up to date (banner={target_hash or 'none'}) for {task_id}, skipping")
         return
 
     try:
         if is_stale:
-            def _banner_line(text: str, bullet: bool = False) -> list:
-                attrs = {
-                    "block-id": f"block-{uuid.uuid4()}",
-                    "advanced-banner": "[object Object]",
-                    "advanced-banner-color": "red-strong",
-                }
-                if bullet:
-                    attrs["list"] = {"list": "bullet"}
-                return [{"insert": text}, {"attributes": attrs, "insert": "\n"}]
-
-            _ET = ZoneInfo("America/New_York")
-            now_str = datetime.datetime.now(_ET).strftime("%Y-%m-%d %H:%M ET")
-            pdf_gen_str = ""
-            if snapshot_written_at:
-                try:
-                    dt = datetime.datetime.fromisoformat(snapshot_written_at)
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=datetime.timezone.utc)
-                    pdf_gen_str = dt.astimezone(_ET).strftime("%Y-%m-%d %H:%M ET")
-                except Exception:
-                    pdf_gen_str = snapshot_written_at
-
-            ops = []
-            ops += _banner_line("⚠️ PDF OUTDATED — REGENERATION REQUIRED")
-            if pdf_gen_str:
-                ops += _banner_line(f"PDF last generated: {pdf_gen_str}")
-            ops += _banner_line(f"Changes detected: {now_str}")
-            ops += _banner_line("Fields changed since last PDF generation:")
-            for f in stale_fields:
-                ops += _banner_line(_FIELD_LABELS.get(f, f), bullet=True)
-            ops += _banner_line("To regenerate: re-add the 'createpdf' tag to this task, or use the technician portal.")
-
-            resp = requests.post(
-                f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}",
-                json={"value": json.dumps({"ops": ops})},
-                headers=cu_headers
-            )
-            if resp.status_code not in (200, 201):
-                logging.warning(f"Warnings field update returned {resp.status_code} for task {task_id}")
-            else:
-                logging.info(f"Warnings field set for task {task_id}")
+            detected_at = datetime.datetime.now(ZoneInfo("America/New_York")).strftime("%Y-%m-%d %H:%M ET")
+            value, _ = build_warnings_banner(stale_fields, pdf_generated, detected_at)
         else:
             # Clear by posting an empty Quill document — DELETE is unreliable for rich text fields.
-            empty_delta = json.dumps({"ops": [{"insert": "\n"}]})
-            resp = requests.post(
-                f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}",
-                json={"value": empty_delta},
-                headers=cu_headers
-            )
-            if resp.status_code not in (200, 201):
-                logging.warning(f"Warnings field clear returned {resp.status_code} for task {task_id}")
-            else:
-                logging.info(f"Warnings field cleared for task {task_id}")
+            value = json.dumps({"ops": [{"insert": "\n"}]})
+        self_writes.record(task_id, field_signature(field_id))
+        resp = clickup.post(
+            f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}",
+            json={"value": value},
+            headers=cu_headers
+        )
+        action = "set" if is_stale else "cleared"
+        if resp.status_code not in (200, 201):
+            logging.warning(f"Warnings field update returned {resp.status_code} for task {task_id}")
+            return
+        logging.info(f"Warnings field {action} for task {task_id}")
     except Exception as e:
         logging.warning(f"Warnings field sync failed for task {task_id} (non-fatal): {e}")
+        return
 
+    if banner_hash != target_hash:
+        if uow is not None:
+            uow.merge({"warnings_banner_hash": target_hash})
+            return
+        try:
+            write_warnings_banner_hash(task_id, target_hash)
+        except Exception as e:
+            logging.warning(f"Storing warnings_banner_hash failed for task {task_id} (non-fatal): {e}")
 
-_PDF_FIELD_COMPARISONS = [
-    ("task_name",        "pdf_task_name",        "task_name"),
-    ("property_address", "pdf_property_address", "property_address"),
-    ("issue_description_raw","pdf_issue_description","issue_description"),
-    ("action_items_raw", "pdf_action_items_raw", "action_items"),
-    ("start_date_ms",    "pdf_start_date_ms",    "scheduled_date"),
-]
 
+def _sync_staleness_from_history(task_id: str, history_items: list, touched: set,
+                                 entity: dict, etag: str | None, cu_headers: dict) -> list:
+    """
+    Update the stored pdf_stale_fields set from a taskUpdated webhook's history_items
+    and sync the pdf-stale tag + Warnings field when the set changes.
+
+    Simple fields (name, start date, address) are compared straight from the history
+    `after` values. The task is only fetched from ClickUp when a rich text field changed,
+    the stale set has never been computed, or the Warnings field id isn't known for the
+    task's list yet. Non-fatal — ClickUp calls are guarded.
+    Returns the new pdf_stale_fields list.
+    """
+    previous = parse_stale_fields(entity.get("pdf_stale_fields"))
+    stale, unresolved = resolve_history(history_items, entity)
+
+    warnings_field_id = entity.get("warnings_field_id") or clickup.field_schema.field_id(
+        entity.get("list_id"), "Warnings", cu_headers
+    )
+    clickup_data = None
+    if previous is None or unresolved or not warnings_field_id:
+        clickup_data = clickup.fetch_task(task_id, cu_headers)
+        if clickup_data is None:
+            return previous or []
+        fields = _extract_task_fields(clickup_data)
+        if previous is None:
+            stale = set(compute_stale_fields(fields, entity))
+        else:
+            stale |= set(compute_stale_fields(fields, entity, labels=unresolved))
 
-def _compute_stale_fields(fields: dict, entity: dict) -> list:
-    """Return list of label keys where current ClickUp values differ from pdf_* baseline."""
-    stale = []
-    for current_key, pdf_key, label in _PDF_FIELD_COMPARISONS:
-        pdf_val = entity.get(pdf_key)
-        if pdf_val is not None and str(fields.get(current_key, "")) != str(pdf_val):
-            stale.append(label)
-    return stale
+    if previous is None:
+        current = stale
+    else:
+        current = (set(previous) - touched) | stale
+    pdf_stale_fields = [label for label in STALE_LABELS if label in current]
 
+    if previous is not None and pdf_stale_fields == previous:
+        webhook_log.info("Stale fields unchanged for %s (%s), skipping sync", task_id, pdf_stale_fields)
+        return pdf_stale_fields
 
-def _sync_staleness(task_id: str, clickup_data: dict, entity: dict, cu_headers: dict) -> list:
-    """
-    Compute pdf_stale_fields and sync the pdf-stale tag + Warnings field on the ClickUp task.
-    Skips if the entity has no snapshot or no pdf_* baseline.
-    Returns the computed pdf_stale_fields list (may be empty).
-    Non-fatal — all ClickUp calls inside are individually guarded.
-    """
-    if not entity or not entity.get("snapshot_written_at"):
-        return []
-    if entity.get("pdf_task_name") is None:
-        return []
+    uow = TaskUnitOfWork(task_id, entity, etag)
+    uow.merge({"pdf_stale_fields": format_stale_fields(pdf_stale_fields)})
+    try:
+        uow.commit()
+    except SnapshotConflict:
+        # The PDF may have been regenerated while this webhook was in flight — leave
+        # the indicators alone; the regenerate path already cleared them.
+        webhook_log.info("Task %s changed during staleness sync; skipping", task_id)
+        return pdf_stale_fields
 
-    fields = _extract_task_fields(clickup_data)
-    pdf_stale_fields = _compute_stale_fields(fields, entity)
     is_stale = bool(pdf_stale_fields)
+    if clickup_data:
+        existing_tags = clickup_data.get("tags", [])
+        custom_fields = clickup_data.get("custom_fields", [])
+        warning_active = None
+    else:
+        # Indicators are kept in step with the stored set, so its previous value
+        # tells us the current tag / banner state without fetching the task.
+        existing_tags = [{"name": PDF_STALE_TAG}] if previous else []
+        custom_fields = None
+        warning_active = bool(previous)
 
-    _sync_pdf_stale_tag(
-        task_id,
-        is_stale=is_stale,
-        existing_tags=clickup_data.get("tags", []),
-        cu_headers=cu_headers,
-    )
+    _sync_pdf_stale_tag(task_id, is_stale=is_stale, existing_tags=existing_tags, cu_headers=cu_headers)
     _sync_pdf_warnings_field(
         task_id,
         is_stale=is_stale,
-        custom_fields=clickup_data.get("custom_fields", []),
+        custom_fields=custom_fields,
         stale_fields=pdf_stale_fields,
         cu_headers=cu_headers,
         snapshot_written_at=entity.get("snapshot_written_at"),
+        field_id=warnings_field_id,
+        warning_active=warning_active,
+        banner_hash=entity.get("warnings_banner_hash"),
     )
     return pdf_stale_fields
 
@@ -296,6 +344,89 @@ def _extract_task_fields(data: dict) -> dict:
     }
 
 
+def _render_spec_from_task(task_id: str, data: dict) -> RenderSpec:
+    """
+    Build a RenderSpec from a ClickUp task payload. Downloads attachment thumbnails
+    and, for translated PDFs, resolves all translations before rendering.
+    """
+    addr = ""
+    desc = ""
+    action_items = None
+    start_buffer = 0
+    translate_flag = False
+
+    for cf in data.get("custom_fields", []):
+        name = cf.get("name", "")
+        if name == "Property Address":
+            addr = cf.get("value") or ""
+        elif name == "Task Issue Description":
+            val = cf.get("value_richtext")
+            desc = val if isinstance(val, str) else (json.dumps(val) if val else "")
+        elif name == "Task Start Buffer":
+            start_buffer = int(float(cf.get("value", 0) or 0))
+        elif name == "Task Action Items":
+            action_items = cf.get("value_richtext")
+        elif name == "Translate":
+            val = cf.get("value")
+            translate_flag = str(val).lower() == "true" if val is not None else False
+
+    image_bytes = []
+    for attachment in data.get("attachments", []):
+        thumb_url = attachment.get("thumbnail_medium") or attachment.get("thumbnail_small")
+        if thumb_url:
+            try:
+                image_bytes.append(download_image_bytes(thumb_url))
+            except Exception as img_err:
+                logging.warning(f"Skipping attachment thumbnail for {task_id}: {img_err}")
+
+    barcode_func_key = get_secret_value("BarcodeScanFuncKey")
+    barcode_link = f'https://fa-clickup-barcode-automation.azurewebsites.net/api/http_trigger_barcodescan?code={barcode_func_key}&task_id={task_id}'
+
+    spec = RenderSpec(
+        property_address=addr,
+        start_date=data.get("start_date"),
+        start_buffer=start_buffer,
+        issue_description=desc,
+        action_items=action_items,
+        completion_url=barcode_link,
+        attachment_images=tuple(image_bytes),
+        translate=translate_flag,
+    )
+    return _translate_render_spec(task_id, spec)
+
+
+def _translate_render_spec(task_id: str, spec: RenderSpec) -> RenderSpec:
+    """
+    Translation pre-pass, kept out of the render workers so layout never waits on
+    the translator. Results are cached on the task entity by content hash, so a
+    regeneration with unchanged text makes no translator calls.
+    """
+    if not spec.translate:
+        return spec
+    cached = read_translation_cache(task_id)
+    spec, cache_value, sent = translate_spec(spec, get_translator().translate_many, cached)
+    logging.info(f"Translation pre-pass for task {task_id}: {sent} string(s) sent to translator")
+    if cache_value != cached:
+        try:
+            write_translation_cache(task_id, cache_value)
+        except Exception as e:
+            logging.warning(f"Translation cache write failed for {task_id} (non-fatal): {e}")
+    return spec
+
+
+def _is_createpdf_addition(item: dict) -> bool:
+    return item.get("field") == "tag" and any(t.get("name") == "createpdf" for t in item.get("after") or [])
+
+
+def _has_createpdf_behind_other_tags(history_items: list) -> bool:
+    """True when createpdf was added but a later tag change would hide it."""
+    tag_items = sorted(
+        (i for i in history_items if i.get("field") in ("tag", "tag_removed")),
+        key=lambda i: int(i.get("date") or 0),
+    )
+    return bool(tag_items) and not _is_createpdf_addition(tag_items[-1]) and any(map(_is_createpdf_addition, tag_items))
+
+
 '''
 ClickUp Task Info Retrieved
 '''
@@ -303,23 +434,44 @@ ClickUp Task Info Retrieved
 #868hc1q7r
 
 @app.route(route="http_trigger_task_parse")
+@timed_route("webhook")
 def http_trigger_task_parse(req: func.HttpRequest) -> func.HttpResponse:
-    logging.info('Python HTTP trigger function processed a request.')
+    raw = req.get_body()
+    if not webhook.verify_signature(raw, req.headers.get("X-Signature")):
+        webhook.counters.incr("rejected_signature")
+        return func.HttpResponse("Invalid signature", status_code=401)
 
-    try:
-        raw = req.get_body()
-        logging.info(f"Raw body: {raw}")
+    # Most deliveries are events we never act on; answer those from the raw bytes
+    reason = webhook.prefilter(raw)
+    if reason:
+        webhook.counters.incr("prefiltered")
+        return func.HttpResponse(f"Skipping: {reason}", status_code=201)
 
-        body = req.get_json()
+    try:
+        body = json.loads(raw)
         id = body.get('task_id', None)
         event = body.get('event', None)
-
-    except ValueError:
-        return func.HttpResponse("Invalid JSON body: " + json.dumps(body, indent=2), status_code=400)
+    except (ValueError, AttributeError):
+        webhook.counters.incr("rejected_body")
+        return func.HttpResponse("Invalid JSON body", status_code=400)
+    webhook.counters.incr("accepted")
+    log_event(webhook_log, "webhook_accepted", webhook_event=event, task_id=id,
+              history_items=len(body.get('history_items') or []))
 
     try:
 
-        updated_info = body.get('history_items', [])
+        # Drop the echoes of our own writes (pdf-stale tag, Warnings field, comments,
+        # contractor notes) before anything else looks at the event.
+        history_items = body.get('history_items', [])
+        updated_info = self_writes.filter_echoes(id, history_items)
+        if history_items and not updated_info:
+            webhook.counters.incr("echo")
+            webhook_log.info("%s for task %s is an echo of our own write, skipping", event, id)
+            return func.HttpResponse("Echo of our own write, skipping", status_code=200)
+        if event == 'taskTagUpdated' and _has_createpdf_behind_other_tags(updated_info):
+            # Another instance may have made the later tag change; check the shared ledger
+            updated_info = self_writes.filter_echoes(id, updated_info, backup=self_writes.load_backup(id))
+
         latest_date = 0
         latest_field = None
         update_id = None  # move outside the loop
@@ -335,33 +487,36 @@ def http_trigger_task_parse(req: func.HttpRequest) -> func.HttpResponse:
             latest_item = next((i for i in updated_info if i['id'] == update_id), None)
 
             if latest_item and latest_item['after'] and latest_item['after'][0]['name'] == "createpdf":
-                logging.info("Triggering PDF generation for task " + id)
+                webhook_log.info("Triggering PDF generation for task %s", id)
             else:
-                logging.info("Most recent update was not createpdf tag addition, skipping")
+                webhook_log.info("Most recent update was not createpdf tag addition, skipping")
                 return func.HttpResponse("Most recent update was not createpdf, skipping", status_code=201)
 
         elif event == 'taskUpdated':
-            # Run staleness check so the ClickUp warning is set/cleared immediately
+            # Incremental staleness check so the ClickUp warning is set/cleared immediately
             # when a manager edits task fields, without waiting for the contractor UI to open.
-            logging.info(f"taskUpdated event for task {id} — running staleness check")
+            # Changes that touch no PDF field (status, assignee, tags, ...) need no I/O at all.
+            touched = history_labels(updated_info)
+            if not touched:
+                return func.HttpResponse("No PDF fields changed, skipping", status_code=201)
+
+            webhook_log.info("taskUpdated event for task %s touched %s — running staleness check", id, sorted(touched))
             token = _get_clickup_token()
             cu_headers = {'accept': 'application/json', 'content-type': 'application/json', 'Authorization': token}
             try:
-                entity = read_task_snapshot(id)
+                entity, etag = read_task_snapshot_with_etag(id)
                 if not entity or not entity.get("snapshot_written_at") or entity.get("pdf_task_name") is None:
                     return func.HttpResponse("No PDF snapshot or baseline for task, skipping", status_code=201)
-                resp = requests.get(f"https://api.clickup.com/api/v2/task/{id}", headers=cu_headers)
-                if resp.status_code == 200:
-                    _sync_staleness(id, resp.json(), entity, cu_headers)
+                _sync_staleness_from_history(id, updated_info, touched, entity, etag, cu_headers)
             except Exception as e:
-                logging.warning(f"taskUpdated staleness sync failed for {id} (non-fatal): {e}")
+                webhook_log.warning("taskUpdated staleness sync failed for %s (non-fatal): %s", id, e)
             return func.HttpResponse("Staleness check completed", status_code=200)
 
         else:
             return func.HttpResponse("Event not handled, skipping", status_code=201)
 
     except Exception as ex:
-        logging.error(f"Error parsing request body: {type(ex).__name__} - {str(ex)}")
+        webhook_log.error("Error parsing request body: %s - %s", type(ex).__name__, ex)
         return func.HttpResponse(f"Invalid request body: {str(ex)}", status_code=400)
 
 
@@ -370,101 +525,45 @@ def http_trigger_task_parse(req: func.HttpRequest) -> func.HttpResponse:
         try:
             token = get_secret_value("ClickUpSecret")
         except Exception as ex:
-            logging.error(f"Error retrieving secret: {type(ex).__name__} - {str(ex)}")
+            webhook_log.error("Error retrieving secret: %s - %s", type(ex).__name__, ex)
             return func.HttpResponse(f"Error retrieving ClickUp API token: {str(ex)}", status_code=500)
 
-        logging.info(id)
-
         try:
 
             headers = {'accept': 'application/json', 'content-type': 'application/json', 'Authorization': token}
             t_req = f'https://api.clickup.com/api/v2/task/{id}'
 
-            response = requests.get(url=t_req, headers=headers)
-
-            logging.info(response.status_code)
-            logging.info(response.text)
-
+            response = clickup.get(t_req, headers=headers)
             data = json.loads(response.text)
 
-            print(data["attachments"])
-            barcode_func_key = get_secret_value("BarcodeScanFuncKey")
-            barcode_link = f'https://fa-clickup-barcode-automation.azurewebsites.net/api/http_trigger_barcodescan?code={barcode_func_key}&task_id={id}'
-
-            image_bytes = []
-            for i in data["attachments"]:
-                thumb_url = i.get("thumbnail_medium") or i.get("thumbnail_small")
-                if thumb_url:
-                    try:
-                        image_bytes.append(download_image_bytes(thumb_url))
-                    except Exception as img_err:
-                        logging.warning(f"Skipping attachment thumbnail: {img_err}")
-
-            addr = ""
-            desc = ""
-            action_items = []
-            arrival_buffer = 0
-            start_date = data.get("start_date")  # top-level field
-            translate_flag = False
-
-            for cf in data["custom_fields"]:
-                logging.info(cf["name"])
-                logging.info(cf["type"])
-                if cf["name"] == "Property Address":
-                    addr = cf.get("value") or ""
-
-                if cf["name"] == "Task Issue Description":
-                    val = cf.get("value_richtext")
-                    desc = val if isinstance(val, str) else (json.dumps(val) if val else "")
-
-                if cf["name"] == "Task Start Buffer":
-                    start_buffer = int(float(cf.get("value", 0) or 0))
-
-                if cf["name"] == "Task Action Items":
-                    action_items = cf.get("value_richtext")
-
-                if cf["name"] == "Translate":
-                    val = cf.get("value")
-                    translate_flag = str(val).lower() == "true" if val is not None else False
-
+            log_event(webhook_log, "task_fetched", task_id=id, status=response.status_code,
+                      bytes=len(response.content), attachments=len(data.get("attachments") or []))
+            sample_payload(webhook_log, "ClickUp task", response.text)
         except Exception as ex:
-            logging.error(f"Error retrieving task details: {type(ex).__name__} - {str(ex)}")
+            webhook_log.error("Error retrieving task details: %s - %s", type(ex).__name__, ex)
             return func.HttpResponse(f"Error retrieving task details: {str(ex)}", status_code=500)
 
 
         try:
-            generator = MaintenancePDFGenerator(translate_flag)
-            pdf_bytes = generator.generate(
-                property_address=addr,
-                unit_name='',
-                start_date=start_date,
-                start_buffer=start_buffer,
-                issue_description=desc,
-                action_items=action_items,
-                completion_url=barcode_link,
-                attachment_images=image_bytes
-            )
+            spec = _render_spec_from_task(id, data)
+            pdf_bytes = render_pool.render(spec)
+        except RenderQueueFull as ex:
+            return _render_busy_response(ex)
         except Exception as ex:
-            logging.error(f"Error generating PDF: {type(ex).__name__} - {str(ex)}")
+            webhook_log.error("Error generating PDF: %s - %s", type(ex).__name__, ex)
             return func.HttpResponse(f"Error generating PDF: {str(ex)}", status_code=500)
 
 
         if response.status_code == 200:
             try:
-                blob_service_client = _get_blob_service_client()
-                blob_client = blob_service_client.get_blob_client(
-                    container="content",
-                    blob=f"{id}.pdf"
-                )
-                blob_client.upload_blob(pdf_bytes, overwrite=True)
-                logging.info(f"Successfully wrote PDF to blob storage for task {id}")
+                upload_pdf(id, pdf_bytes, fingerprint=spec.fingerprint())
+                webhook_log.info("Successfully wrote PDF to blob storage for task %s", id)
 
                 # Write task snapshot to Table Storage cache (non-fatal)
                 try:
-                    pdf_blob_url = f"https://faclickupbarcodeautomati.blob.core.windows.net/content/{id}.pdf"
-                    write_task_snapshot(id, data, pdf_blob_url)
+                    write_task_snapshot(id, data, pdf_blob_url(id))
                 except Exception as cache_err:
-                    logging.warning(f"Table Storage snapshot failed (non-fatal): {cache_err}")
+                    webhook_log.warning("Table Storage snapshot failed (non-fatal): %s", cache_err)
 
                 # Clear pdf-stale indicators now that a fresh PDF has been generated
                 _sync_pdf_stale_tag(
@@ -483,7 +582,7 @@ def http_trigger_task_parse(req: func.HttpRequest) -> func.HttpResponse:
                 _post_pdf_comment(id, headers, source="ClickUp")
 
             except Exception as e:
-                logging.error(f"Failed to write blob: {str(e)}")
+                webhook_log.error("Failed to write blob: %s", e)
                 return func.HttpResponse(f"Blob write failed: {str(e)}", status_code=500)
 
             return func.HttpResponse(
@@ -494,7 +593,7 @@ def http_trigger_task_parse(req: func.HttpRequest) -> func.HttpResponse:
             )
 
         else:
-            return func.HttpResponse(f"Failed to retrieve task details: {response.text}", status_code=response.status_code)
+            return func.HttpResponse(f"Failed to retrieve task details: {Truncated(response.text)}", status_code=response.status_code)
 
     else:
         return func.HttpResponse(f"Please include ClickUp task ID as parameter")
@@ -512,32 +611,16 @@ Sent PDF to Fax E-mail and Attached PDF to Task
 )
 def event_grid_blob_trigger_send_email(pdfBlob: func.InputStream):
     try:
-        logging.info("=" * 50)
-        logging.info("BLOB TRIGGER STARTED")
-        logging.info(f"Name: {pdfBlob.name}")
-        logging.info(f"Blob Size: {pdfBlob.length} bytes")
-
-        # Read the blob content
-        logging.info("Reading blob bytes...")
         pdf_bytes = pdfBlob.read()
-        logging.info(f"Successfully read {len(pdf_bytes)} bytes")
 
         # Extract blob name/task_id from path
         blob_name = pdfBlob.name.split('/')[-1]
         task_id = blob_name.replace('.pdf', '')
 
-        logging.info(f"Task ID: {task_id}")
-
-        logging.info("Initializing email client...")
         connection_string = os.environ.get("AzureCommunicationServiceConnectionString")
-        client = EmailClient.from_connection_string(connection_string)
-        logging.info("Email client initialized")
-
-        logging.info("Encoding PDF to base64...")
+        client = EmailClient.from_connection_string(connection_string, raw_response_hook=azure_response_hook("email"))
         pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
-        logging.info(f"Base64 encoding complete. Length: {len(pdf_base64)}")
 
-        logging.info("Preparing email message...")
         message = {
             "senderAddress": "DoNotReply@mkz-management.com",
             "recipients": {
@@ -556,22 +639,49 @@ def event_grid_blob_trigger_send_email(pdfBlob: func.InputStream):
             ]
         }
 
-        logging.info("Sending email...")
         poller = client.begin_send(message)
         result = poller.result()
-        logging.info(f"Email sent successfully!")
-        logging.info(f"Result: {result}")
-        logging.info("=" * 50)
+        log_event(email_log, "pdf_emailed", task_id=task_id, blob=pdfBlob.name, bytes=len(pdf_bytes),
+                  status=(result or {}).get("status"))
 
     except Exception as ex:
-        logging.error("=" * 50)
-        logging.error(f"BLOB TRIGGER ERROR: {type(ex).__name__}")
-        logging.error(f"Error message: {str(ex)}")
-        logging.error("Full traceback:", exc_info=True)
-        logging.error("=" * 50)
+        email_log.error("PDF email failed for blob %s: %s: %s", pdfBlob.name, type(ex).__name__, ex, exc_info=True)
         raise
 
 
+'''
+Webhook Monitoring
+'''
+@app.route(route="webhook/stats", methods=["GET"])
+def http_trigger_webhook_stats(req: func.HttpRequest) -> func.HttpResponse:
+    """Counts of webhook deliveries by outcome since this instance started."""
+    return func.HttpResponse(
+        json.dumps(webhook.counters.snapshot()),
+        mimetype="application/json",
+        status_code=200
+    )
+
+
+@app.route(route="metrics", methods=["GET"])
+def http_trigger_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Route latency histograms and outbound call counts since this instance
+    started. JSON by default; Prometheus text with ?format=prometheus or
+    Accept: text/plain.
+    """
+    if req.params.get("format") == "prometheus" or "text/plain" in (req.headers.get("Accept") or ""):
+        return func.HttpResponse(
+            metrics.prometheus(),
+            mimetype="text/plain; version=0.0.4",
+            status_code=200
+        )
+    return func.HttpResponse(
+        json.dumps(metrics.snapshot()),
+        mimetype="application/json",
+        status_code=200
+    )
+
+
 '''
 Barcode Scanned — Redirect to Technician UI
 '''
@@ -599,6 +709,7 @@ def http_trigger_barcodescan(req: func.HttpRequest) -> func.HttpResponse:
 Technician UI — Task Data API (GET + PUT)
 '''
 @app.route(route="task/{task_id}", methods=["GET", "PUT"], auth_level=func.AuthLevel.ANONYMOUS)
+@timed_route("task/{task_id}")
 def http_trigger_task(req: func.HttpRequest) -> func.HttpResponse:
     task_id = req.route_params.get("task_id")
     if not task_id:
@@ -621,26 +732,32 @@ def _handle_task_get(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
 
     # Always try ClickUp first for fresh data (includes attachments)
     try:
-        resp = requests.get(f"https://api.clickup.com/api/v2/task/{task_id}", headers=cu_headers)
+        resp = clickup.get(f"https://api.clickup.com/api/v2/task/{task_id}", headers=cu_headers)
         if resp.status_code == 200:
             clickup_data = json.loads(resp.text)
+            clickup.field_schema.seed(clickup_data)
         else:
-            logging.warning(f"ClickUp returned {resp.status_code} for task {task_id}")
+            task_log.warning("ClickUp returned %s for task %s", resp.status_code, task_id)
     except Exception as e:
-        logging.warning(f"ClickUp fetch failed: {e}")
+        task_log.warning("ClickUp fetch failed: %s", e)
 
-    # Read tech-specific fields from Table Storage
-    entity = read_task_snapshot(task_id)
+    # Read tech-specific fields from Table Storage. All writes below are collected
+    # in one unit of work and flushed in a single conditional MERGE. If the read
+    # fails there is no ETag to condition on, so nothing is written this time.
+    table_readable = True
+    try:
+        entity, etag = read_task_snapshot_with_etag(task_id)
+    except Exception as e:
+        task_log.warning("Table Storage read failed for task %s; serving without it: %s", task_id, e)
+        entity, etag = None, None
+        table_readable = False
+    uow = TaskUnitOfWork(task_id, entity, etag)
 
     if clickup_data:
         fields = _extract_task_fields(clickup_data)
         # Refresh Table Storage snapshot — MERGE preserves existing tech fields.
         # update_snapshot_time=False so snapshot_written_at only advances on PDF generation.
-        try:
-            pdf_blob_url = f"https://faclickupbarcodeautomati.blob.core.windows.net/content/{task_id}.pdf"
-            write_task_snapshot(task_id, clickup_data, pdf_blob_url, update_snapshot_time=False)
-        except Exception as e:
-            logging.warning(f"Table Storage snapshot refresh failed (non-fatal): {e}")
+        uow.merge(build_snapshot_entity(task_id, clickup_data, pdf_blob_url(task_id), update_snapshot_time=False))
     elif entity:
         # Fall back to cached snapshot if ClickUp is unreachable
         cache_stale = True
@@ -692,29 +809,47 @@ def _handle_task_get(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
         if pdf_baseline_missing:
             # Task was generated before the field-diff feature was deployed.
             # Seed pdf_* fields now so future changes are detected from this point forward.
-            try:
-                seed_pdf_snapshot_fields(task_id, fields)
-            except Exception as seed_err:
-                logging.warning(f"pdf_* field seeding failed (non-fatal): {seed_err}")
+            uow.merge(pdf_seed_fields(fields))
         else:
-            pdf_stale_fields = _compute_stale_fields(fields, entity)
+            pdf_stale_fields = compute_stale_fields(fields, entity)
+            uow.merge({"pdf_stale_fields": format_stale_fields(pdf_stale_fields)})
+
+    # Flush the snapshot refresh + seed. The write is conditional on the ETag read above,
+    # so a conflict means the entity changed while this GET was in flight (e.g. the PDF
+    # was regenerated concurrently) — detected without re-reading the entity.
+    changed_during_request = False
+    read_etag = etag
+    if table_readable:
+        try:
+            etag = uow.commit()
+        except SnapshotConflict:
+            changed_during_request = True
+            try:
+                etag = uow.commit(conditional=False)
+            except Exception as e:
+                task_log.warning("Table Storage snapshot refresh failed (non-fatal): %s", e)
+        except Exception as e:
+            task_log.warning("Table Storage snapshot refresh failed (non-fatal): %s", e)
 
     # Sync pdf-stale indicators on the ClickUp task — uses already-fetched data, no extra GET needed.
     if clickup_data and not cache_stale and entity and entity.get("snapshot_written_at") and not pdf_baseline_missing:
         is_stale = bool(pdf_stale_fields)
 
-        # Race-condition guard: if is_stale=True, re-read Table Storage to check whether
-        # snapshot_written_at advanced while this GET was in flight (i.e. the PDF was
-        # regenerated concurrently). If so, skip setting the warning — the regenerate
-        # endpoint already cleared it, and setting it again would undo that.
-        if is_stale:
+        # Race-condition guard: if the entity changed while this GET was in flight the PDF
+        # may have been regenerated concurrently. Skip setting the warning — the regenerate
+        # endpoint already cleared it, and setting it again would undo that. The next GET
+        # or webhook re-syncs if the task really is stale. When the commit above wrote
+        # nothing it checked nothing, so re-read snapshot_written_at as before.
+        if is_stale and not changed_during_request and etag == read_etag:
             try:
                 fresh_entity = read_task_snapshot(task_id)
                 if fresh_entity and fresh_entity.get("snapshot_written_at") != entity.get("snapshot_written_at"):
-                    logging.info(f"PDF regenerated during GET for {task_id}; skipping stale warning sync")
-                    is_stale = False
+                    changed_during_request = True
             except Exception as e:
-                logging.warning(f"Race-guard re-read failed (non-fatal), proceeding: {e}")
+                task_log.warning("Race-guard re-read failed (non-fatal), proceeding: %s", e)
+        if is_stale and changed_during_request:
+            task_log.info("Task %s changed during GET; skipping stale warning sync", task_id)
+            is_stale = False
 
         _sync_pdf_stale_tag(
             task_id,
@@ -728,10 +863,27 @@ def _handle_task_get(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
             custom_fields=clickup_data.get("custom_fields", []),
             stale_fields=pdf_stale_fields,
             cu_headers=cu_headers,
-            snapshot_written_at=entity.get("snapshot_written_at") if entity else None
+            snapshot_written_at=entity.get("snapshot_written_at") if entity else None,
+            banner_hash=entity.get("warnings_banner_hash") if entity else None,
+            uow=uow,
         )
-
-    response_data = {**fields, **tech_fields, "cache_stale": cache_stale, "pdf_stale_fields": pdf_stale_fields}
+        # Flush the banner hash now so the ETag returned below is the entity's final one
+        try:
+            if table_readable:
+                etag = uow.commit()
+        except Exception as e:
+            task_log.warning("Storing warnings_banner_hash failed for task %s (non-fatal): %s", task_id, e)
+
+    # Strong validator over the merged ClickUp + Table Storage state. Built from
+    # inputs already in hand, so a matching If-None-Match skips serialization entirely.
+    response_etag = _task_response_etag(clickup_data, etag, cache_stale, pdf_stale_fields)
+    cache_headers = {"ETag": response_etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(req.headers.get("If-None-Match"), response_etag):
+        return func.HttpResponse(status_code=304, headers=cache_headers)
+
+    # etag versions the tech fields only; the UI sends it back as If-Match on PUT.
+    response_data = {**fields, **tech_fields, "cache_stale": cache_stale, "pdf_stale_fields": pdf_stale_fields,
+                     "etag": tech_etag(uow.entity)}
     response_data.pop("action_items_raw", None)
     response_data.pop("issue_description_raw", None)
     response_data.pop("contractor_notes", None)
@@ -740,11 +892,114 @@ def _handle_task_get(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
     return func.HttpResponse(
         json.dumps(response_data),
         mimetype="application/json",
+        headers=cache_headers,
         status_code=200
     )
 
 
+def _task_response_etag(clickup_data: dict | None, entity_etag: str | None,
+                        cache_stale: bool, pdf_stale_fields: list) -> str:
+    """
+    Strong ETag for the GET /task/{id} representation.
+
+    ClickUp bumps date_updated on every task change; attachment ids are included
+    in case an upload lands within the same millisecond. Table Storage changes are
+    covered by the entity ETag — the GET only writes when a value actually changed,
+    so it is stable across repeat loads.
+    """
+    parts = [str(entity_etag or ""), str(cache_stale), ",".join(pdf_stale_fields)]
+    if clickup_data:
+        parts.append(str(clickup_data.get("date_updated") or ""))
+        parts.append(",".join(str(a.get("id")) for a in clickup_data.get("attachments", [])))
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# ClickUp writes from a task PUT are independent of each other and run in parallel.
+CLICKUP_WRITE_CONCURRENCY = int(os.environ.get("ClickUpWriteConcurrency", "8"))
+_clickup_write_pool = ThreadPoolExecutor(max_workers=CLICKUP_WRITE_CONCURRENCY, thread_name_prefix="clickup-write")
+# The self-write ledger's Table backup rides on the same pool, off the request path
+self_writes.executor = _clickup_write_pool
+
+
+def _timed(fn, *args):
+    """Call fn(*args); return (result, elapsed ms)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _timing_headers(timings: dict, started: float) -> dict:
+    """Server-Timing (per stage) and X-Response-Time (end to end) headers."""
+    total_ms = (time.perf_counter() - started) * 1000
+    stages = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+    stages.append(f"total;dur={total_ms:.1f}")
+    return {"Server-Timing": ", ".join(stages), "X-Response-Time": f"{total_ms:.0f}ms"}
+
+
+def _put_clickup_task(task_id: str, clickup_payload: dict, cu_headers: dict) -> None:
+    try:
+        resp = clickup.put(
+            f"https://api.clickup.com/api/v2/task/{task_id}",
+            json=clickup_payload,
+            headers=cu_headers
+        )
+        if resp.status_code not in (200, 201):
+            task_log.error("ClickUp update failed: %s %s", resp.status_code, Truncated(resp.text))
+    except Exception as e:
+        task_log.error("ClickUp update exception: %s", e)
+
+
+def _contractor_notes_field_id(task_id: str, entity: dict | None, cu_headers: dict) -> str | None:
+    """
+    The snapshot's cached field id, else the list's field schema. Only a snapshot
+    written before list_id was recorded needs a task GET to learn its list.
+    """
+    entity = entity or {}
+    field_id = entity.get("contractor_notes_field_id")
+    if field_id:
+        return field_id
+    list_id = entity.get("list_id")
+    if not list_id:
+        task_log.info("No list_id cached for task %s, fetching from ClickUp", task_id)
+        task_data = clickup.fetch_task(task_id, cu_headers)
+        list_id = clickup.task_list_id(task_data) if task_data else None
+    return clickup.field_schema.field_id(list_id, "Contractor Notes", cu_headers)
+
+
+def _sync_contractor_notes(task_id: str, notes: str, entity: dict | None, cu_headers: dict) -> None:
+    """Sync tech_notes to the ClickUp "Contractor Notes" custom field (non-fatal)."""
+    try:
+        if entity is None:
+            entity = read_task_snapshot(task_id)
+        field_id = _contractor_notes_field_id(task_id, entity, cu_headers)
+        if not field_id:
+            task_log.warning("No 'Contractor Notes' custom field found for task %s, skipping ClickUp sync", task_id)
+            return
+        self_writes.record(task_id, field_signature(field_id))
+        notes_resp = clickup.post(
+            f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}",
+            json={"value": notes},
+            headers=cu_headers
+        )
+        if notes_resp.status_code not in (200, 201):
+            task_log.warning("ClickUp contractor notes sync failed: %s %s", notes_resp.status_code, Truncated(notes_resp.text))
+        else:
+            task_log.info("ClickUp contractor notes synced for task %s", task_id)
+    except Exception as e:
+        task_log.warning("ClickUp contractor notes sync exception (non-fatal): %s", e)
+
+
 def _handle_task_put(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
+    started = time.perf_counter()
+    timings = {}
     try:
         body = req.get_json()
     except ValueError:
@@ -753,6 +1008,29 @@ def _handle_task_put(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
     token = _get_clickup_token()
     cu_headers = {'accept': 'application/json', 'content-type': 'application/json', 'Authorization': token}
 
+    # Write tech fields to Table Storage first so a failed precondition aborts before
+    # anything is sent to ClickUp; writing ClickUp first (as this handler used to) would
+    # leave ClickUp updated by a save that then returns 412. If-Match carries the etag
+    # from the last GET/PUT, which versions the tech fields only, so a 412 means another
+    # technician saved in between — background writes to the row are retried instead.
+    tech_updates = {k: body[k] for k in ("arrival_date_iso", "completion_status", "tech_notes") if k in body}
+    table_started = time.perf_counter()
+    try:
+        entity, new_etag = update_tech_fields(task_id, tech_updates, if_match=req.headers.get("If-Match"))
+    except SnapshotConflict:
+        current_etag = tech_etag(read_task_snapshot(task_id))
+        timings["table"] = (time.perf_counter() - table_started) * 1000
+        return func.HttpResponse(
+            json.dumps({"error": "Task was changed by someone else. Reload and try again.", "etag": current_etag}),
+            mimetype="application/json",
+            status_code=412,
+            headers=_timing_headers(timings, started)
+        )
+    except Exception as e:
+        task_log.error("Table Storage update failed: %s", e)
+        return func.HttpResponse(f"Failed to save changes: {e}", status_code=500)
+    timings["table"] = (time.perf_counter() - table_started) * 1000
+
     # Build ClickUp update payload from provided fields
     clickup_payload = {}
     if "clickup_status" in body:
@@ -769,66 +1047,21 @@ def _handle_task_put(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
         else:
             clickup_payload["start_date"] = None
 
+    # The task update and the notes sync touch different ClickUp resources
+    futures = {}
     if clickup_payload:
-        try:
-            resp = requests.put(
-                f"https://api.clickup.com/api/v2/task/{task_id}",
-                json=clickup_payload,
-                headers=cu_headers
-            )
-            if resp.status_code not in (200, 201):
-                logging.error(f"ClickUp update failed: {resp.status_code} {resp.text}")
-        except Exception as e:
-            logging.error(f"ClickUp update exception: {e}")
-
-    # Write tech fields to Table Storage
-    tech_updates = {k: body[k] for k in ("arrival_date_iso", "completion_status", "tech_notes") if k in body}
-    try:
-        update_tech_fields(task_id, tech_updates)
-    except Exception as e:
-        logging.error(f"Table Storage update failed: {e}")
-        return func.HttpResponse(f"Failed to save changes: {e}", status_code=500)
-
-    # Sync tech_notes to ClickUp "Contractor Notes" custom field (non-fatal)
+        futures["clickup-task"] = _clickup_write_pool.submit(
+            _timed, _put_clickup_task, task_id, clickup_payload, cu_headers
+        )
     if "tech_notes" in body:
-        try:
-            entity = read_task_snapshot(task_id)
-            field_id = entity.get("contractor_notes_field_id") if entity else None
-
-            # Cache miss — fetch the field ID live from ClickUp
-            if not field_id:
-                logging.info(f"contractor_notes_field_id not cached for task {task_id}, fetching from ClickUp")
-                task_resp = requests.get(
-                    f"https://api.clickup.com/api/v2/task/{task_id}",
-                    headers=cu_headers
-                )
-                if task_resp.status_code == 200:
-                    task_data = task_resp.json()
-                    for cf in task_data.get("custom_fields", []):
-                        if cf.get("name", "").lower() == "contractor notes":
-                            field_id = cf.get("id")
-                            logging.info(f"Found contractor_notes_field_id: {field_id}")
-                            break
-                else:
-                    logging.warning(f"ClickUp task fetch for field ID failed: {task_resp.status_code}")
-
-            if field_id:
-                notes_resp = requests.post(
-                    f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}",
-                    json={"value": body["tech_notes"]},
-                    headers=cu_headers
-                )
-                if notes_resp.status_code not in (200, 201):
-                    logging.warning(f"ClickUp contractor notes sync failed: {notes_resp.status_code} {notes_resp.text}")
-                else:
-                    logging.info(f"ClickUp contractor notes synced for task {task_id}")
-            else:
-                logging.warning(f"No 'Contractor Notes' custom field found for task {task_id}, skipping ClickUp sync")
-        except Exception as e:
-            logging.warning(f"ClickUp contractor notes sync exception (non-fatal): {e}")
+        futures["clickup-notes"] = _clickup_write_pool.submit(
+            _timed, _sync_contractor_notes, task_id, body["tech_notes"], entity, cu_headers
+        )
+    for name, future in futures.items():
+        _, timings[name] = future.result()
 
     now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    response_body = {"task_id": task_id, **tech_updates, "last_ui_update_at": now}
+    response_body = {"task_id": task_id, **tech_updates, "last_ui_update_at": now, "etag": new_etag}
 
     # Return start_date_ms so the frontend can update ScheduledWindow immediately
     # without waiting for the next GET to reflect the ClickUp write.
@@ -846,47 +1079,128 @@ def _handle_task_put(req: func.HttpRequest, task_id: str) -> func.HttpResponse:
     return func.HttpResponse(
         json.dumps(response_body),
         mimetype="application/json",
-        status_code=200
+        status_code=200,
+        headers=_timing_headers(timings, started)
     )
 
 
 '''
 Technician UI — Attachment Upload
 '''
+# ClickUp rejects larger files anyway; refuse them before reading the body.
+ATTACHMENT_MAX_BYTES = int(os.environ.get("AttachmentMaxBytes", str(25 * 1024 * 1024)))
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+def _read_attachment_upload(req: func.HttpRequest) -> tuple:
+    """
+    Return (filename, content_type, file) for an attachment upload, where `file`
+    is bytes or a file-like object. Accepts:
+
+      - multipart/form-data with the file in an `attachment` (or `file`) part
+      - a raw body, named by the X-Filename header or ?filename= query param
+      - the legacy JSON body {filename, content_type, data: base64}
+
+    Raises _UploadTooLarge past ATTACHMENT_MAX_BYTES and ValueError for bad bodies.
+    """
+    declared = req.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > ATTACHMENT_MAX_BYTES:
+        raise _UploadTooLarge(int(declared))
+
+    content_type = (req.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+
+    if content_type == "multipart/form-data":
+        upload = req.files.get("attachment") or req.files.get("file")
+        if upload is None:
+            raise ValueError("multipart body has no 'attachment' part")
+        stream = upload.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        if size > ATTACHMENT_MAX_BYTES:
+            raise _UploadTooLarge(size)
+        if size == 0:
+            raise ValueError("empty file")
+        return (upload.filename or "attachment",
+                upload.mimetype or "application/octet-stream",
+                stream)
+
+    if content_type == "application/json":
+        body = req.get_json()
+        file_data = base64.b64decode(body["data"])
+        if len(file_data) > ATTACHMENT_MAX_BYTES:
+            raise _UploadTooLarge(len(file_data))
+        return (body.get("filename", "attachment"),
+                body.get("content_type", "application/octet-stream"),
+                file_data)
+
+    file_data = req.get_body()
+    if len(file_data) > ATTACHMENT_MAX_BYTES:
+        raise _UploadTooLarge(len(file_data))
+    if not file_data:
+        raise ValueError("empty body")
+    filename = unquote(req.headers.get("X-Filename") or req.params.get("filename") or "attachment")
+    return filename, content_type or "application/octet-stream", file_data
+
+
 @app.route(route="task/{task_id}/attachment", methods=["POST"], auth_level=func.AuthLevel.ANONYMOUS)
-def http_trigger_task_attachment(req: func.HttpRequest) -> func.HttpResponse:
+@timed_route("task/{task_id}/attachment")
+async def http_trigger_task_attachment(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Async so that image normalization and the ClickUp upload run on worker threads
+    while the host's event loop keeps serving other requests.
+    """
     task_id = req.route_params.get("task_id")
 
     try:
-        body = req.get_json()
-        filename = body.get("filename", "attachment")
-        content_type = body.get("content_type", "application/octet-stream")
-        file_data = base64.b64decode(body["data"])
+        filename, content_type, file_data = _read_attachment_upload(req)
+    except _UploadTooLarge as e:
+        return func.HttpResponse(
+            f"Attachment is {e.args[0]} bytes; the limit is {ATTACHMENT_MAX_BYTES} bytes",
+            status_code=413
+        )
     except Exception as e:
         return func.HttpResponse(f"Invalid request body: {e}", status_code=400)
 
+    bytes_saved = 0
+    if NORMALIZE_ENABLED and content_type.startswith("image/"):
+        if not isinstance(file_data, bytes):
+            file_data = file_data.read()
+        normalized = await normalize_upload(file_data, content_type)
+        if normalized.changed:
+            file_data, content_type = normalized.data, normalized.content_type
+            bytes_saved = normalized.bytes_saved
+            logging.info(
+                f"Normalized attachment {filename!r} for task {task_id}: "
+                f"{normalized.original_bytes} -> {len(file_data)} bytes ({bytes_saved} saved)"
+            )
+
     token = _get_clickup_token()
     # No Content-Type header — let requests set the correct multipart boundary
     cu_headers = {'Authorization': token}
 
     try:
-        resp = requests.post(
+        resp = await asyncio.get_running_loop().run_in_executor(None, lambda: clickup.post(
             f"https://api.clickup.com/api/v2/task/{task_id}/attachment",
             headers=cu_headers,
             files={"attachment": (filename, file_data, content_type)}
-        )
+        ))
         if resp.status_code not in (200, 201):
             return func.HttpResponse(
-                f"ClickUp attachment upload failed: {resp.text}",
+                f"ClickUp attachment upload failed: {Truncated(resp.text)}",
                 status_code=resp.status_code
             )
-        result = json.loads(resp.text)
+        result = resp.json()
         return func.HttpResponse(
             json.dumps({
                 "attachment_id": result.get("id"),
                 "name": result.get("title", filename),
                 "url": result.get("url"),
                 "thumbnail": result.get("thumbnail_medium") or result.get("thumbnail_small"),
+                "bytes_saved": bytes_saved,
             }),
             mimetype="application/json",
             status_code=200
@@ -896,13 +1210,11 @@ def http_trigger_task_attachment(req: func.HttpRequest) -> func.HttpResponse:
         return func.HttpResponse(f"Upload failed: {e}", status_code=500)
 
 
-'''
-Technician UI — PDF Download
-'''
 '''
 Technician UI — Translation Proxy
 '''
 @app.route(route="translate", methods=["POST"], auth_level=func.AuthLevel.ANONYMOUS)
+@timed_route("translate")
 def http_trigger_translate(req: func.HttpRequest) -> func.HttpResponse:
     try:
         body = req.get_json()
@@ -913,7 +1225,8 @@ def http_trigger_translate(req: func.HttpRequest) -> func.HttpResponse:
     if not isinstance(texts, list):
         return func.HttpResponse("'texts' must be an array", status_code=400)
 
-    translations = [translate_text(t) if t else '' for t in texts]
+    results = get_translator().translate_many(texts)
+    translations = [t if r is None else r for t, r in zip(texts, results)]
     return func.HttpResponse(
         json.dumps({'translations': translations}),
         mimetype='application/json',
@@ -924,18 +1237,50 @@ def http_trigger_translate(req: func.HttpRequest) -> func.HttpResponse:
 '''
 Technician UI — PDF Download
 '''
-@app.route(route="task/{task_id}/pdf", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+@app.route(route="task/{task_id}/pdf", methods=["GET", "HEAD"], auth_level=func.AuthLevel.ANONYMOUS)
+@timed_route("task/{task_id}/pdf")
 def http_trigger_task_pdf(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    GET downloads the PDF in one conditional request, taking headers from the
+    download's properties; HEAD answers from blob properties without downloading it.
+    """
     task_id = req.route_params.get("task_id")
 
     try:
-        blob_service_client = _get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(container="content", blob=f"{task_id}.pdf")
-        pdf_bytes = blob_client.download_blob().readall()
+        if req.method == "HEAD":
+            data, props = None, get_pdf_properties(task_id)
+        else:
+            data, props = download_pdf(task_id, if_none_match=req.headers.get("If-None-Match"))
+        if props is None:
+            return func.HttpResponse(
+                json.dumps({"error": "PDF not found"}),
+                mimetype="application/json",
+                status_code=404
+            )
+
+        headers = {
+            "ETag": props["etag"],
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f'inline; filename="task_{task_id}.pdf"',
+        }
+        if props["last_modified"]:
+            headers["Last-Modified"] = props["last_modified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+        if props["fingerprint"]:
+            headers["X-PDF-Fingerprint"] = props["fingerprint"]
+        if props["generated_at"]:
+            headers["X-PDF-Generated-At"] = props["generated_at"]
+
+        if req.method == "HEAD":
+            headers["Content-Length"] = str(props["size"])
+            return func.HttpResponse(status_code=200, mimetype="application/pdf", headers=headers)
+
+        if data is None:
+            return func.HttpResponse(status_code=304, headers=headers)
+
         return func.HttpResponse(
-            pdf_bytes,
+            data,
             mimetype="application/pdf",
-            headers={"Content-Disposition": f'inline; filename="task_{task_id}.pdf"'},
+            headers=headers,
             status_code=200
         )
     except Exception as e:
@@ -951,6 +1296,7 @@ def http_trigger_task_pdf(req: func.HttpRequest) -> func.HttpResponse:
 Technician UI — Regenerate PDF
 '''
 @app.route(route="task/{task_id}/regenerate-pdf", methods=["POST"], auth_level=func.AuthLevel.ANONYMOUS)
+@timed_route("task/{task_id}/regenerate-pdf")
 def http_trigger_regenerate_pdf(req: func.HttpRequest) -> func.HttpResponse:
     task_id = req.route_params.get("task_id")
     if not task_id:
@@ -961,7 +1307,7 @@ def http_trigger_regenerate_pdf(req: func.HttpRequest) -> func.HttpResponse:
 
     # Fetch task from ClickUp
     try:
-        resp = requests.get(f"https://api.clickup.com/api/v2/task/{task_id}", headers=cu_headers)
+        resp = clickup.get(f"https://api.clickup.com/api/v2/task/{task_id}", headers=cu_headers)
         if resp.status_code != 200:
             return func.HttpResponse(
                 json.dumps({"error": f"ClickUp returned {resp.status_code}"}),
@@ -973,63 +1319,20 @@ def http_trigger_regenerate_pdf(req: func.HttpRequest) -> func.HttpResponse:
         logging.error(f"ClickUp fetch failed during regenerate for {task_id}: {e}")
         return func.HttpResponse(json.dumps({"error": str(e)}), mimetype="application/json", status_code=500)
 
-    # Extract fields
-    addr = ""
-    desc = ""
-    action_items = None
-    start_date = data.get("start_date")
-    start_buffer = 0
-    translate_flag = False
-
-    for cf in data.get("custom_fields", []):
-        name = cf.get("name", "")
-        if name == "Property Address":
-            addr = cf.get("value") or ""
-        elif name == "Task Issue Description":
-            val = cf.get("value_richtext")
-            desc = val if isinstance(val, str) else (json.dumps(val) if val else "")
-        elif name == "Task Start Buffer":
-            start_buffer = int(float(cf.get("value", 0) or 0))
-        elif name == "Task Action Items":
-            action_items = cf.get("value_richtext")
-        elif name == "Translate":
-            val = cf.get("value")
-            translate_flag = str(val).lower() == "true" if val is not None else False
-
-    image_bytes = []
-    for attachment in data.get("attachments", []):
-        thumb_url = attachment.get("thumbnail_medium") or attachment.get("thumbnail_small")
-        if thumb_url:
-            try:
-                image_bytes.append(download_image_bytes(thumb_url))
-            except Exception as img_err:
-                logging.warning(f"Skipping attachment thumbnail during regenerate: {img_err}")
-
-    barcode_func_key = get_secret_value("BarcodeScanFuncKey")
-    barcode_link = f'https://fa-clickup-barcode-automation.azurewebsites.net/api/http_trigger_barcodescan?code={barcode_func_key}&task_id={task_id}'
+    spec = _render_spec_from_task(task_id, data)
 
     # Generate PDF
     try:
-        generator = MaintenancePDFGenerator(translate_flag)
-        pdf_bytes = generator.generate(
-            property_address=addr,
-            unit_name='',
-            start_date=start_date,
-            start_buffer=start_buffer,
-            issue_description=desc,
-            action_items=action_items,
-            completion_url=barcode_link,
-            attachment_images=image_bytes
-        )
+        pdf_bytes = render_pool.render(spec)
+    except RenderQueueFull as e:
+        return _render_busy_response(e)
     except Exception as e:
         logging.error(f"PDF generation failed during regenerate for {task_id}: {e}")
         return func.HttpResponse(json.dumps({"error": str(e)}), mimetype="application/json", status_code=500)
 
     # Upload to blob — overwrite triggers EventGrid → email resend
     try:
-        blob_service_client = _get_blob_service_client()
-        blob_client = blob_service_client.get_blob_client(container="content", blob=f"{task_id}.pdf")
-        blob_client.upload_blob(pdf_bytes, overwrite=True)
+        upload_pdf(task_id, pdf_bytes, fingerprint=spec.fingerprint())
         logging.info(f"Regenerated PDF uploaded to blob for task {task_id}")
     except Exception as e:
         logging.error(f"Blob upload failed during regenerate for {task_id}: {e}")
@@ -1038,11 +1341,8 @@ def http_trigger_regenerate_pdf(req: func.HttpRequest) -> func.HttpResponse:
     # Refresh Table Storage snapshot — updates snapshot_written_at
     snapshot_written_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
     try:
-        pdf_blob_url = f"https://faclickupbarcodeautomati.blob.core.windows.net/content/{task_id}.pdf"
-        write_task_snapshot(task_id, data, pdf_blob_url)
-        entity = read_task_snapshot(task_id)
-        if entity:
-            snapshot_written_at = entity.get("snapshot_written_at", snapshot_written_at)
+        entity = write_task_snapshot(task_id, data, pdf_blob_url(task_id))
+        snapshot_written_at = entity.get("snapshot_written_at", snapshot_written_at)
     except Exception as e:
         logging.warning(f"Table Storage snapshot refresh failed during regenerate (non-fatal): {e}")
 
@@ -1067,3 +1367,224 @@ def http_trigger_regenerate_pdf(req: func.HttpRequest) -> func.HttpResponse:
         mimetype="application/json",
         status_code=200
     )
+
+
+'''
+Bulk PDF Generation — many tasks in one request
+'''
+# The route is synchronous and must finish inside the 230 s HTTP timeout. Each task
+# costs 2-5 ClickUp calls (fetch, comment, tag/Warnings clears) against the shared
+# 100/min limiter, so 25 tasks use at most ~75 s of rate budget plus render time.
+BULK_PDF_MAX_TASKS = int(os.environ.get("BulkPdfMaxTasks", "25"))
+BULK_PDF_CONCURRENCY = int(os.environ.get("BulkPdfConcurrency", "8"))
+
+def _bulk_generate_one(task_id: str, cu_headers: dict, snapshots: list) -> dict:
+    """
+    Fetch, render, upload and finalize one task. Never raises.
+    The snapshot entity is appended to `snapshots` for a batched Table Storage write.
+    """
+    try:
+        data = clickup.fetch_task(task_id, cu_headers)
+        if data is None:
+            return {"task_id": task_id, "ok": False, "error": "ClickUp fetch failed"}
+
+        spec = _render_spec_from_task(task_id, data)
+        pdf_bytes = render_pool.render(spec)
+        upload_pdf(task_id, pdf_bytes, fingerprint=spec.fingerprint())
+    except Exception as e:
+        logging.error(f"Bulk PDF generation failed for {task_id}: {e}")
+        return {"task_id": task_id, "ok": False, "error": str(e)}
+
+    snapshots.append(build_snapshot_entity(task_id, data, pdf_blob_url(task_id)))
+
+    _sync_pdf_stale_tag(task_id, is_stale=False, existing_tags=data.get("tags", []), cu_headers=cu_headers)
+    _sync_pdf_warnings_field(
+        task_id,
+        is_stale=False,
+        custom_fields=data.get("custom_fields", []),
+        stale_fields=[],
+        cu_headers=cu_headers
+    )
+    _post_pdf_comment(task_id, cu_headers, source="Bulk")
+    return {"task_id": task_id, "ok": True, "pdf_bytes": len(pdf_bytes)}
+
+
+@app.route(route="tasks/bulk-pdf", methods=["POST"])
+@timed_route("tasks/bulk-pdf")
+def http_trigger_bulk_pdf(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Generate PDFs for many tasks at once.
+    Body: {"task_ids": [...]} or {"list_id": "..."} or {"view_id": "..."}.
+    Returns per-task status. All ClickUp calls share the process rate limiter.
+    At most BULK_PDF_MAX_TASKS tasks per request; larger sets are split by the caller.
+    """
+    try:
+        body = req.get_json()
+    except ValueError:
+        return func.HttpResponse("Invalid JSON body", status_code=400)
+    if not isinstance(body, dict):
+        return func.HttpResponse("JSON body must be an object", status_code=400)
+
+    token = _get_clickup_token()
+    cu_headers = {'accept': 'application/json', 'content-type': 'application/json', 'Authorization': token}
+
+    task_ids = body.get("task_ids")
+    if task_ids is None and (body.get("list_id") or body.get("view_id")):
+        try:
+            task_ids = clickup.list_task_ids(cu_headers, list_id=body.get("list_id"), view_id=body.get("view_id"))
+        except Exception as e:
+            logging.error(f"Bulk PDF task listing failed: {e}")
+            return func.HttpResponse(json.dumps({"error": str(e)}), mimetype="application/json", status_code=502)
+
+    if not isinstance(task_ids, list) or not task_ids:
+        return func.HttpResponse("Provide 'task_ids', 'list_id' or 'view_id'", status_code=400)
+    task_ids = list(dict.fromkeys(str(t) for t in task_ids))
+    if len(task_ids) > BULK_PDF_MAX_TASKS:
+        return func.HttpResponse(
+            json.dumps({"error": f"Too many tasks ({len(task_ids)}); max is {BULK_PDF_MAX_TASKS}"}),
+            mimetype="application/json",
+            status_code=413
+        )
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    snapshots = []
+    with ThreadPoolExecutor(max_workers=BULK_PDF_CONCURRENCY) as executor:
+        results = list(executor.map(lambda t: _bulk_generate_one(t, cu_headers, snapshots), task_ids))
+
+    # One entity group transaction per 100 tasks instead of one upsert each
+    try:
+        write_task_snapshots(snapshots)
+    except Exception as e:
+        logging.warning(f"Table Storage snapshot batch failed during bulk (non-fatal): {e}")
+    elapsed_ms = int((datetime.datetime.now(datetime.timezone.utc) - started).total_seconds() * 1000)
+
+    ok_count = sum(1 for r in results if r["ok"])
+    logging.info(f"Bulk PDF: {ok_count}/{len(results)} tasks generated in {elapsed_ms} ms")
+    return func.HttpResponse(
+        json.dumps({
+            "results": results,
+            "ok_count": ok_count,
+            "error_count": len(results) - ok_count,
+            "elapsed_ms": elapsed_ms,
+        }),
+        mimetype="application/json",
+        status_code=200
+    )
+
+
+'''
+Staleness Reconciler — periodic batch check for missed webhooks
+'''
+RECONCILE_DEFAULT_LOOKBACK_MS = 24 * 60 * 60 * 1000
+# Re-scan a little behind the last run to absorb clock skew between ClickUp and us.
+RECONCILE_OVERLAP_MS = 2 * 60 * 1000
+_RICH_TEXT_FIELD_NAMES = {"Task Issue Description", "Task Action Items"}
+# The only entity columns _reconcile_list reads; skips descriptions, translations etc.
+RECONCILE_SELECT = [
+    "RowKey", "snapshot_written_at", "pdf_stale_fields", "warnings_banner_hash",
+    *(pdf_key for _, pdf_key, _ in PDF_FIELD_COMPARISONS),
+]
+
+
+def _needs_full_task(task: dict) -> bool:
+    """List payloads may omit value_richtext; fetch the task rather than diff a missing value."""
+    return any(
+        cf.get("name") in _RICH_TEXT_FIELD_NAMES and cf.get("value") and "value_richtext" not in cf
+        for cf in task.get("custom_fields", [])
+    )
+
+
+def _reconcile_list(list_id: str, entities: dict, cu_headers: dict) -> dict:
+    """Diff recently updated tasks in one list against their pdf_* baselines. Returns counters."""
+    run_started_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    watermark = read_reconciler_watermark(list_id) or (run_started_ms - RECONCILE_DEFAULT_LOOKBACK_MS)
+    # date_updated of the oldest task we couldn't diff; the next run must see it again
+    oldest_failed_ms = None
+
+    scanned = changed = 0
+    for task in clickup.iter_list_tasks(cu_headers, list_id, date_updated_gt=watermark - RECONCILE_OVERLAP_MS):
+        scanned += 1
+        task_id = task.get("id")
+        entity = entities.get(task_id)
+        if not entity or not entity.get("snapshot_written_at") or entity.get("pdf_task_name") is None:
+            continue
+
+        if _needs_full_task(task):
+            full_task = clickup.fetch_task(task_id, cu_headers)
+            if full_task is None:
+                date_updated = int(task.get("date_updated") or 0)
+                if date_updated and (oldest_failed_ms is None or date_updated < oldest_failed_ms):
+                    oldest_failed_ms = date_updated
+                continue
+            task = full_task
+
+        fields = _extract_task_fields(task)
+        if parse_stale_fields(entity.get("pdf_stale_fields")) == compute_stale_fields(fields, entity):
+            continue
+
+        # The bulk read can be minutes old by now; diff the current entity and write
+        # conditionally so a PDF regenerated meanwhile doesn't get flagged stale again.
+        entity, etag = read_task_snapshot_with_etag(task_id)
+        if not entity or entity.get("pdf_task_name") is None:
+            continue
+        pdf_stale_fields = compute_stale_fields(fields, entity)
+        if parse_stale_fields(entity.get("pdf_stale_fields")) == pdf_stale_fields:
+            continue
+        uow = TaskUnitOfWork(task_id, entity, etag)
+        uow.merge({"pdf_stale_fields": format_stale_fields(pdf_stale_fields)})
+        try:
+            uow.commit()
+        except SnapshotConflict:
+            logging.info(f"Task {task_id} changed during staleness reconcile; skipping")
+            continue
+
+        is_stale = bool(pdf_stale_fields)
+        _sync_pdf_stale_tag(task_id, is_stale=is_stale, existing_tags=task.get("tags", []), cu_headers=cu_headers)
+        _sync_pdf_warnings_field(
+            task_id,
+            is_stale=is_stale,
+            custom_fields=task.get("custom_fields", []),
+            stale_fields=pdf_stale_fields,
+            cu_headers=cu_headers,
+            snapshot_written_at=entity.get("snapshot_written_at"),
+            banner_hash=entity.get("warnings_banner_hash"),
+        )
+        changed += 1
+
+    # Don't move past a task that failed to load, or it would only be retried by the overlap
+    write_reconciler_watermark(list_id, run_started_ms if oldest_failed_ms is None else min(run_started_ms, oldest_failed_ms - 1))
+    return {"scanned": scanned, "changed": changed}
+
+
+@app.timer_trigger(schedule="0 */15 * * * *", arg_name="timer", run_on_startup=False, use_monitor=True)
+def timer_trigger_reconcile_staleness(timer: func.TimerRequest) -> None:
+    """
+    Catch stale PDFs that a missed webhook never flagged. Pages through tasks updated
+    since the last run in each list (ClickUpListIds, comma-separated), diffs them in bulk
+    against one Table Storage partition query, and only writes for tasks whose stale
+    state changed.
+    """
+    list_ids = [l.strip() for l in os.environ.get("ClickUpListIds", "").split(",") if l.strip()]
+    if not list_ids:
+        logging.info("ClickUpListIds not set, skipping staleness reconcile")
+        return
+
+    token = _get_clickup_token()
+    cu_headers = {'accept': 'application/json', 'content-type': 'application/json', 'Authorization': token}
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    entities = read_all_task_snapshots(select=RECONCILE_SELECT)
+    scanned = changed = 0
+    for list_id in list_ids:
+        try:
+            counts = _reconcile_list(list_id, entities, cu_headers)
+            scanned += counts["scanned"]
+            changed += counts["changed"]
+        except Exception as e:
+            logging.error(f"Staleness reconcile failed for list {list_id}: {e}")
+
+    elapsed = max((datetime.datetime.now(datetime.timezone.utc) - started).total_seconds(), 1e-6)
+    logging.info(
+        f"Staleness reconcile: {scanned} tasks scanned, {changed} changed in {elapsed:.2f}s "
+        f"({scanned / elapsed:.1f} tasks/s)"
+    )
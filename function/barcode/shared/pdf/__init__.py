@@ -1,6 +1,6 @@
 from .generator import MaintenancePDFGenerator
 from .styles import PDFStyles, PDFLayout
-from .templates import MaintenanceRequestTemplate
+from .templates import MaintenanceRequestTemplate, PageSkeleton
 from .components import ClickableQRCode
 
 __all__ = [
@@ -8,5 +8,6 @@ __all__ = [
     'PDFStyles',
     'PDFLayout',
     'MaintenanceRequestTemplate',
+    'PageSkeleton',
     'ClickableQRCode'
 ]
\ No newline at end of file
@@ -6,12 +6,14 @@ from reportlab.platypus import (
     Spacer,
     Table,
     TableStyle,
-    KeepTogether
+    KeepTogether,
+    PageBreak
 )
 from reportlab.lib.units import inch
 import io
 import qrcode
 from PIL import Image as PILImage
+from shared.pdf.image_cache import ImageInfo, image_cache, make_rendition
 
 import logging
 import os
@@ -85,12 +87,16 @@ class ClickableQRCode(Flowable):
 
 class ScaledImageGrid:
     """
-    Builds a PDF image section that fits within a known vertical budget.
+    Builds a PDF image section starting in a known vertical budget on page one.
 
-    - Screenshots (UI / chat) -> full-width, legible.
+    - Screenshots (UI / chat) -> taller cells, legible.
     - Photos -> 2-column grid, aspect-correct.
-    - A single uniform scale factor is applied so the total height never
-      exceeds `available_height_in`.
+    - If every image fits on page one at a readable size, a single uniform
+      scale is applied so the grid fits `available_height_in`.
+    - Otherwise the grid overflows onto further pages: rows are packed in
+      order, page one up to its budget and later pages up to a full frame,
+      using the fewest pages possible at the minimum image sizes and the
+      largest scale that keeps that page count.
     """
 
     # Ideal height for a full-width screenshot when space is unlimited.
@@ -105,13 +111,18 @@ class ScaledImageGrid:
     # Minimum photo row height.
     PHOTO_MIN_ROW_HEIGHT_IN = 0.8
 
-    # Overhead of the "Attached Images" sub-header rendered in build()
-    # (spacer + rule + spacer + heading + spacer ~ 0.5").
-    SECTION_HEADER_OVERHEAD_IN = 0.5
-
     # Per-image vertical padding from table cells (top + bottom).
     CELL_PADDING_IN = 12 / 72  # 12 pts ~ 0.167"
 
+    # Bottom padding under each "Image N" caption in its cell table.
+    CAPTION_PADDING_IN = 2 / 72
+
+    # Safety margin on page budgets; estimated heights are approximate.
+    PAGE_FILL_RATIO = 0.97
+
+    # Binary-search steps when fitting the scale to a page count.
+    SCALE_SEARCH_STEPS = 20
+
     _SCREEN_DIMS = {
         375, 390, 393, 414, 428, 430,
         750, 828, 858, 886, 1080, 1125, 1170, 1179, 1242, 1284, 1290, 1320,
@@ -145,6 +156,12 @@ class ScaledImageGrid:
                 - 2.0
             )
         self._available_height_in = max(float(available_height_in), 1.0)
+        self._page_height_in = (
+            getattr(layout, "PAGE_HEIGHT", 11.0)
+            - getattr(layout, "PAGE_TOP_MARGIN", 0.75)
+            - getattr(layout, "PAGE_BOTTOM_MARGIN", 0.75)
+            - 12 / 72  # frame padding
+        )
 
     # ------------------------------------------------------------------
     # Public API
@@ -157,9 +174,12 @@ class ScaledImageGrid:
         content_w_pts = self._content_width_pts()
         cols          = getattr(self.layout, "IMAGE_GRID_COLS", 2)
         col_w_pts     = content_w_pts / cols - (self.CELL_PADDING_IN * inch)
-        budget_in     = max(
-            self._available_height_in - self.SECTION_HEADER_OVERHEAD_IN,
-            1.0,
+        header        = self._section_header()
+        self._header_h_in = self._measure_in(header, content_w_pts)
+        budget_in     = max(self._available_height_in - self._header_h_in, 1.0)
+        self._caption_h_in = (
+            self._measure_in([Paragraph("Image 1", self.styles.caption)], col_w_pts)
+            + self.CAPTION_PADDING_IN
         )
 
         # Phase 1: classify
@@ -178,8 +198,9 @@ class ScaledImageGrid:
                     item, content_w_pts, col_w_pts
                 )
 
-        # Phase 3: scale factor
-        scale = self._compute_scale(items, budget_in, cols)
+        # Phase 3: rows, scale and page breaks
+        rows = self._group_rows(items, cols)
+        scale, pages = self._layout_pages(rows, budget_in)
 
         # Phase 4: build ReportLab elements
         for item in items:
@@ -188,29 +209,49 @@ class ScaledImageGrid:
 
         # Phase 5: assemble flowables
         elements = []
-        elements.append(Spacer(1, 0.1 * inch))
-        elements.append(HRFlowable(width="100%", thickness=1, color="#CCCCCC"))
-        elements.append(Spacer(1, 0.1 * inch))
-        elements.append(Paragraph("Attached Images", self.styles.section_header))
-        elements.append(Spacer(1, 0.08 * inch))
+        if pages and not pages[0]:
+            # Not even one row fits under the header; start the section on a fresh page
+            elements.append(PageBreak())
+            pages = pages[1:]
+        elements.extend(header)
 
-        elements.extend(self._render_unified_grid(items, cols, content_w_pts))
+        for page_no, page_rows in enumerate(pages):
+            if page_no:
+                elements.append(PageBreak())
+            elements.extend(self._render_rows(page_rows, cols, content_w_pts))
 
         return elements
 
+    def _section_header(self):
+        return [
+            Spacer(1, 0.1 * inch),
+            HRFlowable(width="100%", thickness=1, color="#CCCCCC"),
+            Spacer(1, 0.1 * inch),
+            Paragraph("Attached Images", self.styles.section_header),
+            Spacer(1, 0.08 * inch),
+        ]
+
+    @staticmethod
+    def _measure_in(flowables, width_pts):
+        """Laid-out height of flowables in inches, including paragraph spacing."""
+        total = 0.0
+        for el in flowables:
+            _, h = el.wrap(width_pts, 10_000)
+            total += h + el.getSpaceBefore() + el.getSpaceAfter()
+        return total / inch
+
     # ------------------------------------------------------------------
     # Classification
     # ------------------------------------------------------------------
 
     def _classify(self, image_bytes, idx):
-        pil_img       = PILImage.open(io.BytesIO(image_bytes))
-        is_screenshot = self._is_screenshot(pil_img)
-        img_w, img_h  = pil_img.size
+        # Repeat renders of the same attachment skip decoding and classification
+        info = image_cache.get_or_build(image_bytes, self._analyze)
         return {
             "idx":           idx,
-            "image_bytes":   image_bytes,
-            "pil_img":       pil_img,
-            "is_screenshot": is_screenshot,
+            "size":          (info.width, info.height),
+            "embed_bytes":   info.rendition,
+            "is_screenshot": info.is_screenshot,
             "spans_row":     False,  # everything goes in the same grid
             "full_width":    False,
             "is_error":      False,
@@ -218,6 +259,16 @@ class ScaledImageGrid:
             "element":       None,
         }
 
+    def _analyze(self, image_bytes):
+        pil_img = PILImage.open(io.BytesIO(image_bytes))
+        img_w, img_h = pil_img.size
+        return ImageInfo(
+            width=img_w,
+            height=img_h,
+            is_screenshot=self._is_screenshot(pil_img),
+            rendition=make_rendition(pil_img),
+        )
+
     def _is_screenshot(self, pil_img):
         img_w, img_h = pil_img.size
         pixels = img_w * img_h
@@ -270,7 +321,7 @@ class ScaledImageGrid:
     # ------------------------------------------------------------------
 
     def _natural_height_in(self, item, content_w_pts, col_w_pts):
-        img_w, img_h = item["pil_img"].size
+        img_w, img_h = item["size"]
         aspect = img_h / img_w
         # All images are in column-width cells — screenshots just get a
         # taller ideal height so they render more legibly than photos.
@@ -279,66 +330,99 @@ class ScaledImageGrid:
         return min((col_w_pts / inch) * aspect, ideal)
 
     # ------------------------------------------------------------------
-    # Scale factor
+    # Rows and pagination
     # ------------------------------------------------------------------
 
-    def _compute_scale(self, items, budget_in, cols):
+    def _group_rows(self, items, cols):
         """
-        Compute a scale in (0, 1] so all images fit within budget_in.
-
-        Models the unified grid layout:
-        - Screenshots occupy a full row (their natural_h_in is their height
-          at content width, so they count as one row each).
-        - Photos are packed cols-per-row; each row height = tallest photo.
+        Split items into grid rows, in order: photos fill cols-wide rows and
+        an item that spans the row gets one to itself.
         """
-        pad = self.CELL_PADDING_IN
-        total = 0.0
-        photo_buffer = []
-
-        def flush_photos():
-            nonlocal total
-            if not photo_buffer:
-                return
-            num_rows = (len(photo_buffer) + cols - 1) // cols
-            for r in range(num_rows):
-                row = photo_buffer[r * cols : (r + 1) * cols]
-                total += max(i["natural_h_in"] for i in row) + pad
-            photo_buffer.clear()
-
+        rows, photo_row = [], []
         for item in items:
-            if item.get("is_error"):
-                continue
-            if item["spans_row"]:
-                flush_photos()
-                total += item["natural_h_in"] + pad
+            if item.get("spans_row"):
+                if photo_row:
+                    rows.append(photo_row)
+                    photo_row = []
+                rows.append([item])
             else:
-                photo_buffer.append(item)
-
-        flush_photos()
+                photo_row.append(item)
+                if len(photo_row) == cols:
+                    rows.append(photo_row)
+                    photo_row = []
+        if photo_row:
+            rows.append(photo_row)
+        return rows
+
+    def _item_height_in(self, item, scale):
+        """Displayed image height at `scale`, never below the readable minimum."""
+        if item["is_error"]:
+            return item["natural_h_in"]
+        min_h = (self.SCREENSHOT_MIN_HEIGHT_IN if item["is_screenshot"]
+                 else self.PHOTO_MIN_ROW_HEIGHT_IN)
+        # An image narrower than its minimum at column width can't grow past natural
+        return min(item["natural_h_in"], max(item["natural_h_in"] * scale, min_h))
 
-        if total <= 0 or total <= budget_in:
-            return 1.0
+    def _row_height_in(self, row, scale):
+        return (max(self._item_height_in(item, scale) for item in row)
+                + self.CELL_PADDING_IN + self._caption_h_in)
 
-        return (budget_in * 0.97) / total
+    def _paginate(self, rows, scale, first_budget_in):
+        """
+        Greedy in-order page fill: each row goes on the current page if it fits,
+        otherwise starts the next one. For an order-preserving split this uses the
+        fewest pages. Page one may come back empty if its budget is too small.
+        """
+        page_budget_in = self._page_height_in * self.PAGE_FILL_RATIO
+        pages = [[]]
+        remaining = first_budget_in * self.PAGE_FILL_RATIO
+        for row in rows:
+            h = self._row_height_in(row, scale)
+            if h > remaining and (pages[-1] or len(pages) == 1):
+                # An empty page one pushes the section header onto the next page too
+                remaining = page_budget_in - (0 if pages[-1] else self._header_h_in)
+                pages.append([])
+            pages[-1].append(row)
+            remaining -= h
+        return pages
+
+    def _layout_pages(self, rows, budget_in):
+        """
+        Pick (scale, pages). Full size if everything fits on page one; otherwise
+        the largest scale in [0, 1] that needs no more pages than packing every
+        image at its minimum size. Linear in the number of images.
+        """
+        if not rows:
+            return 1.0, []
+        pages = self._paginate(rows, 1.0, budget_in)
+        if len(pages) == 1:
+            return 1.0, pages
+
+        target = len(self._paginate(rows, 0.0, budget_in))
+        lo, hi = 0.0, 1.0
+        for _ in range(self.SCALE_SEARCH_STEPS):
+            mid = (lo + hi) / 2
+            if len(self._paginate(rows, mid, budget_in)) <= target:
+                lo = mid
+            else:
+                hi = mid
+        return lo, self._paginate(rows, lo, budget_in)
 
     # ------------------------------------------------------------------
     # Apply scale
     # ------------------------------------------------------------------
 
     def _apply_scale(self, item, scale, content_w_pts, col_w_pts):
-        img_w, img_h = item["pil_img"].size
+        img_w, img_h = item["size"]
         aspect = img_h / img_w
-        min_h = (self.SCREENSHOT_MIN_HEIGHT_IN if item["is_screenshot"]
-                else self.PHOTO_MIN_ROW_HEIGHT_IN)
 
-        h_in  = max(item["natural_h_in"] * scale, min_h)
-        h_pts = h_in * inch
+        h_pts = self._item_height_in(item, scale) * inch
         w_pts = h_pts / aspect
         if w_pts > col_w_pts:
             w_pts = col_w_pts
             h_pts = w_pts * aspect
 
-        img_el  = ReportLabImage(io.BytesIO(item["image_bytes"]),
+        img_el  = ReportLabImage(io.BytesIO(item["embed_bytes"]),
                                 width=w_pts, height=h_pts)
         caption = Paragraph(f"Image {item['idx']}", self.styles.caption)
 
@@ -370,39 +454,33 @@ class ScaledImageGrid:
             - self.layout.PAGE_RIGHT_MARGIN
         ) * inch
 
-    def _render_unified_grid(self, items, cols, content_w_pts):
+    def _render_rows(self, rows, cols, content_w_pts):
         """
-        Build a single ReportLab Table containing all images.
-
-        Screenshots occupy an entire row (spanning all columns) so they
-        render at a readable size. Photos fill individual cells in a
-        cols-wide grid. This keeps everything in one table so ReportLab
-        can paginate it correctly rather than splitting across separate
-        tables.
-
-        Layout algorithm:
-        - Walk items in order.
-        - If the current item is a screenshot: flush any partial photo row
-          with empty padding cells, then emit a full-width row for the
-          screenshot.
-        - If the current item is a photo: accumulate into the current row;
-          emit the row when it's full.
-        - At the end, flush any remaining partial photo row.
+        Build one ReportLab Table from rows produced by _group_rows.
+
+        Items that span the row (screenshots, when enabled) occupy an entire
+        row (spanning all columns) so they render at a readable size. Photos
+        fill individual cells in a cols-wide grid; partial rows are padded
+        with empty cells.
         """
-        if not items:
+        if not rows:
             return []
 
         col_w = content_w_pts / cols
-        table_rows   = []   # list of row data (each row = list of `cols` cells)
-        span_cmds    = []   # SPAN style commands collected as we go
-        photo_buffer = []   # accumulate photos until a row is full
-
-        def flush_photo_buffer():
-            """Emit the current partial/full photo row, padding if needed."""
-            if not photo_buffer:
-                return
+        table_rows = []   # list of row data (each row = list of `cols` cells)
+        span_cmds  = []   # SPAN style commands collected as we go
+
+        for row_items in rows:
+            row_idx = len(table_rows)
+            if len(row_items) == 1 and row_items[0].get("spans_row"):
+                # First cell holds the image, rest are empty and merged via SPAN
+                table_rows.append([row_items[0]["element"]] + [""] * (cols - 1))
+                if cols > 1:
+                    span_cmds.append(("SPAN", (0, row_idx), (cols - 1, row_idx)))
+                continue
+
             row = []
-            for item in photo_buffer:
+            for item in row_items:
                 el = item.get("element")
                 if el is None:
                     el = [Paragraph(f"Error rendering image {item['idx']}", self.styles.error)]
@@ -410,31 +488,6 @@ class ScaledImageGrid:
             while len(row) < cols:
                 row.append("")
             table_rows.append(row)
-            photo_buffer.clear()
-
-        for item in items:
-            if item["spans_row"]:
-                # Flush any buffered photos first
-                flush_photo_buffer()
-
-                # Screenshot row: first cell holds the image, rest are empty
-                # and will be merged via SPAN
-                row_idx = len(table_rows)
-                row = [item["element"]] + [""] * (cols - 1)
-                table_rows.append(row)
-
-                if cols > 1:
-                    # SPAN from (col=0, row=row_idx) to (col=cols-1, row=row_idx)
-                    span_cmds.append(("SPAN", (0, row_idx), (cols - 1, row_idx)))
-            else:
-                photo_buffer.append(item)
-                if len(photo_buffer) == cols:
-                    flush_photo_buffer()
-
-        flush_photo_buffer()  # trailing partial photo row
-
-        if not table_rows:
-            return []
 
         table = Table(table_rows, colWidths=[col_w] * cols)
 
@@ -1,6 +1,5 @@
 import io
 from pydoc import doc
-from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate
 
@@ -22,7 +21,7 @@ def measure_elements_height(elements, available_width_pts, available_height_pts=
     for el in elements:
         try:
             _, h = el.wrap(available_width_pts, available_height_pts - total)
-            total += h
+            total += h + el.getSpaceBefore() + el.getSpaceAfter()
         except Exception:
             pass
     return total
@@ -39,7 +38,7 @@ class MaintenancePDFGenerator:
         self.translate = translate
     
     def generate(self, property_address, unit_name, start_date, start_buffer, issue_description, action_items,
-                 completion_url, attachment_images=None):
+                 completion_url, attachment_images=None, translations=None):
         """
         Generate a PDF with formatted maintenance request information
         
@@ -49,30 +48,18 @@ class MaintenancePDFGenerator:
             issue_description: str - Description of the problem
             completion_url: str - URL for the clickable QR code
             attachment_images: list of bytes - Optional list of image bytes
+            translations: dict - Pre-translated strings from the translation pre-pass;
+                strings missing from it render untranslated. When None, text is
+                translated inline with translate_text.
         
         Returns:
             bytes - PDF file content as bytes
         """
         buffer = io.BytesIO()
-        
-        doc = SimpleDocTemplate(
-            buffer, 
-            pagesize=letter,
-            topMargin=self.layout.PAGE_TOP_MARGIN*inch,
-            bottomMargin=self.layout.PAGE_BOTTOM_MARGIN*inch,
-            leftMargin=self.layout.PAGE_LEFT_MARGIN*inch,
-            rightMargin=self.layout.PAGE_RIGHT_MARGIN*inch
-        )
-        
-        content_w_pts = (
-            self.layout.PAGE_WIDTH
-            - self.layout.PAGE_LEFT_MARGIN
-            - self.layout.PAGE_RIGHT_MARGIN
-        ) * inch
-        
-        elements = []
-        
-        
+        skeleton = self.template.skeleton
+
+        doc = SimpleDocTemplate(buffer, pagesize=skeleton.page_size, **skeleton.margins)
+
         # Create QR code
         qr_code = ClickableQRCode(
             completion_url,
@@ -80,7 +67,12 @@ class MaintenancePDFGenerator:
             height=self.layout.QR_CODE_SIZE*inch
         )
         
-        translate_fn = translate_text if self.translate else None
+        translate_fn = None
+        if self.translate:
+            if translations is None:
+                translate_fn = translate_text
+            else:
+                translate_fn = lambda text: translations.get(text, text)
         
         header_els = self.template.build_header(
             property_address, unit_name, start_date, start_buffer, qr_code,
@@ -102,16 +94,9 @@ class MaintenancePDFGenerator:
         
         header_height_pts = measure_elements_height(
             header_els + divider_els + issue_els,
-            content_w_pts,
-        )
-        
-        page_h_pts = letter[1]
-        usable_pts = (
-            page_h_pts
-            - self.layout.PAGE_TOP_MARGIN  * inch
-            - self.layout.PAGE_BOTTOM_MARGIN * inch
-            - header_height_pts
+            skeleton.content_width_pts,
         )
+        usable_pts = skeleton.frame_height_pts - header_height_pts
         
         grid_el = self.template.build_image_grid(attachment_images, usable_pts / inch)
         
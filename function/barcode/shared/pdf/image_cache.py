@@ -0,0 +1,197 @@
+import io
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from PIL import Image as PILImage
+
+# Bump when classification or rendition output changes, so stale disk entries are ignored.
+CACHE_VERSION = 2
+
+# Disk cache is shared by every render worker on the instance; memory is per process.
+IMAGE_CACHE_DIR = os.environ.get(
+    "PdfImageCacheDir", os.path.join(tempfile.gettempdir(), "pdf-image-cache")
+)
+IMAGE_CACHE_MEMORY_ENTRIES = int(os.environ.get("PdfImageCacheMemoryEntries", "128"))
+IMAGE_CACHE_DISK_ENTRIES = int(os.environ.get("PdfImageCacheDiskEntries", "2000"))
+
+# Long edge of the embedded rendition. The grid never draws an image wider than a
+# 3.5" column or taller than 4", so this is ~250 dpi at the largest display size.
+RENDITION_MAX_PX = int(os.environ.get("PdfImageRenditionMaxPx", "1000"))
+RENDITION_JPEG_QUALITY = 88
+# Sources that are kept lossless: screenshots, diagrams and logos rather than photos.
+# JPEG blurs their text and hard edges.
+_LOSSLESS_FORMATS = {"PNG", "GIF"}
+
+_PRUNE_EVERY_WRITES = 100
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Everything the image grid needs from an attachment, without decoding it again."""
+    width: int              # original pixel size; the rendition keeps its aspect ratio
+    height: int
+    is_screenshot: bool
+    rendition: bytes        # JPEG (embedded as-is, no re-decode) or PNG; see make_rendition
+
+
+def make_rendition(pil_img) -> bytes:
+    """
+    Downscale to RENDITION_MAX_PX on a white background. PNG/GIF sources and
+    anything with transparency are encoded as PNG; photographic sources as
+    baseline JPEG.
+    """
+    img = pil_img
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    lossless = img.format in _LOSSLESS_FORMATS or has_alpha
+    if img.mode in ("RGBA", "LA", "PA", "P"):
+        img = img.convert("RGBA")
+        background = PILImage.new("RGB", img.size, "white")
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    if max(img.size) > RENDITION_MAX_PX:
+        img = img.copy()
+        img.thumbnail((RENDITION_MAX_PX, RENDITION_MAX_PX), PILImage.LANCZOS)
+    out = io.BytesIO()
+    if lossless:
+        img.save(out, format="PNG")
+    else:
+        img.save(out, format="JPEG", quality=RENDITION_JPEG_QUALITY)
+    return out.getvalue()
+
+
+class ImageInfoCache:
+    """
+    ImageInfo keyed by SHA-256 of the attachment bytes: an in-memory LRU in front
+    of a directory of <key>.json + <key>.img files. Disk errors are logged and
+    treated as misses; the cache never fails a render.
+    """
+
+    def __init__(self, directory=IMAGE_CACHE_DIR,
+                 memory_entries=IMAGE_CACHE_MEMORY_ENTRIES,
+                 disk_entries=IMAGE_CACHE_DISK_ENTRIES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @staticmethod
+    def key(image_bytes: bytes) -> str:
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{digest}-v{CACHE_VERSION}-{RENDITION_MAX_PX}"
+
+    def get_or_build(self, image_bytes: bytes, build) -> ImageInfo:
+        """Return the cached ImageInfo, or call build(image_bytes) and cache the result."""
+        key = self.key(image_bytes)
+        info = self._memory_get(key)
+        if info is not None:
+            return info
+        info = self._disk_get(key)
+        if info is None:
+            info = build(image_bytes)
+            self._disk_put(key, info)
+        self._memory_put(key, info)
+        return info
+
+    # ------------------------------------------------------------------
+    # Memory
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key):
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None:
+                self._memory.move_to_end(key)
+            return info
+
+    def _memory_put(self, key, info):
+        with self._lock:
+            self._memory[key] = info
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Disk
+    # ------------------------------------------------------------------
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".img"
+
+    def _disk_get(self, key):
+        meta_path, rendition_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(rendition_path, "rb") as f:
+                rendition = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Image cache read failed for {key[:12]}: {e}")
+            return None
+        return ImageInfo(meta["width"], meta["height"], meta["is_screenshot"], rendition)
+
+    def _disk_put(self, key, info):
+        meta_path, rendition_path = self._paths(key)
+        meta = {"width": info.width, "height": info.height, "is_screenshot": info.is_screenshot}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Rendition first, metadata last: a reader only trusts entries with both.
+            # Write to temp names and rename so concurrent workers never see partial files.
+            self._atomic_write(rendition_path, info.rendition)
+            self._atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            logging.warning(f"Image cache write failed for {key[:12]}: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY_WRITES == 0
+        if prune:
+            self._prune()
+
+    @staticmethod
+    def _atomic_write(path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _prune(self):
+        """Drop the least recently written entries beyond disk_entries."""
+        try:
+            entries = [
+                e for e in os.scandir(self.directory) if e.name.endswith(".json")
+            ]
+            excess = len(entries) - self.disk_entries
+            if excess <= 0:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:excess]:
+                for path in self._paths(entry.name[:-len(".json")]):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        except OSError as e:
+            logging.warning(f"Image cache prune failed: {e}")
+
+
+image_cache = ImageInfoCache()
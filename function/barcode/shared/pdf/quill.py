@@ -0,0 +1,283 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import NamedTuple
+from xml.sax.saxutils import escape
+from reportlab.platypus import Paragraph
+from reportlab.platypus.paraparser import ParaParser
+
+# Inline Quill attributes -> (open tag, close tag) in ReportLab Paragraph markup
+_INLINE_TAGS = {
+    "bold":      ("<b>", "</b>"),
+    "italic":    ("<i>", "</i>"),
+    "underline": ("<u>", "</u>"),
+    "strike":    ("<strike>", "</strike>"),
+    "code":      ('<font face="Courier">', "</font>"),
+}
+_NO_TAGS = ("", "")
+_ATTR_ENTITIES = {'"': "&quot;"}
+_BULLET_MARKERS = ["•", "–", "·"]  # all in WinAnsi, so Helvetica can draw them
+
+
+class QuillParagraph(NamedTuple):
+    """One rendered line of a Quill document."""
+    markup: str             # ReportLab Paragraph markup, XML-escaped
+    list_type: str | None   # "bullet", "ordered", or None
+    indent: int             # nesting level, 0 for top-level
+    runs: tuple = ()        # ((open, close), text) per run, list marker first; text unescaped
+
+
+def _list_type(block_attrs: dict) -> str | None:
+    # ClickUp nests the list type ({"list": {"list": "bullet"}}); stock Quill doesn't.
+    value = block_attrs.get("list")
+    if isinstance(value, dict):
+        value = value.get("list")
+    if not value:
+        return None
+    return "ordered" if value == "ordered" else "bullet"
+
+
+def _build_run_tags(attrs: dict) -> tuple:
+    opens, closes = [], []
+    for key, value in attrs.items():
+        if not value:
+            continue
+        if key == "link":
+            opens.append(f'<a href="{escape(str(value), _ATTR_ENTITIES)}" color="blue">')
+            closes.append("</a>")
+        else:
+            tags = _INLINE_TAGS.get(key)
+            if tags:
+                opens.append(tags[0])
+                closes.append(tags[1])
+    return "".join(opens), "".join(reversed(closes))
+
+
+_run_tags_cache = {}
+
+
+def _run_tags(attrs: dict) -> tuple:
+    """(open, close) markup for a run's inline attributes; ('', '') when unformatted."""
+    try:
+        key = tuple(attrs.items())
+        tags = _run_tags_cache.get(key)
+    except TypeError:  # unhashable attribute value
+        return _build_run_tags(attrs)
+    if tags is None:
+        tags = _build_run_tags(attrs)
+        if len(_run_tags_cache) < 512:
+            _run_tags_cache[key] = tags
+    return tags
+
+
+class _ListCounters:
+    """Per-level ordered-list counters. Reset when a list is interrupted or its type changes."""
+
+    def __init__(self):
+        self._levels = []  # [(list_type, count)] indexed by indent
+
+    @property
+    def active(self) -> bool:
+        return bool(self._levels)
+
+    def marker(self, list_type: str | None, indent: int) -> str:
+        if list_type is None:
+            self._levels = []
+            return ""
+        del self._levels[indent + 1:]
+        while len(self._levels) <= indent:
+            self._levels.append((None, 0))
+        prev_type, count = self._levels[indent]
+        count = count + 1 if prev_type == list_type else 1
+        self._levels[indent] = (list_type, count)
+        if list_type == "ordered":
+            return f"{count}. "
+        return f"{_BULLET_MARKERS[indent % len(_BULLET_MARKERS)]} "
+
+
+def _markup(runs) -> str:
+    parts = []
+    for (o, c), text in runs:
+        # Most runs have nothing to escape; skip the three replace() passes for them
+        if "&" in text or "<" in text or ">" in text:
+            text = escape(text)
+        parts.append(o + text + c)
+    return "".join(parts)
+
+
+def _walk_quill_ops(ops) -> tuple[QuillParagraph, ...]:
+    counters = _ListCounters()
+    paragraphs = []
+    runs = []  # [(tags, text)] for the current line, outer whitespace trimmed as we go
+
+    def end_line(block_attrs):
+        if not runs:
+            return
+        # Only the last run can carry trailing whitespace
+        tags, text = runs[-1]
+        text = text.rstrip()
+        while not text:
+            runs.pop()
+            if not runs:
+                return
+            tags, text = runs[-1]
+            text = text.rstrip()
+        runs[-1] = (tags, text)
+
+        if block_attrs:
+            list_type = _list_type(block_attrs)
+            indent = int(block_attrs.get("indent") or 0) if list_type else 0
+            marker = counters.marker(list_type, indent)
+        else:
+            list_type, indent = None, 0
+            marker = counters.marker(None, 0) if counters.active else ""
+        line = ((_NO_TAGS, marker), *runs) if marker else tuple(runs)
+        paragraphs.append(QuillParagraph(_markup(line), list_type, indent, line))
+        runs.clear()
+
+    for op in ops:
+        insert = op.get("insert")
+        if not isinstance(insert, str):
+            continue  # embeds (images, mentions) have no text to render
+        attrs = op.get("attributes")
+
+        if insert == "\n":
+            # Block attributes (list type, indent) ride on the newline that ends the line
+            end_line(attrs)
+            continue
+
+        tags = _run_tags(attrs) if attrs else _NO_TAGS
+        if "\n" not in insert:
+            if runs:
+                runs.append((tags, insert))
+            elif insert.strip():
+                runs.append((tags, insert.lstrip()))
+            continue
+
+        pieces = insert.split("\n")
+        last = len(pieces) - 1
+        for i, piece in enumerate(pieces):
+            if piece and (runs or piece.strip()):
+                runs.append((tags, piece if runs else piece.lstrip()))
+            if i < last:
+                # Newlines inside a text insert end plain lines
+                end_line(attrs if not insert.strip("\n") else None)
+
+    end_line(None)
+    return tuple(paragraphs)
+
+
+_QUILL_CACHE_MAX_ENTRIES = 256
+_quill_cache: OrderedDict[str, tuple[QuillParagraph, ...]] = OrderedDict()
+_quill_cache_lock = threading.Lock()
+
+
+def parse_quill_paragraphs(value_richtext) -> tuple[QuillParagraph, ...]:
+    """
+    Parse a ClickUp Quill Delta into an immutable tuple of untranslated QuillParagraphs.
+
+    Memoized by a hash of the raw delta like parse_quill_segments, so the translation
+    pre-pass and the templates walking the same description only parse it once.
+    """
+    if not value_richtext:
+        return ()
+    if not isinstance(value_richtext, str):
+        value_richtext = json.dumps(value_richtext)
+
+    key = hashlib.sha1(value_richtext.encode("utf-8")).hexdigest()
+    with _quill_cache_lock:
+        cached = _quill_cache.get(key)
+        if cached is not None:
+            _quill_cache.move_to_end(key)
+            return cached
+
+    try:
+        delta = json.loads(value_richtext)
+    except json.JSONDecodeError:
+        return ()
+    ops = delta.get("ops", []) if isinstance(delta, dict) else []
+    paragraphs = _walk_quill_ops(ops)
+
+    with _quill_cache_lock:
+        _quill_cache[key] = paragraphs
+        if len(_quill_cache) > _QUILL_CACHE_MAX_ENTRIES:
+            _quill_cache.popitem(last=False)
+    return paragraphs
+
+
+def iter_quill_paragraphs(value_richtext, translate_fn=None):
+    """
+    Render a ClickUp Quill Delta as ReportLab Paragraph markup.
+
+    Yields a QuillParagraph per non-empty line. Inline attributes (bold, italic,
+    underline, strike, code, link) become markup tags; list lines get a bullet or a
+    per-list number, with nesting taken from the `indent` attribute. Each distinct
+    text run is passed through translate_fn at most once per call, and the markup
+    of translated lines is rebuilt from the cached parse.
+    """
+    paragraphs = parse_quill_paragraphs(value_richtext)
+    if translate_fn is None:
+        yield from paragraphs
+        return
+
+    translated = {}
+
+    def t(text):
+        core = text.strip()
+        if not core:
+            return text
+        if core not in translated:
+            translated[core] = translate_fn(core)
+        # Keep the spacing between runs; translators trim it
+        start = text.index(core)
+        return text[:start] + translated[core] + text[start + len(core):]
+
+    for paragraph in paragraphs:
+        marker = paragraph.runs[:1] if paragraph.list_type else ()
+        runs = marker + tuple((tags, t(text)) for tags, text in paragraph.runs[len(marker):])
+        yield paragraph._replace(markup=_markup(runs), runs=runs)
+
+
+# Per style: (open, close) tags -> the ParaFrag ReportLab's parser makes for them
+_frag_templates = weakref.WeakKeyDictionary()
+
+
+def _frag_template(style, tags: tuple):
+    templates = _frag_templates.get(style)
+    if templates is None:
+        templates = _frag_templates.setdefault(style, {})
+    frag = templates.get(tags)
+    if frag is None:
+        _, frags, _ = ParaParser().parse(f"{tags[0]}x{tags[1]}", style)
+        frag = frags[0] if frags and len(frags) == 1 else False
+        if len(templates) < 512:
+            templates[tags] = frag
+    return frag
+
+
+def quill_flowable(paragraph: QuillParagraph, style) -> Paragraph:
+    """
+    Paragraph for a QuillParagraph. Fragments are cloned from per-style templates
+    instead of re-parsing the markup, which is most of the cost of building a
+    Paragraph; markup that can't be templated falls back to the parser.
+    """
+    if not paragraph.runs or getattr(style, "textTransform", None):
+        return Paragraph(paragraph.markup, style)
+    frags = []
+    previous = None
+    for tags, text in paragraph.runs:
+        if tags == previous:
+            # Fewer fragments also means a cheaper wrap()
+            frags[-1].text += text
+            continue
+        template = _frag_template(style, tags)
+        if not template:
+            return Paragraph(paragraph.markup, style)
+        frag = template.clone(text=text)
+        if template.link:
+            frag.link = list(template.link)
+        frags.append(frag)
+        previous = tags
+    return Paragraph(paragraph.markup, style, frags=frags)
@@ -1,4 +1,5 @@
 import logging
+from functools import cached_property
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.units import inch
@@ -10,7 +11,10 @@ _cjk = CJKFontManager()
 _cjk.register()
 
 class PDFStyles:
-    """Centralized PDF styling configuration"""
+    """
+    Centralized PDF styling configuration.
+    Styles are built on first access and reused for every render by this instance.
+    """
     
     CJK_FONT = 'WQYZenHei'
     CJK_FONT_PATH = '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc'
@@ -19,6 +23,7 @@ class PDFStyles:
         
         self.base_styles = getSampleStyleSheet()
         self.fontName = _cjk.font_name  # 'CJKFont'
+        self._address_styles = {}
         
         
     def _register_fonts(self):
@@ -30,7 +35,7 @@ class PDFStyles:
         except Exception as e:
             logging.warning(f'Could not register CJK font: {e}')
         
-    @property
+    @cached_property
     def title(self):
         return ParagraphStyle('CustomTitle',
             fontSize=20,        # was 24
@@ -38,7 +43,21 @@ class PDFStyles:
             textColor='#333333',
             fontName=self.fontName)
 
-    @property
+    def address(self, font_size):
+        """Title style resized for long addresses; one instance per font size."""
+        style = self._address_styles.get(font_size)
+        if style is None:
+            style = ParagraphStyle(
+                f"address_header_{font_size}",
+                parent=self.title,
+                fontSize=font_size,
+                leading=font_size * 1.25,
+                spaceAfter=2,
+            )
+            self._address_styles[font_size] = style
+        return style
+
+    @cached_property
     def subtitle(self):
         return ParagraphStyle('CustomSubtitle', parent=self.base_styles['Normal'],
             fontSize=14,
@@ -46,7 +65,7 @@ class PDFStyles:
             textColor='#666666',
             fontName=self.fontName)
 
-    @property
+    @cached_property
     def section_header(self):
         return ParagraphStyle('SectionHeader', parent=self.base_styles['Normal'],
             fontSize=12,
@@ -55,7 +74,7 @@ class PDFStyles:
             textColor='#444444',
             fontName=self.fontName)
 
-    @property
+    @cached_property
     def body(self):
         return ParagraphStyle('CustomBody', parent=self.base_styles['BodyText'],
             fontSize=11,        # was 12
@@ -63,7 +82,7 @@ class PDFStyles:
             leading=14,         # was 16
             fontName=self.fontName)
     
-    @property
+    @cached_property
     def centered(self):
         return ParagraphStyle(
             'Centered',
@@ -74,7 +93,7 @@ class PDFStyles:
             fontName=self.fontName
         )
     
-    @property
+    @cached_property
     def link(self):
         return ParagraphStyle(
             'LinkStyle',
@@ -86,7 +105,7 @@ class PDFStyles:
             fontName=self.fontName
         )
     
-    @property
+    @cached_property
     def date(self):
         return ParagraphStyle(
             'DateStyle',
@@ -98,7 +117,7 @@ class PDFStyles:
             fontName=self.fontName
         )
     
-    @property
+    @cached_property
     def caption(self):
         return ParagraphStyle(
             'Caption',
@@ -108,7 +127,7 @@ class PDFStyles:
             textColor='#666666',
             fontName=self.fontName)
     
-    @property
+    @cached_property
     def error(self):
         return ParagraphStyle(
             'Error',
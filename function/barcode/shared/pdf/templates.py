@@ -2,19 +2,124 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, HRFlowable
 from reportlab.lib.units import inch
+from reportlab.lib.pagesizes import letter
 from reportlab.lib.enums import TA_CENTER
 import io
 import logging
-from shared.utils.helpers import translate_text, parse_quill_delta
+from reportlab.lib.styles import ParagraphStyle
+from shared.utils.helpers import translate_text
+from shared.pdf.quill import iter_quill_paragraphs, quill_flowable
 
 from shared.pdf.components import ScaledImageGrid
 
+# Left indent per nested list level
+LIST_INDENT_STEP = 0.25 * inch
+EST_TZ = ZoneInfo("US/Eastern")
+
+# Fixed page text. Dynamic values are {placeholders} filled in after translation,
+# so the translator only ever sees (and caches) the template.
+SENT_ON = "Sent on {date}"
+ARRIVAL_UNSET = "Please set an expected arrival date and time range by scanning the QR code"
+ARRIVAL_RANGE = (
+    "Expected arrival time range: {start} - {end}. "
+    "Please scan the QR code to make an update if this changes."
+)
+ISSUE_HEADING = "Issue Description"
+ACTION_ITEMS_HEADING = "Action Items"
+
+
+def format_datetime(dt, translated=False):
+    """
+    Date and time for the page. Translated (Simplified Chinese) pages use a
+    numeric zh pattern, since the value is filled in after translation and an
+    English month name would otherwise land inside the translated sentence.
+    """
+    if translated:
+        return f"{dt.year}年{dt.month}月{dt.day}日 {dt:%H:%M}"
+    return dt.strftime('%B %d, %Y at %I:%M %p')
+
+
+def fill(template, **values):
+    """Substitute {name} placeholders. str.format would choke on braces a translator adds."""
+    for name, value in values.items():
+        template = template.replace(f"{{{name}}}", str(value))
+    return template
+
+
+class PageSkeleton:
+    """
+    Static parts of the maintenance request page: frame geometry, header table
+    styles and widths, address font steps and gap heights. Compiled once per
+    template (and so once per render worker) and shared by every render, which
+    only fills in the task text, QR code and images.
+
+    Only immutable values live here. Flowables are stateful (wrap() and split()
+    mutate them), so templates build fresh Spacers and dividers for each story.
+    """
+
+    def __init__(self, styles, layout):
+        # Frame geometry
+        self.page_size = letter
+        self.margins = {
+            "topMargin":    layout.PAGE_TOP_MARGIN * inch,
+            "bottomMargin": layout.PAGE_BOTTOM_MARGIN * inch,
+            "leftMargin":   layout.PAGE_LEFT_MARGIN * inch,
+            "rightMargin":  layout.PAGE_RIGHT_MARGIN * inch,
+        }
+        self.content_width_pts = (
+            layout.PAGE_WIDTH - layout.PAGE_LEFT_MARGIN - layout.PAGE_RIGHT_MARGIN
+        ) * inch
+        # SimpleDocTemplate's frame pads 6pt at top and bottom
+        self.frame_height_pts = (
+            letter[1] - self.margins["topMargin"] - self.margins["bottomMargin"] - 12
+        )
+
+        # Header
+        self.header_left_widths = (layout.HEADER_PROPERTY_WIDTH * inch,)
+        self.header_widths = (layout.HEADER_PROPERTY_WIDTH * inch, layout.HEADER_QR_WIDTH * inch)
+        self.header_left_style = TableStyle([
+            ('LEFTPADDING',   (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING',  (0, 0), (-1, -1), 0),
+            ('TOPPADDING',    (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+            ('VALIGN',        (0, 0), (-1, -1), 'TOP'),
+        ])
+        self.header_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN',  (1, 0), (1, 0),   'RIGHT'),
+        ])
+        self.header_gap = 0.05 * inch
+        self.address_gap = 0.04 * inch
+
+        # Address font steps, shrinking for long addresses
+        title_size = styles.title.fontSize
+        self.address_sizes = [
+            (35, title_size),
+            (55, max(title_size - 3, 11)),
+            (None, max(title_size - 5, 9)),
+        ]
+        for _, size in self.address_sizes:
+            styles.address(size)
+
+        # Body
+        self.divider_gaps = (0.08 * inch, 0.1 * inch)  # above, below
+        self.section_gap = 0.1 * inch
+
+    def address_font_size(self, address):
+        addr_len = len(address)
+        for max_len, size in self.address_sizes:
+            if max_len is None or addr_len <= max_len:
+                return size
+
+
 class MaintenanceRequestTemplate:
     """Template for maintenance request PDFs"""
     
     def __init__(self, styles, layout):
         self.styles = styles
         self.layout = layout
+        self.skeleton = PageSkeleton(styles, layout)
+        self._indent_styles = {}
     
     @staticmethod
     def normalize_address(text):
@@ -40,77 +145,45 @@ class MaintenanceRequestTemplate:
         elements = []
         
         t = translate_fn if translate_fn else (lambda x: x)
-        time_fmt = '%H:%M' if translate_fn else '%I:%M %p'
+        translated = translate_fn is not None
+        time_fmt = '%H:%M' if translated else '%I:%M %p'
 
         # Current date/time
-        est_tz = ZoneInfo("US/Eastern")
-        current_datetime = datetime.now(est_tz).strftime(f'%B %d, %Y at {time_fmt}')
-        elements.append(Paragraph(t(f"Sent on {current_datetime}"), self.styles.date))
-        elements.append(Spacer(1, 0.05 * inch))
+        current_datetime = format_datetime(datetime.now(EST_TZ), translated)
+        elements.append(Paragraph(fill(t(SENT_ON), date=current_datetime), self.styles.date))
+        elements.append(Spacer(1, self.skeleton.header_gap))
 
         sanitized_address = self.normalize_address(property_address)
+        address_style = self.styles.address(self.skeleton.address_font_size(sanitized_address))
 
-        addr_len = len(sanitized_address)
-        if addr_len <= 35:
-            title_font_size = self.styles.title.fontSize
-        elif addr_len <= 55:
-            title_font_size = max(self.styles.title.fontSize - 3, 11)
-        else:
-            title_font_size = max(self.styles.title.fontSize - 5, 9)
-
-        from reportlab.lib.styles import ParagraphStyle
-        address_style = ParagraphStyle(
-            "address_header",
-            parent=self.styles.title,
-            fontSize=title_font_size,
-            leading=title_font_size * 1.25,
-            spaceAfter=2,
-        )
-
-        start_date_str = t("Please set an expected arrival date and time range by scanning the QR code")
+        start_date_str = t(ARRIVAL_UNSET)
 
         if start_date:
             timestamp_s = float(start_date) / 1000.0
-            est_tz = ZoneInfo("US/Eastern")
-            start_dt = datetime.fromtimestamp(timestamp_s, tz=est_tz)
-            end_dt   = datetime.fromtimestamp(timestamp_s + start_buffer * 60 * 60, tz=est_tz)
-            start_date_fmt = start_dt.strftime(f'%B %d, %Y at {time_fmt}')
+            start_dt = datetime.fromtimestamp(timestamp_s, tz=EST_TZ)
+            end_dt   = datetime.fromtimestamp(timestamp_s + start_buffer * 60 * 60, tz=EST_TZ)
+            start_date_fmt = format_datetime(start_dt, translated)
             w_buffer_fmt   = end_dt.strftime(time_fmt)
-            start_date_str = t(
-                f"Expected arrival time range: {start_date_fmt} - {w_buffer_fmt}. "
-                "Please scan the QR code to make an update if this changes."
-            )
-            logging.info(f"Parsed start_date: {start_date_fmt}, buffer: {start_buffer}, start_date_str: {start_date_str}")
+            start_date_str = fill(t(ARRIVAL_RANGE), start=start_date_fmt, end=w_buffer_fmt)
+            logging.debug("Parsed start_date: %s, buffer: %s", start_date_fmt, start_buffer)
 
         left_content = Table(
             [
                 [Paragraph(sanitized_address, address_style)],
-                [Spacer(1, 0.04 * inch)],
+                [Spacer(1, self.skeleton.address_gap)],
                 [Paragraph(f"<b>{start_date_str}</b>", self.styles.subtitle)],
             ],
-            colWidths=[self.layout.HEADER_PROPERTY_WIDTH * inch]
+            colWidths=list(self.skeleton.header_left_widths),  # Table may adjust widths in place
+            style=self.skeleton.header_left_style,
         )
-        left_content.setStyle(TableStyle([
-            ('LEFTPADDING',   (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING',  (0, 0), (-1, -1), 0),
-            ('TOPPADDING',    (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-            ('VALIGN',        (0, 0), (-1, -1), 'TOP'),
-        ]))
-
-        header_data = [[left_content, qr_code]]
         header_table = Table(
-            header_data,
-            colWidths=[self.layout.HEADER_PROPERTY_WIDTH * inch,
-                    self.layout.HEADER_QR_WIDTH * inch]
+            [[left_content, qr_code]],
+            colWidths=list(self.skeleton.header_widths),
+            style=self.skeleton.header_style,
         )
-        header_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN',  (1, 0), (1, 0),   'RIGHT'),
-        ]))
-        
+
         elements.append(header_table)
-        elements.append(Spacer(1, 0.05 * inch))
+        elements.append(Spacer(1, self.skeleton.header_gap))
         return elements
     
     def build_qr_instructions(self, completion_url):
@@ -126,29 +199,36 @@ class MaintenanceRequestTemplate:
     
     def build_section_divider(self):
         """Build a section divider"""
-        elements = []
-        elements.append(Spacer(1, 0.08*inch))
-        elements.append(HRFlowable(width="100%", thickness=1, color='#CCCCCC'))
-        elements.append(Spacer(1, 0.1*inch))
-        return elements
+        above, below = self.skeleton.divider_gaps
+        return [
+            Spacer(1, above),
+            HRFlowable(width="100%", thickness=1, color='#CCCCCC'),
+            Spacer(1, below),
+        ]
     
+    def _body_style(self, indent):
+        """Body style, shifted right for nested list levels."""
+        if indent == 0:
+            return self.styles.body
+        style = self._indent_styles.get(indent)
+        if style is None:
+            style = ParagraphStyle(
+                f'CustomBodyIndent{indent}',
+                parent=self.styles.body,
+                leftIndent=indent * LIST_INDENT_STEP,
+            )
+            self._indent_styles[indent] = style
+        return style
+
+    def _rich_text_paragraphs(self, value_richtext, translate_fn=None):
+        """Render a Quill delta as body Paragraphs, keeping inline formatting."""
+        return [
+            quill_flowable(para, self._body_style(para.indent))
+            for para in iter_quill_paragraphs(value_richtext, translate_fn=translate_fn)
+        ]
+
     def build_action_item_elements(self, value_richtext, translate_fn=None):
-        segments = parse_quill_delta(value_richtext)
-        elements = []
-        
-        t = translate_fn if translate_fn else (lambda x: x)
-        
-        for i, seg in enumerate(segments):
-            text = t(seg["text"])
-            
-            if seg["type"] == "bullet":
-                elements.append(Paragraph(f"• {text}", self.styles.body))
-            elif seg["type"] == "ordered":
-                elements.append(Paragraph(f"{i + 1}. {text}", self.styles.body))
-            else:
-                elements.append(Paragraph(text, self.styles.body))
-        
-        return elements
+        return self._rich_text_paragraphs(value_richtext, translate_fn=translate_fn)
     
     def build_issue_section(self, issue_description, action_items, translate_fn=None):
         """Build the issue description section"""
@@ -156,21 +236,12 @@ class MaintenanceRequestTemplate:
 
         t = translate_fn if translate_fn else (lambda x: x)
 
-        elements.append(Paragraph(f"<b>{t('Issue Description')}</b>", self.styles.section_header))
-        desc_segments = parse_quill_delta(issue_description)
-        for i, seg in enumerate(desc_segments):
-            text = t(seg["text"])
-            if seg["type"] == "bullet":
-                elements.append(Paragraph(f"• {text}", self.styles.body))
-            elif seg["type"] == "ordered":
-                elements.append(Paragraph(f"{i + 1}. {text}", self.styles.body))
-            else:
-                elements.append(Paragraph(text, self.styles.body))
+        elements.append(Paragraph(f"<b>{t(ISSUE_HEADING)}</b>", self.styles.section_header))
+        elements.extend(self._rich_text_paragraphs(issue_description, translate_fn=translate_fn))
         if action_items:
-            elements.append(Spacer(1, 0.1 * inch))
-            elements.append(Paragraph(f"<b>{t('Action Items')}</b>", self.styles.section_header))
+            elements.append(Spacer(1, self.skeleton.section_gap))
+            elements.append(Paragraph(f"<b>{t(ACTION_ITEMS_HEADING)}</b>", self.styles.section_header))
             elements.extend(action_items)  # already Paragraphs
-            logging.info(f"Added action items to PDF: {action_items}")
         return elements
     
     def build_image_grid(self, attachment_images, usable):
@@ -0,0 +1,88 @@
+import re
+import hashlib
+import logging
+from dataclasses import replace
+
+from shared.pdf.quill import iter_quill_paragraphs
+from shared.pdf.templates import (
+    SENT_ON, ARRIVAL_UNSET, ARRIVAL_RANGE, ISSUE_HEADING, ACTION_ITEMS_HEADING,
+)
+
+# Bump when the set of translated strings or their meaning changes.
+TRANSLATION_CACHE_VERSION = 1
+TARGET_LANGUAGE = "zh-Hans"
+
+_PLACEHOLDER = re.compile(r"\{\w+\}")
+
+
+def collect_strings(spec) -> list:
+    """
+    Every string the templates will ask to translate for this spec, sorted.
+    Rich text is walked with the same renderer the templates use, so the runs
+    collected here are exactly the runs looked up at render time.
+    """
+    strings = {SENT_ON, ISSUE_HEADING, ARRIVAL_RANGE if spec.start_date else ARRIVAL_UNSET}
+    if spec.action_items:
+        strings.add(ACTION_ITEMS_HEADING)
+
+    def record(text):
+        strings.add(text)
+        return text
+
+    for value_richtext in (spec.issue_description, spec.action_items):
+        for _ in iter_quill_paragraphs(value_richtext, translate_fn=record):
+            pass
+    return sorted(strings)
+
+
+def content_hash(strings) -> str:
+    digest = hashlib.sha256(f"v{TRANSLATION_CACHE_VERSION}:{TARGET_LANGUAGE}".encode("utf-8"))
+    for text in strings:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _keeps_placeholders(source: str, translated: str) -> bool:
+    return sorted(_PLACEHOLDER.findall(source)) == sorted(_PLACEHOLDER.findall(translated))
+
+
+def translate_spec(spec, translate_many, cached: dict | None = None) -> tuple:
+    """
+    Translation pre-pass: resolve every string the render needs before layout.
+
+    `cached` is a previous {"hash", "strings"} result for the same task. When the
+    content hash matches, no translator calls are made; otherwise strings already
+    in the cache are reused and only new ones are translated.
+
+    `translate_many` takes a list of strings and returns a list of translations,
+    with None for any it could not translate (see Translator.translate_many).
+
+    Returns (spec with `translations` set, cache value to store, strings sent).
+    A failed translation, or one that drops a {placeholder}, is left out so that
+    string renders in English.
+    """
+    strings = collect_strings(spec)
+    digest = content_hash(strings)
+    previous = (cached or {}).get("strings") or {}
+
+    if cached and cached.get("hash") == digest:
+        translations = {s: previous[s] for s in strings if s in previous}
+        return replace(spec, translations=tuple(sorted(translations.items()))), cached, 0
+
+    translations = {text: previous[text] for text in strings if text in previous}
+    missing = [text for text in strings if text not in translations]
+    results = translate_many(missing) if missing else []
+    for text, translated in zip(missing, results):
+        if translated is None:
+            continue
+        if not _keeps_placeholders(text, translated):
+            logging.warning(f"Translation dropped placeholders, keeping English: {text[:60]!r}")
+            continue
+        translations[text] = translated
+
+    complete = len(translations) == len(strings)
+    # Only a complete result is keyed by the content hash; otherwise the next
+    # render retries the missing strings.
+    cache_value = {"hash": digest if complete else "", "strings": translations}
+    return replace(spec, translations=tuple(sorted(translations.items()))), cache_value, len(missing)
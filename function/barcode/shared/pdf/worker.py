@@ -0,0 +1,177 @@
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, fields
+
+# Number of render processes per instance. 0 renders inline on the calling thread.
+RENDER_POOL_SIZE = int(os.environ.get("PdfRenderPoolSize", str(os.cpu_count() or 1)))
+# Max renders queued or running at once; submit() blocks past this.
+RENDER_QUEUE_DEPTH = int(os.environ.get("PdfRenderQueueDepth", str(max(RENDER_POOL_SIZE, 1) * 4)))
+RENDER_QUEUE_TIMEOUT_SECONDS = 60
+# Longest a caller waits for a submitted render, so a hung worker can't pin a request thread.
+RENDER_TIMEOUT_SECONDS = float(os.environ.get("PdfRenderTimeoutSeconds", "120"))
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    """Everything needed to render one maintenance PDF. Picklable, so it can cross processes."""
+    property_address: str
+    start_date: str | int | None
+    start_buffer: int
+    issue_description: str
+    action_items: str | None
+    completion_url: str
+    attachment_images: tuple = ()
+    translate: bool = False
+    unit_name: str = ""
+    # Sorted (source, translated) pairs from the translation pre-pass. None means
+    # translate inline during layout (only when translate is set).
+    translations: tuple | None = None
+
+    def generate_kwargs(self) -> dict:
+        return {
+            "property_address": self.property_address,
+            "unit_name": self.unit_name,
+            "start_date": self.start_date,
+            "start_buffer": self.start_buffer,
+            "issue_description": self.issue_description,
+            "action_items": self.action_items,
+            "completion_url": self.completion_url,
+            "attachment_images": list(self.attachment_images),
+            "translations": dict(self.translations) if self.translations is not None else None,
+        }
+
+    def fingerprint(self) -> str:
+        """SHA-256 over every input, so identical specs produce identical fingerprints."""
+        digest = hashlib.sha256()
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name == "attachment_images":
+                for image in value:
+                    digest.update(hashlib.sha256(image).digest())
+            else:
+                digest.update(f"{f.name}={value!r}".encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when the render queue stays at RENDER_QUEUE_DEPTH for too long."""
+
+    retry_after_seconds = 30
+
+
+# ----------------------------------------------------------------------
+# Worker-process side
+# ----------------------------------------------------------------------
+
+_worker_generators = {}
+
+
+def _generator_for(translate: bool):
+    generator = _worker_generators.get(translate)
+    if generator is None:
+        from .generator import MaintenancePDFGenerator
+        generator = MaintenancePDFGenerator(translate)
+        _worker_generators[translate] = generator
+    return generator
+
+
+def _warm_worker() -> None:
+    """Pool initializer: import ReportLab, register fonts and build styles once per process."""
+    try:
+        for translate in (False, True):
+            generator = _generator_for(translate)
+            generator.styles.body
+            generator.styles.title
+    except Exception as e:
+        logging.warning(f"Render worker warm-up failed (non-fatal): {e}")
+
+
+def render_spec(spec: RenderSpec) -> bytes:
+    """Render a spec to PDF bytes in the current process."""
+    return _generator_for(spec.translate).generate(**spec.generate_kwargs())
+
+
+# ----------------------------------------------------------------------
+# Caller side
+# ----------------------------------------------------------------------
+
+class RenderPool:
+    """
+    Process pool for CPU-bound PDF rendering.
+
+    ReportLab layout and PIL decode/encode hold the GIL, so rendering on the
+    request thread serializes concurrent requests on one instance. Renders are
+    shipped to worker processes instead; in-flight work is capped at queue_depth.
+    """
+
+    def __init__(self, size: int = RENDER_POOL_SIZE, queue_depth: int = RENDER_QUEUE_DEPTH):
+        self.size = max(size, 0)
+        self.queue_depth = max(queue_depth, 1)
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn, not fork — the Functions host process runs gRPC threads.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.size,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_warm_worker,
+                    )
+        return self._executor
+
+    def _discard_executor(self, broken: ProcessPoolExecutor) -> None:
+        """Drop an executor whose worker died; the next submit starts a fresh one."""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, spec: RenderSpec, executor: ProcessPoolExecutor | None = None) -> Future:
+        if self.size == 0:
+            future = Future()
+            try:
+                future.set_result(render_spec(spec))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self._slots.acquire(timeout=RENDER_QUEUE_TIMEOUT_SECONDS):
+            raise RenderQueueFull(f"PDF render queue full ({self.queue_depth} in flight)")
+        try:
+            future = (executor or self._get_executor()).submit(render_spec, spec)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def render(self, spec: RenderSpec, timeout: float | None = RENDER_TIMEOUT_SECONDS) -> bytes:
+        """
+        Render and wait up to `timeout` seconds (TimeoutError past that). If a
+        worker crashed (OOM, segfault) the pool is broken for every later render,
+        so it is rebuilt and the render retried once.
+        """
+        if self.size == 0:
+            return self.submit(spec).result()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return self.submit(spec, executor).result(timeout=timeout)
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                logging.warning("PDF render pool is broken (a worker died); restarting it")
+                self._discard_executor(executor)
+
+
+render_pool = RenderPool()
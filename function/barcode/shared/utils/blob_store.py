@@ -0,0 +1,132 @@
+import os
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, HttpResponseError
+from azure.storage.blob import BlobServiceClient, ContentSettings
+from azure.identity import ManagedIdentityCredential
+from shared.utils.metrics import azure_response_hook
+
+PDF_CONTAINER = "content"
+ACCOUNT_URL = "https://faclickupbarcodeautomati.blob.core.windows.net"
+
+# PDFs are usually well under SINGLE_PUT_MAX_BYTES and go up in one request;
+# image-heavy ones are split into UPLOAD_BLOCK_BYTES blocks sent in parallel.
+UPLOAD_MAX_CONCURRENCY = int(os.environ.get("BlobUploadConcurrency", "4"))
+UPLOAD_BLOCK_BYTES = int(os.environ.get("BlobUploadBlockBytes", str(4 * 1024 * 1024)))
+SINGLE_PUT_MAX_BYTES = int(os.environ.get("BlobSinglePutMaxBytes", str(8 * 1024 * 1024)))
+PDF_CACHE_CONTROL = "private, no-cache"
+
+_service_client = None
+_service_client_lock = threading.Lock()
+
+
+def get_blob_service_client() -> BlobServiceClient:
+    """Process-wide BlobServiceClient; its HTTP pipeline and credential are reused across calls."""
+    global _service_client
+    if _service_client is None:
+        with _service_client_lock:
+            if _service_client is None:
+                _service_client = _create_blob_service_client()
+    return _service_client
+
+
+def _create_blob_service_client() -> BlobServiceClient:
+    tuning = {
+        "max_block_size": UPLOAD_BLOCK_BYTES,
+        "max_single_put_size": SINGLE_PUT_MAX_BYTES,
+        "raw_response_hook": azure_response_hook("blob"),
+    }
+    if os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT") == "Development":
+        return BlobServiceClient.from_connection_string(
+            "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPfsNjYWjl2kh;BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;",
+            **tuning
+        )
+    credential = ManagedIdentityCredential(
+        client_id=os.environ.get("AzureWebJobsStorage__clientId")
+    )
+    return BlobServiceClient(account_url=ACCOUNT_URL, credential=credential, **tuning)
+
+
+def pdf_blob_name(task_id: str) -> str:
+    return f"{task_id}.pdf"
+
+
+def pdf_blob_url(task_id: str) -> str:
+    return f"{ACCOUNT_URL}/{PDF_CONTAINER}/{pdf_blob_name(task_id)}"
+
+
+def upload_pdf(task_id: str, pdf_bytes: bytes, fingerprint: str | None = None) -> dict:
+    """
+    Upload a generated PDF with content headers and generation metadata.
+    Overwrites the existing blob, which fires the EventGrid email trigger.
+    Returns {"etag", "generated_at", "fingerprint"}.
+    """
+    generated_at = datetime.now(timezone.utc).isoformat()
+    blob_client = get_blob_service_client().get_blob_client(
+        container=PDF_CONTAINER, blob=pdf_blob_name(task_id)
+    )
+    result = blob_client.upload_blob(
+        pdf_bytes,
+        overwrite=True,
+        max_concurrency=UPLOAD_MAX_CONCURRENCY,
+        content_settings=ContentSettings(
+            content_type="application/pdf",
+            cache_control=PDF_CACHE_CONTROL,
+            content_md5=bytearray(hashlib.md5(pdf_bytes).digest()),
+        ),
+        metadata={
+            "fingerprint": fingerprint or "",
+            "generated_at": generated_at,
+        },
+    )
+    logging.info(f"Uploaded PDF for task {task_id} ({len(pdf_bytes)} bytes)")
+    return {"etag": result.get("etag"), "generated_at": generated_at, "fingerprint": fingerprint}
+
+
+def _pdf_properties(props) -> dict:
+    metadata = props.metadata or {}
+    return {
+        "size": props.size,
+        "etag": props.etag,
+        "last_modified": props.last_modified,
+        "fingerprint": metadata.get("fingerprint") or None,
+        "generated_at": metadata.get("generated_at") or None,
+    }
+
+
+def get_pdf_properties(task_id: str) -> dict | None:
+    """HEAD the PDF blob. Returns size, etag and generation metadata, or None if absent."""
+    blob_client = get_blob_service_client().get_blob_client(
+        container=PDF_CONTAINER, blob=pdf_blob_name(task_id)
+    )
+    try:
+        props = blob_client.get_blob_properties()
+    except ResourceNotFoundError:
+        return None
+    return _pdf_properties(props)
+
+
+def download_pdf(task_id: str, if_none_match: str | None = None) -> tuple:
+    """
+    GET the PDF blob in one request. Returns (bytes, properties as from
+    get_pdf_properties), (None, None) if absent, or (None, None-valued properties
+    with the given etag) when the blob still matches if_none_match.
+    """
+    blob_client = get_blob_service_client().get_blob_client(
+        container=PDF_CONTAINER, blob=pdf_blob_name(task_id)
+    )
+    conditions = {"etag": if_none_match, "match_condition": MatchConditions.IfModified} if if_none_match else {}
+    try:
+        downloader = blob_client.download_blob(max_concurrency=UPLOAD_MAX_CONCURRENCY, **conditions)
+    except ResourceNotFoundError:
+        return None, None
+    except HttpResponseError as e:
+        # The storage layer may surface a 304 as a plain or ConditionNotMet error
+        if e.status_code != 304:
+            raise
+        return None, {"size": None, "etag": if_none_match, "last_modified": None,
+                      "fingerprint": None, "generated_at": None}
+    return downloader.readall(), _pdf_properties(downloader.properties)
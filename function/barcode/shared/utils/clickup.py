@@ -0,0 +1,277 @@
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from shared.utils.log import Truncated
+from shared.utils.metrics import metrics
+
+CLICKUP_API_BASE = "https://api.clickup.com/api/v2"
+
+# ClickUp allows 100 requests/minute per token on most plans. Every call made
+# through this module draws from the same per-process budget.
+RATE_LIMIT_PER_MINUTE = int(os.environ.get("ClickUpRateLimitPerMinute", "100"))
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available.
+
+    ClickUp's X-RateLimit-Remaining / X-RateLimit-Reset headers are fed back in
+    via observe() so the bucket drains early when other instances share the token.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(per_minute, 1)
+        self.refill_per_sec = self.capacity / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.refill_per_sec)
+            time.sleep(min(wait, 5.0))
+
+    def observe(self, resp: requests.Response) -> None:
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, float(remaining))
+            if remaining <= 0 and reset:
+                try:
+                    wait = max(float(reset) - time.time(), 0.0)
+                except ValueError:
+                    wait = 1.0
+                self._blocked_until = time.monotonic() + min(wait, 60.0)
+
+
+_limiter = RateLimiter(RATE_LIMIT_PER_MINUTE)
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session for ClickUp calls."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a ClickUp API request through the shared session and rate limiter.
+    429 responses are retried after the reset window, up to MAX_RATE_LIMIT_RETRIES.
+    """
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT_SECONDS)
+    session = get_session()
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        if attempt:
+            _rewind_files(kwargs.get("files"))
+        _limiter.acquire()
+        try:
+            resp = session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            metrics.count_dependency("clickup", type(e).__name__)
+            raise
+        metrics.count_dependency("clickup", resp.status_code)
+        _limiter.observe(resp)
+        if resp.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            return resp
+        metrics.count_retry("clickup")
+        logging.warning(f"ClickUp rate limited on {method} {url}, retry {attempt + 1}/{MAX_RATE_LIMIT_RETRIES}")
+    return resp
+
+
+def _rewind_files(files) -> None:
+    # Uploads may pass file objects; a retry must send them from the start again.
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
+
+
+# Custom field definitions belong to the list, not the task, and rarely change.
+FIELD_SCHEMA_TTL_SECONDS = float(os.environ.get("ClickUpFieldSchemaTTLSeconds", "3600"))
+# A name that is not in the schema triggers a refresh at most this often per list.
+FIELD_SCHEMA_MISS_REFRESH_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class FieldDef:
+    id: str
+    name: str
+    type: str
+
+
+class FieldSchemaCache:
+    """
+    Custom field definitions per list, keyed by lowercased name, so handlers
+    resolve field ids without scanning task payloads or fetching tasks.
+
+    Entries come from the list fields endpoint, or are seeded for free from any
+    task payload (which carries every field of its list). They are reloaded after
+    FIELD_SCHEMA_TTL_SECONDS, or early when a name is missing.
+    """
+
+    def __init__(self, ttl_seconds: float = FIELD_SCHEMA_TTL_SECONDS,
+                 miss_refresh_seconds: float = FIELD_SCHEMA_MISS_REFRESH_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self._lists = {}  # list_id -> (loaded_at, {lowercased name: FieldDef})
+        self._lock = threading.Lock()
+
+    def seed(self, task_data: dict) -> None:
+        """Record the field definitions carried by a task payload under its list."""
+        list_id = task_list_id(task_data)
+        if list_id:
+            self._store(list_id, task_data.get("custom_fields", []))
+
+    def field(self, list_id: str | None, name: str, headers: dict | None = None) -> FieldDef | None:
+        """
+        FieldDef for `name` in a list. With headers, an unknown or expired list is
+        loaded from ClickUp and a miss triggers a (throttled) reload.
+        """
+        if not list_id:
+            return None
+        key = name.lower()
+        entry = self._lists.get(list_id)
+        now = time.monotonic()
+        if entry is not None:
+            loaded_at, fields = entry
+            found = fields.get(key)
+            if now - loaded_at < self.ttl_seconds and (found or now - loaded_at < self.miss_refresh_seconds):
+                return found
+        if headers is None:
+            return entry[1].get(key) if entry else None
+        fields = self._load(list_id, headers)
+        if fields is None:
+            return entry[1].get(key) if entry else None
+        return fields.get(key)
+
+    def field_id(self, list_id: str | None, name: str, headers: dict | None = None) -> str | None:
+        field = self.field(list_id, name, headers)
+        return field.id if field else None
+
+    def _load(self, list_id: str, headers: dict) -> dict | None:
+        try:
+            resp = get(f"{CLICKUP_API_BASE}/list/{list_id}/field", headers=headers)
+        except requests.RequestException as e:
+            logging.warning(f"ClickUp field schema fetch failed for list {list_id}: {e}")
+            return None
+        if resp.status_code != 200:
+            logging.warning(f"ClickUp returned {resp.status_code} for list {list_id} fields")
+            return None
+        return self._store(list_id, resp.json().get("fields", []))
+
+    def _store(self, list_id: str, custom_fields: list) -> dict:
+        fields = {
+            cf["name"].lower(): FieldDef(cf["id"], cf["name"], cf.get("type", ""))
+            for cf in custom_fields
+            if cf.get("name") and cf.get("id")
+        }
+        with self._lock:
+            self._lists[list_id] = (time.monotonic(), fields)
+        return fields
+
+
+field_schema = FieldSchemaCache()
+
+
+def task_list_id(task_data: dict) -> str | None:
+    return (task_data.get("list") or {}).get("id")
+
+
+def fetch_task(task_id: str, headers: dict) -> dict | None:
+    """Return the ClickUp task payload, or None on a non-200 response."""
+    resp = get(f"{CLICKUP_API_BASE}/task/{task_id}", headers=headers)
+    if resp.status_code != 200:
+        logging.warning(f"ClickUp returned {resp.status_code} for task {task_id}")
+        return None
+    task_data = resp.json()
+    field_schema.seed(task_data)
+    return task_data
+
+
+def list_task_ids(headers: dict, list_id: str | None = None, view_id: str | None = None) -> list:
+    """Page through a ClickUp list or view and return every task id in it."""
+    if list_id:
+        url = f"{CLICKUP_API_BASE}/list/{list_id}/task"
+    elif view_id:
+        url = f"{CLICKUP_API_BASE}/view/{view_id}/task"
+    else:
+        raise ValueError("list_id or view_id is required")
+
+    task_ids = []
+    page = 0
+    while True:
+        resp = get(url, headers=headers, params={"page": page})
+        if resp.status_code != 200:
+            raise RuntimeError(f"ClickUp returned {resp.status_code} listing tasks: {Truncated(resp.text)}")
+        body = resp.json()
+        task_ids.extend(t["id"] for t in body.get("tasks", []))
+        if body.get("last_page", True) or not body.get("tasks"):
+            break
+        page += 1
+    return task_ids
+
+
+def iter_list_tasks(headers: dict, list_id: str, date_updated_gt: int | None = None):
+    """
+    Yield full task payloads (custom fields and tags included) from a ClickUp list,
+    page by page. date_updated_gt (ms) limits results to recently changed tasks.
+    """
+    params = {"page": 0, "include_closed": "true", "subtasks": "true"}
+    if date_updated_gt:
+        params["date_updated_gt"] = int(date_updated_gt)
+    url = f"{CLICKUP_API_BASE}/list/{list_id}/task"
+    while True:
+        resp = get(url, headers=headers, params=params)
+        if resp.status_code != 200:
+            raise RuntimeError(f"ClickUp returned {resp.status_code} listing list {list_id}: {Truncated(resp.text)}")
+        body = resp.json()
+        tasks = body.get("tasks", [])
+        yield from tasks
+        if body.get("last_page", True) or not tasks:
+            break
+        params["page"] += 1
@@ -1,9 +1,12 @@
-import os
 import requests
 import datetime
 import uuid
 import json
-import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from shared.utils.translation import get_translator
 
 
 def download_image_bytes(url):
@@ -29,88 +32,94 @@ def generate_blob_path(task_id):
 
 
 def translate_text(text):
-    try:
-        if not text:  # handles None, "", etc.
-            logging.info("No text provided for translation, returning empty string.")
-            return ""
-        
-        endpoint = "https://api.cognitive.microsofttranslator.com/"
-
-        path = '/translate'
-        constructed_url = endpoint + path
+    """Translate English text to Simplified Chinese. Falls back to the original text on failure."""
+    return get_translator().translate(text)
 
-        params = {
-            'api-version': '3.0',
-            'from': 'en',
-            'to': ['zh-Hans']
-        }
 
-        headers = {
-            'Ocp-Apim-Subscription-Key': os.environ.get('TranslationAPIKey'),
 
-            'Content-type': 'application/json',
-            'X-ClientTraceId': str(uuid.uuid4())
-        }
+class QuillSegment(NamedTuple):
+    """One line of a Quill Delta document."""
+    text: str
+    type: str | None  # "bullet", "ordered", or None
 
-        body = [{
-            'text': text
-        }]
 
-        request = requests.post(constructed_url, params=params, headers=headers, json=body)
-        response = request.json()
+_QUILL_CACHE_MAX_ENTRIES = 256
+_quill_cache: OrderedDict[str, tuple[QuillSegment, ...]] = OrderedDict()
+_quill_cache_lock = threading.Lock()
 
-        print(json.dumps(response, sort_keys=True, ensure_ascii=False, indent=4, separators=(',', ': ')))
-        return response[0]['translations'][0]['text']
-    except Exception as e:
-        logging.warning(f"Translation failed, using original text: {e}")
-        return text  # fall back to original text
 
+def parse_quill_segments(value_richtext) -> tuple[QuillSegment, ...]:
+    """
+    Parse ClickUp Quill Delta richtext into an immutable tuple of QuillSegments.
 
+    Results are memoized by a hash of the raw delta, so the same description or
+    action-item list parsed repeatedly within a request (field extraction, cache
+    fallback, PDF templates) is only walked once.
 
-def parse_quill_delta(value_richtext, translate_fn=None):
-    """
-    Parse ClickUp Quill Delta richtext into a list of ReportLab Paragraphs.
-    
     Quill Delta structure:
     - Text content comes in {"insert": "text"} ops
     - Formatting comes in {"insert": "\n", "attributes": {"list": {"list": "bullet"}}} ops
     - A \n op with list attribute means the PRECEDING text was a bullet item
     """
     if not value_richtext:
-        return []
-    
+        return ()
+    if not isinstance(value_richtext, str):
+        value_richtext = json.dumps(value_richtext)
+
+    key = hashlib.sha1(value_richtext.encode("utf-8")).hexdigest()
+    with _quill_cache_lock:
+        cached = _quill_cache.get(key)
+        if cached is not None:
+            _quill_cache.move_to_end(key)
+            return cached
+
+    segments = _walk_quill_ops(value_richtext)
+
+    with _quill_cache_lock:
+        _quill_cache[key] = segments
+        if len(_quill_cache) > _QUILL_CACHE_MAX_ENTRIES:
+            _quill_cache.popitem(last=False)
+    return segments
+
+
+def _walk_quill_ops(value_richtext: str) -> tuple[QuillSegment, ...]:
     try:
         delta = json.loads(value_richtext)
         ops = delta.get("ops", [])
     except (json.JSONDecodeError, AttributeError):
-        return []
-    
-    # Walk ops: accumulate text, and when we hit a \n op check for list attribute
+        return ()
+
+    # Walk ops: collect text parts, and when we hit a \n op check for list attribute
     segments = []
-    current_text = ""
-    
+    parts = []
+
     for op in ops:
         insert = op.get("insert", "")
-        attributes = op.get("attributes", {})
-        
+        attributes = op.get("attributes") or {}
+
         if insert == "\n":
             # This \n terminates the current segment
             list_attr = attributes.get("list", {})
             list_type = list_attr.get("list") if isinstance(list_attr, dict) else None
-            
-            segments.append({
-                "text": current_text.strip(),
-                "type": list_type  # "bullet", "ordered", or None
-            })
-            current_text = ""
-        else:
-            current_text += insert
-    
+
+            text = "".join(parts).strip()
+            if text:
+                segments.append(QuillSegment(text, list_type))
+            parts = []
+        elif isinstance(insert, str):
+            parts.append(insert)
+
     # Any trailing text without a terminating \n
-    if current_text.strip():
-        segments.append({"text": current_text.strip(), "type": None})
-    
-    # Drop empty segments
-    segments = [s for s in segments if s["text"]]
-    
-    return segments
\ No newline at end of file
+    text = "".join(parts).strip()
+    if text:
+        segments.append(QuillSegment(text, None))
+
+    return tuple(segments)
+
+
+def parse_quill_delta(value_richtext, translate_fn=None):
+    """
+    Parse ClickUp Quill Delta richtext into a list of {"text", "type"} dicts
+    suitable for JSON responses. Backed by the memoized parse_quill_segments.
+    """
+    return [seg._asdict() for seg in parse_quill_segments(value_richtext)]
@@ -0,0 +1,106 @@
+import io
+import asyncio
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+
+# Photos from the technician UI are normalized before they go to ClickUp.
+# Anything that fails or does not get smaller is forwarded untouched.
+NORMALIZE_ENABLED = os.environ.get("AttachmentNormalizeImages", "true").lower() in ("1", "true", "yes")
+MAX_DIMENSION_PX = int(os.environ.get("AttachmentImageMaxPx", "2048"))
+JPEG_QUALITY = int(os.environ.get("AttachmentImageJpegQuality", "85"))
+NORMALIZE_WORKERS = int(os.environ.get("AttachmentNormalizeWorkers", "2"))
+NORMALIZE_TIMEOUT_SECONDS = float(os.environ.get("AttachmentNormalizeTimeoutSeconds", "20"))
+
+# PIL format -> content type. Other formats (GIF, HEIC, PDFs, ...) pass through.
+_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class NormalizedImage:
+    data: bytes
+    content_type: str
+    original_bytes: int
+    changed: bool
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+def normalize_image(data: bytes, content_type: str) -> NormalizedImage:
+    """
+    Auto-orient by EXIF, downscale so the long edge is at most MAX_DIMENSION_PX,
+    and re-encode in the same format without EXIF/XMP metadata. The ICC profile
+    is kept so colours do not shift. Returns the original bytes when the input is
+    not a supported still image or the result would not be smaller.
+    """
+    unchanged = NormalizedImage(data, content_type, len(data), False)
+    try:
+        img = Image.open(io.BytesIO(data))
+        fmt = img.format
+        if fmt not in _FORMATS or getattr(img, "is_animated", False):
+            return unchanged
+        icc_profile = img.info.get("icc_profile")
+        img = ImageOps.exif_transpose(img)
+        if max(img.size) > MAX_DIMENSION_PX:
+            img.thumbnail((MAX_DIMENSION_PX, MAX_DIMENSION_PX), Image.LANCZOS)
+
+        out = io.BytesIO()
+        save_kwargs = {"icc_profile": icc_profile} if icc_profile else {}
+        if fmt == "JPEG":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, **save_kwargs)
+        elif fmt == "WEBP":
+            img.save(out, format="WEBP", quality=JPEG_QUALITY, **save_kwargs)
+        else:
+            img.save(out, format="PNG", optimize=True, **save_kwargs)
+    except Exception as e:
+        logging.warning(f"Image normalization skipped: {type(e).__name__}: {e}")
+        return unchanged
+
+    normalized = out.getvalue()
+    if len(normalized) >= len(data):
+        return unchanged
+    return NormalizedImage(normalized, _FORMATS[fmt], len(data), True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(NORMALIZE_WORKERS, 1), thread_name_prefix="image-normalize"
+                )
+    return _executor
+
+
+async def normalize_upload(data: bytes, content_type: str) -> NormalizedImage:
+    """
+    Run normalize_image on the shared worker pool, which bounds how many uploads
+    decode and resize at once. The caller's event loop stays free while it waits.
+    Falls back to the original bytes when disabled, not an image, or slower than
+    NORMALIZE_TIMEOUT_SECONDS.
+    """
+    if not NORMALIZE_ENABLED or not (content_type or "").startswith("image/"):
+        return NormalizedImage(data, content_type, len(data), False)
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_executor(), normalize_image, data, content_type)
+    try:
+        return await asyncio.wait_for(future, timeout=NORMALIZE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logging.warning(f"Image normalization timed out after {NORMALIZE_TIMEOUT_SECONDS}s; forwarding original")
+        return NormalizedImage(data, content_type, len(data), False)
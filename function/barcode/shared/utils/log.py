@@ -0,0 +1,63 @@
+import os
+import random
+import logging
+
+# Per-route log levels, e.g. LogLevels="webhook=WARNING,task=DEBUG". Routes not
+# listed use LogLevel (default INFO). Raising a route's level skips formatting
+# its messages entirely, not just their export to Application Insights.
+DEFAULT_LOG_LEVEL = os.environ.get("LogLevel", "INFO").upper()
+ROUTE_LOG_LEVELS = dict(
+    (part.split("=", 1)[0].strip(), part.split("=", 1)[1].strip().upper())
+    for part in os.environ.get("LogLevels", "").split(",")
+    if "=" in part
+)
+# Longest string a single logged value may contribute.
+LOG_MAX_CHARS = int(os.environ.get("LogMaxChars", "500"))
+# Fraction of full request/response payloads that are logged (at DEBUG).
+PAYLOAD_SAMPLE_RATE = float(os.environ.get("LogPayloadSampleRate", "0.01"))
+
+
+def get_logger(route: str) -> logging.Logger:
+    """Logger for a route or module, at its configured level."""
+    logger = logging.getLogger(f"app.{route}")
+    level = ROUTE_LOG_LEVELS.get(route, DEFAULT_LOG_LEVEL)
+    logger.setLevel(getattr(logging, level, logging.INFO))
+    return logger
+
+
+class Truncated:
+    """Lazily str() a value, cut to `limit` chars, only if the record is emitted."""
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int = LOG_MAX_CHARS):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}… [{len(text)} chars]"
+
+
+class Fields:
+    """Lazily render key=value pairs; each value is truncated."""
+    __slots__ = ("items",)
+
+    def __init__(self, **items):
+        self.items = items
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={Truncated(value)}" for key, value in self.items.items())
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **values) -> None:
+    """One structured line: `event key=value ...`. Nothing is formatted if the level is off."""
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s", event, Fields(**values))
+
+
+def sample_payload(logger: logging.Logger, label: str, payload, rate: float = PAYLOAD_SAMPLE_RATE) -> None:
+    """Log a truncated payload at DEBUG for a sampled fraction of calls."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < rate:
+        logger.debug("%s payload: %s", label, Truncated(payload, limit=LOG_MAX_CHARS * 8))
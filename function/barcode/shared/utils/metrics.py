@@ -0,0 +1,166 @@
+import time
+import bisect
+import inspect
+import functools
+import threading
+from collections import defaultdict
+
+# In-process metrics for one function instance: request latency histograms per
+# route, and outbound call counters per dependency. Served by the `metrics` route
+# as JSON or Prometheus text; values reset when the worker restarts.
+
+# Upper bounds in milliseconds; a final +Inf bucket catches the rest.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus layout)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (inf if past the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _json_bound(bound):
+    # JSON has no infinity; use the Prometheus label for the overflow bucket
+    return "+Inf" if bound == float("inf") else bound
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(Histogram)      # route -> Histogram
+        self._requests = defaultdict(int)           # (route, status) -> n
+        self._dependency_calls = defaultdict(int)   # (dependency, status) -> n
+        self._dependency_retries = defaultdict(int)  # dependency -> n
+        self.started_at = time.time()
+
+    def observe_request(self, route: str, status: int, elapsed_ms: float) -> None:
+        with self._lock:
+            self._latency[route].observe(elapsed_ms)
+            self._requests[(route, status)] += 1
+
+    def count_dependency(self, dependency: str, status) -> None:
+        """One outbound call. status is the HTTP status, or an error name."""
+        with self._lock:
+            self._dependency_calls[(dependency, str(status))] += 1
+
+    def count_retry(self, dependency: str) -> None:
+        with self._lock:
+            self._dependency_retries[dependency] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {}
+            for route, hist in self._latency.items():
+                routes[route] = {
+                    "count": hist.count,
+                    "mean_ms": round(hist.sum / hist.count, 1) if hist.count else None,
+                    "p50_ms": _json_bound(hist.quantile(0.50)),
+                    "p95_ms": _json_bound(hist.quantile(0.95)),
+                    "p99_ms": _json_bound(hist.quantile(0.99)),
+                    "status": {str(s): n for (r, s), n in self._requests.items() if r == route},
+                }
+            dependencies = defaultdict(lambda: {"calls": {}, "retries": 0})
+            for (dep, status), n in self._dependency_calls.items():
+                dependencies[dep]["calls"][status] = n
+            for dep, n in self._dependency_retries.items():
+                dependencies[dep]["retries"] = n
+            return {
+                "uptime_seconds": round(time.time() - self.started_at),
+                "routes": routes,
+                "dependencies": dict(dependencies),
+            }
+
+    def prometheus(self) -> str:
+        lines = [
+            "# TYPE http_request_duration_ms histogram",
+        ]
+        with self._lock:
+            for route, hist in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f'http_request_duration_ms_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_ms_bucket{{route="{route}",le="+Inf"}} {hist.count}')
+                lines.append(f'http_request_duration_ms_sum{{route="{route}"}} {hist.sum:.1f}')
+                lines.append(f'http_request_duration_ms_count{{route="{route}"}} {hist.count}')
+            lines.append("# TYPE http_requests_total counter")
+            for (route, status), n in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{route="{route}",status="{status}"}} {n}')
+            lines.append("# TYPE dependency_calls_total counter")
+            for (dep, status), n in sorted(self._dependency_calls.items()):
+                lines.append(f'dependency_calls_total{{dependency="{dep}",status="{status}"}} {n}')
+            lines.append("# TYPE dependency_retries_total counter")
+            for dep, n in sorted(self._dependency_retries.items()):
+                lines.append(f'dependency_retries_total{{dependency="{dep}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def timed_route(route: str):
+    """Record latency and status of an HTTP handler under `route`."""
+    def decorator(handler):
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                status = 500
+                try:
+                    response = await handler(*args, **kwargs)
+                    status = getattr(response, "status_code", 200)
+                    return response
+                finally:
+                    metrics.observe_request(route, status, (time.perf_counter() - start) * 1000)
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = handler(*args, **kwargs)
+                status = getattr(response, "status_code", 200)
+                return response
+            finally:
+                metrics.observe_request(route, status, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+# Statuses the Azure SDK retry policy retries on.
+_AZURE_RETRIED_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def azure_response_hook(dependency: str):
+    """
+    raw_response_hook for Azure SDK clients. It runs once per attempt, so a
+    response with a retried status is counted as a retry as well as a call.
+    """
+    def hook(response):
+        status = response.http_response.status_code
+        metrics.count_dependency(dependency, status)
+        if status in _AZURE_RETRIED_STATUSES:
+            metrics.count_retry(dependency)
+    return hook
@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+import threading
+
+from shared.utils.table_cache import read_self_writes, write_self_writes
+
+# Our own ClickUp writes (pdf-stale tag, Warnings field, comments, contractor
+# notes) come straight back as webhooks. Each write is recorded here for a short
+# window so the webhook handler can drop its echo before doing any I/O.
+#
+# Signatures: "tag:<name>", "field:<custom field id>", "comment".
+SELF_WRITE_TTL_SECONDS = float(os.environ.get("SelfWriteTTLSeconds", "120"))
+
+COMMENT_SIGNATURE = "comment"
+
+
+def tag_signature(name: str) -> str:
+    return f"tag:{name}"
+
+
+def field_signature(field_id: str) -> str:
+    return f"field:{field_id}"
+
+
+def _item_signatures(item: dict) -> list | None:
+    """Signatures a webhook history item would match, or None if it can't be ours."""
+    field = item.get("field")
+    if field in ("tag", "tag_removed"):
+        tags = (item.get("after") or []) + (item.get("before") or [])
+        names = [t.get("name") for t in tags if isinstance(t, dict) and t.get("name")]
+        return [tag_signature(n) for n in names] or None
+    if field == "custom_field":
+        field_id = (item.get("custom_field") or {}).get("id")
+        return [field_signature(field_id)] if field_id else None
+    if field == "comment":
+        return [COMMENT_SIGNATURE]
+    return None
+
+
+class SelfWriteLedger:
+    """
+    Per-task {signature: expires_at} of recent outgoing writes. The in-process map
+    answers the common case with no I/O; a copy in the Table's self_writes
+    partition covers webhooks delivered to another instance.
+
+    With an `executor`, the Table copy is written fire-and-forget on it, so a
+    ClickUp write is not followed by a Table round trip on the caller's thread.
+    """
+
+    def __init__(self, ttl_seconds: float = SELF_WRITE_TTL_SECONDS, executor=None):
+        self.ttl_seconds = ttl_seconds
+        self.executor = executor
+        self._tasks = {}
+        self._backup_pending = set()  # tasks with a backup queued or running
+        self._backup_dirty = set()    # ... and recorded to since it took its snapshot
+        self._lock = threading.Lock()
+
+    def record(self, task_id: str, signature: str) -> None:
+        """Note an outgoing write. The Table copy is best-effort."""
+        now = time.time()
+        with self._lock:
+            writes = {s: exp for s, exp in self._tasks.get(task_id, {}).items() if exp > now}
+            writes[signature] = now + self.ttl_seconds
+            self._tasks[task_id] = writes
+            # Keep memory bounded by dropping tasks whose writes have all expired
+            if len(self._tasks) > 1000:
+                self._tasks = {t: w for t, w in self._tasks.items() if max(w.values(), default=0) > now}
+            # One backup per task at a time, so an older snapshot can't land last;
+            # a backup already in flight writes again to pick this one up.
+            if task_id in self._backup_pending:
+                self._backup_dirty.add(task_id)
+                return
+            self._backup_pending.add(task_id)
+        if self.executor is None:
+            self._backup(task_id)
+            return
+        try:
+            self.executor.submit(self._backup, task_id)
+        except RuntimeError:  # executor shut down
+            self._backup(task_id)
+
+    def _backup(self, task_id: str) -> None:
+        while True:
+            with self._lock:
+                self._backup_dirty.discard(task_id)
+                snapshot = dict(self._tasks.get(task_id, {}))
+            try:
+                write_self_writes(task_id, snapshot)
+            except Exception as e:
+                logging.warning(f"Self-write ledger backup failed for task {task_id} (non-fatal): {e}")
+            with self._lock:
+                if task_id not in self._backup_dirty:
+                    self._backup_pending.discard(task_id)
+                    return
+
+    def filter_echoes(self, task_id: str, history_items: list, backup: dict | None = None) -> list:
+        """
+        Return the history items that are not echoes of our own writes. Pass
+        `backup` (from load_backup) to also match writes made by other instances.
+        """
+        now = time.time()
+        with self._lock:
+            known = {s for s, exp in self._tasks.get(task_id, {}).items() if exp > now}
+        if backup:
+            known |= {s for s, exp in backup.items() if exp > now}
+        if not known:
+            return list(history_items or [])
+        return [
+            item for item in history_items or []
+            if not set(_item_signatures(item) or [None]) <= known
+        ]
+
+    @staticmethod
+    def load_backup(task_id: str) -> dict:
+        try:
+            return read_self_writes(task_id) or {}
+        except Exception as e:
+            logging.warning(f"Self-write ledger read failed for task {task_id}: {e}")
+            return {}
+
+
+self_writes = SelfWriteLedger()
@@ -0,0 +1,155 @@
+# Field-level PDF staleness. The current stale set is kept on the Table Storage
+# entity as a comma-joined `pdf_stale_fields` string so webhook history_items can
+# update it incrementally instead of re-diffing every field.
+import re
+import json
+import hashlib
+
+# (key in _extract_task_fields output, pdf_* baseline key, label)
+PDF_FIELD_COMPARISONS = [
+    ("task_name",        "pdf_task_name",        "task_name"),
+    ("property_address", "pdf_property_address", "property_address"),
+    ("issue_description_raw","pdf_issue_description","issue_description"),
+    ("action_items_raw", "pdf_action_items_raw", "action_items"),
+    ("start_date_ms",    "pdf_start_date_ms",    "scheduled_date"),
+]
+STALE_LABELS = [label for _, _, label in PDF_FIELD_COMPARISONS]
+
+# history_items[].field -> label, for top-level task fields
+_HISTORY_FIELD_LABELS = {
+    "name":       "task_name",
+    "start_date": "scheduled_date",
+}
+# history_items[].custom_field.name -> label
+_CUSTOM_FIELD_LABELS = {
+    "Property Address":       "property_address",
+    "Task Issue Description": "issue_description",
+    "Task Action Items":      "action_items",
+}
+# Labels whose history_items `after` value can be compared to the baseline directly.
+# Rich text fields report rendered text rather than the Quill delta, so they need a fetch.
+_RESOLVABLE_BASELINES = {
+    "task_name":        "pdf_task_name",
+    "property_address": "pdf_property_address",
+    "scheduled_date":   "pdf_start_date_ms",
+}
+
+
+def compute_stale_fields(fields: dict, entity: dict, labels=None) -> list:
+    """Return labels where current ClickUp values differ from the pdf_* baseline."""
+    stale = []
+    for current_key, pdf_key, label in PDF_FIELD_COMPARISONS:
+        if labels is not None and label not in labels:
+            continue
+        pdf_val = entity.get(pdf_key)
+        if pdf_val is not None and str(fields.get(current_key, "")) != str(pdf_val):
+            stale.append(label)
+    return stale
+
+
+def parse_stale_fields(value) -> list | None:
+    """Decode the stored stale set. None means it has never been computed."""
+    if value is None:
+        return None
+    return [label for label in value.split(",") if label]
+
+
+def format_stale_fields(labels) -> str:
+    return ",".join(label for label in STALE_LABELS if label in labels)
+
+
+def _history_label(item: dict) -> str | None:
+    field = item.get("field")
+    if field == "custom_field":
+        return _CUSTOM_FIELD_LABELS.get((item.get("custom_field") or {}).get("name", ""))
+    return _HISTORY_FIELD_LABELS.get(field)
+
+
+def history_labels(history_items: list) -> set:
+    """Labels of PDF fields touched by a webhook's history_items (empty if none)."""
+    labels = set()
+    for item in history_items or []:
+        label = _history_label(item)
+        if label:
+            labels.add(label)
+    return labels
+
+
+def resolve_history(history_items: list, entity: dict) -> tuple:
+    """
+    Compare touched fields' `after` values against the baseline.
+    Returns (stale labels, unresolved labels that need the full task to decide).
+    When a field changed more than once, the latest history item wins.
+    """
+    latest = {}
+    for item in sorted(history_items or [], key=lambda i: int(i.get("date") or 0)):
+        label = _history_label(item)
+        if label:
+            latest[label] = item
+
+    stale, unresolved = set(), set()
+    for label, item in latest.items():
+        pdf_key = _RESOLVABLE_BASELINES.get(label)
+        if pdf_key is None:
+            unresolved.add(label)
+            continue
+        baseline = entity.get(pdf_key)
+        if baseline is not None and str(item.get("after") or "") != str(baseline):
+            stale.add(label)
+    return stale, unresolved
+
+
+# Warnings banner. Its block ids are derived from a hash of the banner content,
+# so the hash of whatever is in the field can be read back from the field itself.
+_BANNER_FIELD_NAMES = {
+    "task_name":         "Task Name",
+    "property_address":  "Property Address",
+    "issue_description": "Issue Description",
+    "action_items":      "Action Items",
+    "scheduled_date":    "Scheduled Date",
+}
+_BANNER_BLOCK_ID = re.compile(r"block-pdfwarn-([0-9a-f]{16})-\d+")
+# Hash of a cleared field (or one holding an old banner written with random ids).
+CLEARED_BANNER_HASH = ""
+LEGACY_BANNER_HASH = "legacy"
+
+
+def warnings_banner_hash(stale_fields: list, pdf_generated: str) -> str:
+    """Identity of the banner content; the detection time is not part of it."""
+    canonical = json.dumps([format_stale_fields(stale_fields), pdf_generated])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def build_warnings_banner(stale_fields: list, pdf_generated: str, detected_at: str) -> tuple:
+    """
+    Return (Quill value string, banner hash) for the red "PDF outdated" banner.
+    The same stale set and generation time always give the same hash and block ids.
+    """
+    banner_hash = warnings_banner_hash(stale_fields, pdf_generated)
+    lines = [("⚠️ PDF OUTDATED — REGENERATION REQUIRED", False)]
+    if pdf_generated:
+        lines.append((f"PDF last generated: {pdf_generated}", False))
+    lines.append((f"Changes detected: {detected_at}", False))
+    lines.append(("Fields changed since last PDF generation:", False))
+    lines += [(_BANNER_FIELD_NAMES.get(f, f), True) for f in STALE_LABELS if f in stale_fields]
+    lines.append(("To regenerate: re-add the 'createpdf' tag to this task, or use the technician portal.", False))
+
+    ops = []
+    for i, (text, bullet) in enumerate(lines):
+        attrs = {
+            "block-id": f"block-pdfwarn-{banner_hash}-{i}",
+            "advanced-banner": "[object Object]",
+            "advanced-banner-color": "red-strong",
+        }
+        if bullet:
+            attrs["list"] = {"list": "bullet"}
+        ops += [{"insert": text}, {"attributes": attrs, "insert": "\n"}]
+    return json.dumps({"ops": ops}), banner_hash
+
+
+def current_banner_hash(value) -> str:
+    """Banner hash of a Warnings field value from a task payload."""
+    if not isinstance(value, str) or "advanced-banner" not in value:
+        return CLEARED_BANNER_HASH
+    match = _BANNER_BLOCK_ID.search(value)
+    return match.group(1) if match else LEGACY_BANNER_HASH
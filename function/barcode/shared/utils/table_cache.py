@@ -1,36 +1,68 @@
 import os
 import json
 import logging
+import threading
 from datetime import datetime, timezone
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceModifiedError, ResourceNotFoundError
 from azure.data.tables import TableServiceClient, TableClient, UpdateMode
 from azure.identity import ManagedIdentityCredential
+from shared.utils.metrics import azure_response_hook
 
 TABLE_NAME = "TaskCache"
 PARTITION_KEY = "task"
+RECONCILER_PARTITION_KEY = "reconciler"
+# Self-write ledgers live in their own rows so recording one never changes the
+# task entity's ETag (which the UI holds for If-Match).
+SELF_WRITES_PARTITION_KEY = "self_writes"
 CACHE_TTL_SECONDS = 3600
+# Entity group transactions are limited to 100 operations.
+MAX_TRANSACTION_OPS = 100
+# String properties are capped at 64 KiB of UTF-16
+MAX_STRING_PROPERTY_CHARS = 32_000
+# Bumped by every tech-field save; see tech_etag().
+TECH_VERSION_FIELD = "tech_version"
+
+_table_clients = {}
+_table_clients_lock = threading.Lock()
+
+
+class SnapshotConflict(Exception):
+    """The entity's ETag changed between read and a conditional write."""
 
 
 def _get_table_client(table_name: str = TABLE_NAME) -> TableClient:
+    """Return a cached TableClient; the table is created at most once per process."""
+    client = _table_clients.get(table_name)
+    if client is None:
+        with _table_clients_lock:
+            client = _table_clients.get(table_name)
+            if client is None:
+                client = _create_table_client(table_name)
+                _table_clients[table_name] = client
+    return client
+
+
+def _create_table_client(table_name: str) -> TableClient:
     if os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT") == "Development":
         conn_str = os.environ.get("AzureWebJobsStorage", "UseDevelopmentStorage=true")
-        service = TableServiceClient.from_connection_string(conn_str)
+        service = TableServiceClient.from_connection_string(conn_str, raw_response_hook=azure_response_hook("table"))
     else:
         credential = ManagedIdentityCredential(
             client_id=os.environ.get("AzureWebJobsStorage__clientId")
         )
         service = TableServiceClient(
             endpoint="https://faclickupbarcodeautomati.table.core.windows.net",
-            credential=credential
+            credential=credential,
+            raw_response_hook=azure_response_hook("table"),
         )
     service.create_table_if_not_exists(table_name)
     return service.get_table_client(table_name)
 
 
-def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update_snapshot_time: bool = True) -> None:
+def build_snapshot_entity(task_id: str, task_data: dict, pdf_blob_url: str, update_snapshot_time: bool = True) -> dict:
     """
-    Upsert a task snapshot entity into Table Storage.
-    Uses MERGE mode so existing tech fields (arrival_date_iso, etc.) are preserved
-    if the PDF is regenerated for the same task.
+    Build the snapshot entity for a ClickUp task payload without writing it.
 
     Set update_snapshot_time=False when refreshing cached ClickUp fields on a GET
     so that snapshot_written_at reflects only actual PDF generation events.
@@ -41,6 +73,7 @@ def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update
     start_buffer_hours = 0
     translate_flag = False
     contractor_notes_field_id = None
+    warnings_field_id = None
 
     for cf in task_data.get("custom_fields", []):
         name = cf.get("name", "")
@@ -55,9 +88,11 @@ def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update
             val = cf.get("value_richtext")
             action_items_raw = val if isinstance(val, str) else (json.dumps(val) if val else "")
         elif name == "Translate":
-            translate_flag = cf.get("value", "false").lower() == "true"
+            translate_flag = str(cf.get("value", "false")).lower() == "true"
         elif name.lower() == "contractor notes":
             contractor_notes_field_id = cf.get("id")
+        elif name.lower() == "warnings":
+            warnings_field_id = cf.get("id")
 
     status_obj = task_data.get("status", {})
     task_status = status_obj.get("status", "") if isinstance(status_obj, dict) else ""
@@ -75,6 +110,9 @@ def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update
         "translate_flag": translate_flag,
         "pdf_blob_url": pdf_blob_url,
     }
+    list_id = (task_data.get("list") or {}).get("id")
+    if list_id:
+        entity["list_id"] = list_id
     if update_snapshot_time:
         entity["snapshot_written_at"] = datetime.now(timezone.utc).isoformat()
         # Store field values as of PDF generation so GET can diff against them
@@ -83,12 +121,49 @@ def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update
         entity["pdf_issue_description"] = desc_raw
         entity["pdf_action_items_raw"] = action_items_raw
         entity["pdf_start_date_ms"] = str(task_data.get("start_date") or "")
+        entity["pdf_stale_fields"] = ""
     if contractor_notes_field_id:
         entity["contractor_notes_field_id"] = contractor_notes_field_id
+    if warnings_field_id:
+        entity["warnings_field_id"] = warnings_field_id
+    return entity
+
+
+def write_task_snapshot(task_id: str, task_data: dict, pdf_blob_url: str, update_snapshot_time: bool = True) -> dict:
+    """
+    Upsert a task snapshot entity into Table Storage and return it.
+    Uses MERGE mode so existing tech fields (arrival_date_iso, etc.) are preserved
+    if the PDF is regenerated for the same task.
 
+    Set update_snapshot_time=False when refreshing cached ClickUp fields on a GET
+    so that snapshot_written_at reflects only actual PDF generation events.
+    """
+    entity = build_snapshot_entity(task_id, task_data, pdf_blob_url, update_snapshot_time)
     client = _get_table_client()
     client.upsert_entity(entity=entity, mode=UpdateMode.MERGE)
     logging.info(f"Task snapshot written to Table Storage for task {task_id}")
+    return entity
+
+
+def write_task_snapshots(snapshots: list) -> None:
+    """
+    MERGE-upsert many task entities (e.g. from build_snapshot_entity) using entity
+    group transactions, MAX_TRANSACTION_OPS per round trip. A failed batch falls back
+    to per-entity upserts so one bad entity doesn't drop the rest.
+    """
+    client = _get_table_client()
+    for start in range(0, len(snapshots), MAX_TRANSACTION_OPS):
+        batch = snapshots[start:start + MAX_TRANSACTION_OPS]
+        try:
+            client.submit_transaction([("upsert", e, {"mode": UpdateMode.MERGE}) for e in batch])
+        except Exception as e:
+            logging.warning(f"Snapshot transaction failed, retrying individually: {e}")
+            for entity in batch:
+                try:
+                    client.upsert_entity(entity=entity, mode=UpdateMode.MERGE)
+                except Exception as row_err:
+                    logging.warning(f"Snapshot write failed for task {entity['RowKey']}: {row_err}")
+    logging.info(f"{len(snapshots)} task snapshots written to Table Storage")
 
 
 def read_task_snapshot(task_id: str) -> dict | None:
@@ -101,6 +176,51 @@ def read_task_snapshot(task_id: str) -> dict | None:
         return None
 
 
+def read_task_snapshot_with_etag(task_id: str) -> tuple:
+    """
+    Return (entity dict, etag), or (None, None) if not found. Other errors are
+    raised: callers condition writes on this ETag, and treating a failed read as
+    "absent" would turn those writes into unconditional upserts.
+    """
+    try:
+        entity = _get_table_client().get_entity(partition_key=PARTITION_KEY, row_key=task_id)
+    except ResourceNotFoundError:
+        return None, None
+    return dict(entity), entity.metadata.get("etag")
+
+
+def read_all_task_snapshots(select: list | None = None) -> dict:
+    """Return every task entity keyed by task id, from a single partition query."""
+    client = _get_table_client()
+    entities = client.query_entities(
+        query_filter="PartitionKey eq @pk",
+        parameters={"pk": PARTITION_KEY},
+        select=select,
+    )
+    return {e["RowKey"]: dict(e) for e in entities}
+
+
+def read_reconciler_watermark(list_id: str) -> int | None:
+    """date_updated (ms) up to which the staleness reconciler has processed a list."""
+    try:
+        entity = _get_table_client().get_entity(partition_key=RECONCILER_PARTITION_KEY, row_key=list_id)
+        return int(entity.get("date_updated_watermark_ms") or 0) or None
+    except Exception:
+        return None
+
+
+def write_reconciler_watermark(list_id: str, watermark_ms: int) -> None:
+    _get_table_client().upsert_entity(
+        entity={
+            "PartitionKey": RECONCILER_PARTITION_KEY,
+            "RowKey": list_id,
+            "date_updated_watermark_ms": str(watermark_ms),
+            "reconciled_at": datetime.now(timezone.utc).isoformat(),
+        },
+        mode=UpdateMode.MERGE,
+    )
+
+
 def is_snapshot_fresh(entity: dict, ttl_seconds: int = CACHE_TTL_SECONDS) -> bool:
     """Return True if snapshot_written_at is within ttl_seconds of now."""
     written_at_str = entity.get("snapshot_written_at")
@@ -116,41 +236,182 @@ def is_snapshot_fresh(entity: dict, ttl_seconds: int = CACHE_TTL_SECONDS) -> boo
         return False
 
 
-def seed_pdf_snapshot_fields(task_id: str, fields: dict) -> None:
-    """
-    One-time seed of pdf_* baseline fields for tasks that existed before the
-    field-diff feature was deployed. Uses MERGE so no other fields are touched.
-    After this write, any subsequent ClickUp changes will be detected on GET.
-    """
-    entity = {
-        "PartitionKey": PARTITION_KEY,
-        "RowKey": task_id,
+def pdf_seed_fields(fields: dict) -> dict:
+    """pdf_* baseline values taken from the current extracted task fields."""
+    return {
         "pdf_task_name":         fields.get("task_name", ""),
         "pdf_property_address":  fields.get("property_address", ""),
         "pdf_issue_description": fields.get("issue_description_raw", ""),
         "pdf_action_items_raw":  fields.get("action_items_raw", ""),
         "pdf_start_date_ms":     fields.get("start_date_ms", ""),
+        "pdf_stale_fields":      "",
     }
+
+
+def write_warnings_banner_hash(task_id: str, banner_hash: str) -> None:
+    """Record which Warnings banner (by content hash, "" when cleared) the task's field holds."""
+    _get_table_client().upsert_entity(
+        entity={"PartitionKey": PARTITION_KEY, "RowKey": task_id, "warnings_banner_hash": banner_hash},
+        mode=UpdateMode.MERGE,
+    )
+
+
+def read_self_writes(task_id: str) -> dict | None:
+    """Return the task's recent self-write ledger ({signature: expires_at}), or None."""
+    try:
+        entity = _get_table_client().get_entity(
+            partition_key=SELF_WRITES_PARTITION_KEY, row_key=task_id, select=["self_writes"]
+        )
+    except ResourceNotFoundError:
+        return None
+    raw = entity.get("self_writes")
+    return json.loads(raw) if raw else None
+
+
+def write_self_writes(task_id: str, writes: dict) -> None:
+    """MERGE the task's self-write ledger into its row in the self_writes partition."""
+    entity = {"PartitionKey": SELF_WRITES_PARTITION_KEY, "RowKey": task_id, "self_writes": json.dumps(writes)}
+    _get_table_client().upsert_entity(entity=entity, mode=UpdateMode.MERGE)
+
+
+def read_translation_cache(task_id: str) -> dict | None:
+    """Return the task's cached PDF translations ({"hash", "strings"}), or None."""
+    try:
+        client = _get_table_client()
+        entity = client.get_entity(
+            partition_key=PARTITION_KEY, row_key=task_id, select=["pdf_translations"]
+        )
+        raw = entity.get("pdf_translations")
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def write_translation_cache(task_id: str, value: dict) -> None:
+    """MERGE the task's PDF translations. Skipped if too large for a Table string property."""
+    raw = json.dumps(value, ensure_ascii=False)
+    if len(raw) > MAX_STRING_PROPERTY_CHARS:
+        logging.warning(f"Translation cache for task {task_id} is {len(raw)} chars; not stored")
+        return
+    entity = {"PartitionKey": PARTITION_KEY, "RowKey": task_id, "pdf_translations": raw}
     client = _get_table_client()
     client.upsert_entity(entity=entity, mode=UpdateMode.MERGE)
-    logging.info(f"Seeded pdf_* baseline fields in Table Storage for task {task_id}")
 
 
-def update_tech_fields(task_id: str, updates: dict) -> None:
+class TaskUnitOfWork:
+    """
+    Coalesces MERGE writes to one task entity into a single round trip.
+
+    Construct with the entity and ETag from read_task_snapshot_with_etag(), call
+    merge() as many times as needed, then commit(). Only values that differ from
+    the loaded entity are sent, so a request that changes nothing writes nothing.
+    With an ETag, commit() is conditional and raises SnapshotConflict if another
+    writer got there first — this replaces re-reading the entity to detect races.
+    """
+
+    def __init__(self, task_id: str, entity: dict | None = None, etag: str | None = None):
+        self.task_id = task_id
+        self.entity = entity or {}
+        self.etag = etag
+        self._pending = {}
+
+    def merge(self, fields: dict) -> None:
+        for key, value in fields.items():
+            if key in ("PartitionKey", "RowKey"):
+                continue
+            if key not in self._pending and self.entity.get(key) == value:
+                continue
+            self._pending[key] = value
+
+    def commit(self, conditional: bool = True) -> str | None:
+        """Flush pending fields. Returns the entity's new ETag (unchanged if nothing was written)."""
+        if not self._pending:
+            return self.etag
+
+        entity = {"PartitionKey": PARTITION_KEY, "RowKey": self.task_id, **self._pending}
+        client = _get_table_client()
+        try:
+            if conditional and self.etag:
+                result = client.update_entity(
+                    entity=entity,
+                    mode=UpdateMode.MERGE,
+                    etag=self.etag,
+                    match_condition=MatchConditions.IfNotModified,
+                )
+            else:
+                result = client.upsert_entity(entity=entity, mode=UpdateMode.MERGE)
+        except (ResourceModifiedError, ResourceNotFoundError) as e:
+            raise SnapshotConflict(f"Task {self.task_id} changed since it was read") from e
+        except HttpResponseError as e:
+            if e.status_code == 412:
+                raise SnapshotConflict(f"Task {self.task_id} changed since it was read") from e
+            raise
+
+        self.entity.update(self._pending)
+        self._pending = {}
+        self.etag = (result or {}).get("etag", self.etag)
+        logging.info(f"Unit of work committed for task {self.task_id}")
+        return self.etag
+
+
+def tech_etag(entity: dict | None) -> str:
     """
-    Merge only technician-writable fields into the entity.
+    Concurrency token for the technician fields, returned to the UI as `etag`.
+    It is the entity's tech_version, which only tech saves bump, so background
+    writes to the same row (snapshots, staleness, translations) don't 412 a save.
+    """
+    return f'"{int((entity or {}).get(TECH_VERSION_FIELD) or 0)}"'
+
+
+def update_tech_fields(task_id: str, updates: dict, if_match: str | None = None, max_retries: int = 3) -> tuple:
+    """
+    Merge only technician-writable fields into the entity and bump tech_version.
     Does not overwrite snapshot fields from ClickUp.
+
+    With if_match (a tech_etag) the save only succeeds if no other tech save
+    happened since; raises SnapshotConflict otherwise. Concurrent background
+    writes are absorbed by compare_and_swap's retry. Returns (entity, tech_etag).
     """
+    def mutate(entity):
+        if if_match is not None and if_match.strip() not in ("*", tech_etag(entity)):
+            raise SnapshotConflict(f"Tech fields of task {task_id} changed since they were read")
+        version = int(entity.get(TECH_VERSION_FIELD) or 0) + 1
+        return {**_tech_field_entity(updates), TECH_VERSION_FIELD: version}
+
+    entity, _ = compare_and_swap(task_id, mutate, max_retries=max_retries)
+    logging.info(f"Tech fields updated in Table Storage for task {task_id}")
+    return entity, tech_etag(entity)
+
+
+def _tech_field_entity(updates: dict) -> dict:
     allowed = {"arrival_date_iso", "completion_status", "tech_notes"}
-    entity = {
-        "PartitionKey": PARTITION_KEY,
-        "RowKey": task_id,
-        "last_ui_update_at": datetime.now(timezone.utc).isoformat(),
-    }
+    entity = {"last_ui_update_at": datetime.now(timezone.utc).isoformat()}
     for key in allowed:
         if key in updates:
             entity[key] = updates[key]
+    return entity
 
-    client = _get_table_client()
-    client.upsert_entity(entity=entity, mode=UpdateMode.MERGE)
-    logging.info(f"Tech fields updated in Table Storage for task {task_id}")
+
+def compare_and_swap(task_id: str, mutate, max_retries: int = 3) -> tuple:
+    """
+    Optimistic read-modify-write. mutate(entity) receives the current entity
+    (empty dict if absent) and returns the fields to merge, or None to skip the
+    write. The merge is conditional on the ETag that was read; on conflict the
+    entity is re-read and mutate() re-applied, up to max_retries times.
+    Returns (merged entity, new ETag).
+    """
+    for attempt in range(max_retries + 1):
+        entity, etag = read_task_snapshot_with_etag(task_id)
+        entity = entity or {}
+        changes = mutate(entity)
+        if not changes:
+            return entity, etag
+        uow = TaskUnitOfWork(task_id, entity, etag)
+        uow.merge(changes)
+        try:
+            new_etag = uow.commit()
+            return uow.entity, new_etag
+        except SnapshotConflict:
+            if attempt == max_retries:
+                raise
+            logging.info(f"ETag conflict on task {task_id}, retrying ({attempt + 1}/{max_retries})")
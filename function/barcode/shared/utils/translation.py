@@ -0,0 +1,228 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+import requests
+from requests.adapters import HTTPAdapter
+from shared.utils.metrics import metrics
+
+# "azure" (default) or "local". The local backend needs no key or network, so
+# PDF throughput and latency can be measured offline.
+TRANSLATION_BACKEND = os.environ.get("TranslationBackend", "azure").lower()
+TARGET_LANGUAGE = "zh-Hans"
+SOURCE_LANGUAGE = "en"
+
+AZURE_TRANSLATOR_ENDPOINT = os.environ.get(
+    "TranslationEndpoint", "https://api.cognitive.microsofttranslator.com"
+)
+CONNECT_TIMEOUT_SECONDS = float(os.environ.get("TranslationConnectTimeout", "3.05"))
+READ_TIMEOUT_SECONDS = float(os.environ.get("TranslationReadTimeout", "8"))
+
+# Azure Translator v3 accepts up to 1000 texts / 50,000 characters per request.
+MAX_BATCH_TEXTS = 100
+MAX_BATCH_CHARS = 40_000
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("TranslationBreakerFailures", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("TranslationBreakerResetSeconds", "30"))
+
+# Simulated per-request latency for the local backend, in milliseconds.
+LOCAL_LATENCY_MS = float(os.environ.get("TranslationLocalLatencyMs", "0"))
+
+
+class TranslationError(Exception):
+    """A backend could not translate a batch."""
+
+
+class TranslationBackend(ABC):
+    """Translates batches of non-empty strings. Implementations raise TranslationError."""
+    name = "base"
+
+    @abstractmethod
+    def translate_batch(self, texts: list, to: str = TARGET_LANGUAGE) -> list:
+        ...
+
+
+class AzureTranslatorBackend(TranslationBackend):
+    """Azure AI Translator v3 over a pooled session with strict timeouts."""
+    name = "azure"
+
+    def __init__(self, endpoint: str = AZURE_TRANSLATOR_ENDPOINT,
+                 key: str | None = None, region: str | None = None):
+        self.url = endpoint.rstrip("/") + "/translate"
+        self.key = key or os.environ.get("TranslationAPIKey")
+        self.region = region or os.environ.get("TranslationRegion")
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+
+    def translate_batch(self, texts: list, to: str = TARGET_LANGUAGE) -> list:
+        headers = {
+            "Ocp-Apim-Subscription-Key": self.key or "",
+            "Content-type": "application/json",
+            "X-ClientTraceId": str(uuid.uuid4()),
+        }
+        if self.region:
+            headers["Ocp-Apim-Subscription-Region"] = self.region
+        try:
+            resp = self._session.post(
+                self.url,
+                params={"api-version": "3.0", "from": SOURCE_LANGUAGE, "to": to},
+                headers=headers,
+                json=[{"text": text} for text in texts],
+                timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+            )
+        except requests.RequestException as e:
+            metrics.count_dependency("translator", type(e).__name__)
+            raise TranslationError(f"Translator request failed: {type(e).__name__}: {e}") from e
+        metrics.count_dependency("translator", resp.status_code)
+        if resp.status_code != 200:
+            raise TranslationError(f"Translator returned {resp.status_code}: {resp.text[:200]}")
+        try:
+            return [item["translations"][0]["text"] for item in resp.json()]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise TranslationError(f"Unexpected Translator response: {e}") from e
+
+
+class LocalTranslationBackend(TranslationBackend):
+    """
+    Deterministic offline stand-in: tags each text with the target language.
+    {placeholders} and text content pass through untouched.
+    """
+    name = "local"
+
+    def __init__(self, latency_ms: float = LOCAL_LATENCY_MS):
+        self.latency_ms = latency_ms
+
+    def translate_batch(self, texts: list, to: str = TARGET_LANGUAGE) -> list:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return [f"[{to}] {text}" for text in texts]
+
+
+class CircuitBreaker:
+    """
+    Closed until `failure_threshold` consecutive failures, then open for
+    `reset_seconds`. After that one trial call is let through (half-open): success
+    closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class Translator:
+    """
+    Batches texts for a backend behind a circuit breaker.
+    translate_many() returns None for each text it could not translate; while
+    the breaker is open it returns immediately without touching the network.
+    """
+
+    def __init__(self, backend: TranslationBackend, breaker: CircuitBreaker | None = None):
+        self.backend = backend
+        self.breaker = breaker or CircuitBreaker()
+
+    def translate_many(self, texts: list, to: str = TARGET_LANGUAGE) -> list:
+        results = [None] * len(texts)
+        pending = [(i, text) for i, text in enumerate(texts) if text]
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = ""
+        for batch in self._batches(pending):
+            if not self.breaker.allow():
+                logging.warning(f"Translation circuit open; skipping {len(batch)} text(s)")
+                break
+            try:
+                translated = self.backend.translate_batch([text for _, text in batch], to=to)
+                if len(translated) != len(batch):
+                    raise TranslationError(f"Expected {len(batch)} translations, got {len(translated)}")
+            except Exception as e:
+                # Any failure, not just TranslationError, must close out a half-open
+                # trial; otherwise the breaker never lets another call through.
+                self.breaker.record_failure()
+                logging.warning(f"Translation failed ({self.backend.name}, breaker {self.breaker.state}): {e}")
+                continue
+            self.breaker.record_success()
+            for (i, _), text in zip(batch, translated):
+                results[i] = text
+        return results
+
+    def translate(self, text: str, to: str = TARGET_LANGUAGE) -> str:
+        """Translate one text, falling back to the original on any failure."""
+        if not text:
+            return ""
+        result = self.translate_many([text], to=to)[0]
+        return text if result is None else result
+
+    @staticmethod
+    def _batches(pending):
+        batch, chars = [], 0
+        for item in pending:
+            size = len(item[1])
+            if batch and (len(batch) >= MAX_BATCH_TEXTS or chars + size > MAX_BATCH_CHARS):
+                yield batch
+                batch, chars = [], 0
+            batch.append(item)
+            chars += size
+        if batch:
+            yield batch
+
+
+_BACKENDS = {
+    "azure": AzureTranslatorBackend,
+    "local": LocalTranslationBackend,
+}
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_translator() -> Translator:
+    """Process-wide Translator for the backend named by the TranslationBackend setting."""
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                backend_cls = _BACKENDS.get(TRANSLATION_BACKEND)
+                if backend_cls is None:
+                    logging.warning(f"Unknown TranslationBackend {TRANSLATION_BACKEND!r}; using azure")
+                    backend_cls = AzureTranslatorBackend
+                _translator = Translator(backend_cls())
+    return _translator
@@ -0,0 +1,80 @@
+import os
+import re
+import hmac
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+# ClickUp signs every webhook delivery: X-Signature is the hex HMAC-SHA256 of the
+# raw body, keyed with the secret returned when the webhook was created.
+WEBHOOK_SECRET = os.environ.get("ClickUpWebhookSecret", "")
+# Only a local `func start` may run without the secret; anywhere else an unset
+# secret rejects every delivery rather than accepting forged ones.
+ALLOW_UNSIGNED = os.environ.get("AZURE_FUNCTIONS_ENVIRONMENT") == "Development"
+
+# Events http_trigger_task_parse acts on, and the history fields that matter for
+# each. Everything else is answered from the raw bytes, before JSON decoding.
+_TASK_UPDATED_FIELDS = {b"name", b"start_date", b"custom_field"}
+_EVENT_RE = re.compile(rb'"event"\s*:\s*"([A-Za-z]+)"')
+_FIELD_RE = re.compile(rb'"field"\s*:\s*"([A-Za-z_]+)"')
+
+
+class WebhookCounters:
+    """Thread-safe tallies of webhook outcomes, for the stats route."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+counters = WebhookCounters()
+_warned_unsigned = False
+
+
+def verify_signature(raw: bytes, signature: str | None, secret: str = WEBHOOK_SECRET,
+                     allow_unsigned: bool = ALLOW_UNSIGNED) -> bool:
+    """
+    True when X-Signature matches the body. With no secret configured, deliveries
+    are accepted only in Development (with a warning logged once); otherwise they
+    are all rejected and an error is logged once.
+    """
+    global _warned_unsigned
+    if not secret:
+        if not _warned_unsigned:
+            if allow_unsigned:
+                logging.warning("ClickUpWebhookSecret is not set; webhook signatures are not verified")
+            else:
+                logging.error("ClickUpWebhookSecret is not set; rejecting all webhook deliveries")
+            _warned_unsigned = True
+        return allow_unsigned
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), raw, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def prefilter(raw: bytes) -> str | None:
+    """
+    Decide from the raw body whether an event can matter. Returns a reason for
+    dropping it, or None to process it. Only rules out events that the handler
+    would skip anyway, so it never drops a relevant one.
+    """
+    match = _EVENT_RE.search(raw)
+    if match is None:
+        return None  # unusual shape; let the full parser decide
+    event = match.group(1)
+    if event == b"taskTagUpdated":
+        return None if b"createpdf" in raw else "tag change without createpdf"
+    if event == b"taskUpdated":
+        fields = set(_FIELD_RE.findall(raw))
+        return None if fields & _TASK_UPDATED_FIELDS else "no PDF field in history"
+    return f"event {event.decode('ascii')} not handled"
@@ -0,0 +1,77 @@
+import hmac
+import json
+import hashlib
+
+import pytest
+
+from shared.utils import webhook
+
+SECRET = "s3cret"
+
+
+def sign(raw: bytes, secret: str = SECRET) -> str:
+    return hmac.new(secret.encode("utf-8"), raw, hashlib.sha256).hexdigest()
+
+
+def body(**fields) -> bytes:
+    return json.dumps(fields).encode("utf-8")
+
+
+class TestVerifySignature:
+    def test_valid_signature(self):
+        raw = body(event="taskUpdated", task_id="abc")
+        assert webhook.verify_signature(raw, sign(raw), secret=SECRET)
+
+    def test_valid_signature_ignores_case_and_whitespace(self):
+        raw = body(event="taskUpdated")
+        assert webhook.verify_signature(raw, f"  {sign(raw).upper()}\n", secret=SECRET)
+
+    def test_signature_for_other_body(self):
+        raw = body(event="taskUpdated", task_id="abc")
+        tampered = body(event="taskUpdated", task_id="xyz")
+        assert not webhook.verify_signature(tampered, sign(raw), secret=SECRET)
+
+    def test_signature_with_other_secret(self):
+        raw = body(event="taskUpdated")
+        assert not webhook.verify_signature(raw, sign(raw, "other"), secret=SECRET)
+
+    @pytest.mark.parametrize("signature", [None, ""])
+    def test_missing_signature(self, signature):
+        assert not webhook.verify_signature(body(event="taskUpdated"), signature, secret=SECRET)
+
+    def test_no_secret_rejects_outside_development(self):
+        raw = body(event="taskUpdated")
+        assert not webhook.verify_signature(raw, sign(raw), secret="", allow_unsigned=False)
+        assert not webhook.verify_signature(raw, None, secret="", allow_unsigned=False)
+
+    def test_no_secret_accepts_in_development(self):
+        assert webhook.verify_signature(body(event="taskUpdated"), None, secret="", allow_unsigned=True)
+
+
+class TestPrefilter:
+    def test_unrecognized_shape_is_processed(self):
+        assert webhook.prefilter(b'{"task_id": "abc"}') is None
+
+    def test_tag_update_with_createpdf_is_processed(self):
+        raw = body(event="taskTagUpdated", history_items=[{"after": [{"name": "createpdf"}]}])
+        assert webhook.prefilter(raw) is None
+
+    def test_tag_update_without_createpdf_is_dropped(self):
+        raw = body(event="taskTagUpdated", history_items=[{"after": [{"name": "urgent"}]}])
+        assert webhook.prefilter(raw) == "tag change without createpdf"
+
+    @pytest.mark.parametrize("field", ["name", "start_date", "custom_field"])
+    def test_task_update_touching_pdf_field_is_processed(self, field):
+        raw = body(event="taskUpdated", history_items=[{"field": "status"}, {"field": field}])
+        assert webhook.prefilter(raw) is None
+
+    def test_task_update_without_pdf_field_is_dropped(self):
+        raw = body(event="taskUpdated", history_items=[{"field": "status"}, {"field": "assignee_add"}])
+        assert webhook.prefilter(raw) == "no PDF field in history"
+
+    def test_task_update_with_spaced_json_is_matched(self):
+        raw = b'{"event" : "taskUpdated", "history_items": [{"field" :  "name"}]}'
+        assert webhook.prefilter(raw) is None
+
+    def test_other_event_is_dropped(self):
+        assert webhook.prefilter(body(event="taskCommentPosted")) == "event taskCommentPosted not handled"